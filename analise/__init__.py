@@ -0,0 +1 @@
+# Funções de apoio da página de análise (pages/4_Analise.py)
@@ -0,0 +1,244 @@
+"""Cubo de agregados pré-calculados que alimenta os gráficos da página de análise.
+
+O cubo é montado em uma única passada sobre os dados e guarda contagens por
+mês × tipo de veículo × status × pagamento × hora (colunas de analise.derivadas),
+com as somas e momentos das métricas numéricas. Fica salvo ao lado do dataset e é refeito quando o CSV muda.
+
+No modo em memória, os cubos filtrados por veículo, pagamento, status e
+períodos de meses inteiros tiram as células do cubo completo (as dimensões já
+estão nelas, basta selecionar); só um período que corta um mês no meio
+reagrupa as linhas filtradas. Avaliações, distância por mês e boxplots
+(contagens e quantis fora das dimensões) vêm sempre das linhas.
+"""
+
+import datetime
+import os
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from analise import config
+from analise.dados import CAMINHO_CSV, versao_arquivo
+from analise.derivadas import SEM_VALOR, rotulo_mes
+from analise.filtros import SEM_FILTRO
+from analise.medicao import registrar_falta
+
+
+DIMENSOES = ["AnoMes", "Vehicle Type", "Booking Status", "Status Simplificado", "Payment Method", "Hour"]
+METRICAS = ["Booking Value", "Ride Distance", "Avg VTAT"]
+CANCELAMENTOS = ["Cancelled Rides by Customer", "Cancelled Rides by Driver"]
+AVALIACOES = ["Driver Ratings", "Customer Rating"]
+
+# Date e Time só entram no cubo através das colunas derivadas
+COLUNAS_CUBO = ["Vehicle Type", "Booking Status", "Payment Method"] + METRICAS + CANCELAMENTOS + AVALIACOES
+
+
+@dataclass
+class Cubo:
+    versao: str
+    total: int
+    modo: str
+    # Uma linha por combinação observada das dimensões
+    celulas: pd.DataFrame
+    avaliacoes: dict = field(default_factory=dict)
+    distancia_mes: pd.DataFrame = None
+    # EstatisticasBoxplot por métrica: alimentam os boxplots e os textos
+    resumo: dict = field(default_factory=dict)
+    # Só no modo streaming: resumos por métrica e tabela de classificação
+    sketches: dict = field(default_factory=dict)
+    classificacao: pd.DataFrame = None
+
+
+def contar_categorias(serie, pesos=None):
+    """Contagem por categoria (como value_counts) via códigos categóricos e np.bincount."""
+    if not isinstance(serie.dtype, pd.CategoricalDtype):
+        serie = serie.astype("category")
+    codigos = serie.cat.codes.to_numpy()
+    validos = codigos >= 0
+    if pesos is not None:
+        pesos = np.asarray(pesos)[validos]
+    contagens = np.bincount(codigos[validos], weights=pesos, minlength=len(serie.cat.categories))
+    return (
+        pd.Series(contagens.astype("int64"), index=pd.Index(serie.cat.categories, name=serie.name), name="count")
+        .sort_values(ascending=False, kind="stable")
+    )
+
+
+def agregar_celulas(df, derivadas):
+    """Contagens, somas e momentos por combinação das dimensões do cubo."""
+    base = pd.concat([df.drop(columns=derivadas.columns, errors="ignore"), derivadas], axis=1)
+    valores = {"Qtd": pd.Series(1, index=base.index)}
+    # Somas sempre em float64, qualquer que seja o tipo compacto da coluna (bool, float32)
+    for col in CANCELAMENTOS:
+        valores[col] = base[col].astype("float64").fillna(0)
+    for m in METRICAS:
+        presente = base[m].notna()
+        metrica = base[m].astype("float64").fillna(0)
+        valores[f"{m}:n"] = presente.astype("int64")
+        valores[f"{m}:soma"] = metrica
+        valores[f"{m}:soma2"] = metrica ** 2
+    return (
+        pd.DataFrame(valores).join(base[DIMENSOES])
+        .groupby(DIMENSOES, dropna=False, observed=True, sort=False).sum()
+        .reset_index()
+    )
+
+
+def somar_celulas(*partes):
+    """Junta tabelas de células de partes diferentes dos dados."""
+    return (
+        pd.concat(partes, ignore_index=True)
+        .groupby(DIMENSOES, dropna=False, observed=True, sort=False).sum()
+        .reset_index()
+    )
+
+
+def distancia_por_mes(distancias, meses):
+    """Média e mediana da distância por mês, com o rótulo "AAAA-MM"."""
+    resultado = distancias.groupby(meses).agg(["mean", "median"])
+    resultado = resultado[resultado.index != SEM_VALOR]
+    resultado.insert(0, "AnoMes", rotulo_mes(resultado.index))
+    return resultado.reset_index(drop=True)
+
+
+def _mes(data):
+    return int(np.datetime64(data, "M").astype("int64"))
+
+
+def filtro_nas_celulas(filtro):
+    """Se o filtro cabe nas dimensões das células: categorias sempre, período só em meses inteiros."""
+    return ((filtro.inicio is None or filtro.inicio.day == 1)
+            and (filtro.fim is None or (filtro.fim + datetime.timedelta(days=1)).day == 1))
+
+
+def filtrar_celulas(celulas, filtro):
+    """Células que atendem ao filtro (que deve caber nas células, ver filtro_nas_celulas)."""
+    mascara = np.ones(len(celulas), dtype=bool)
+    if filtro.inicio is not None or filtro.fim is not None:
+        # Como em mascara_linhas, datas ausentes ficam fora de qualquer período
+        meses = celulas["AnoMes"].to_numpy()
+        mascara &= meses != SEM_VALOR
+        if filtro.inicio is not None:
+            mascara &= meses >= _mes(filtro.inicio)
+        if filtro.fim is not None:
+            mascara &= meses <= _mes(filtro.fim)
+    for col, valores in filtro.categorias().items():
+        mascara &= celulas[col].isin(valores).to_numpy(dtype=bool)
+    return celulas[mascara].reset_index(drop=True)
+
+
+def montar_cubo(backend, versao, filtro=SEM_FILTRO, completo=None):
+    """Monta o Cubo com as consultas do backend (modo em memória).
+
+    Com o cubo sem filtro em `completo` e um filtro que cabe nas células, as
+    células e o total saem dele em vez de reagrupar as linhas filtradas.
+    """
+    if completo is not None and filtro_nas_celulas(filtro):
+        celulas = filtrar_celulas(completo.celulas, filtro)
+        total = int(celulas["Qtd"].sum())
+    else:
+        celulas, total = backend.celulas(filtro), backend.total(filtro)
+    return Cubo(
+        versao,
+        total,
+        "memoria",
+        celulas,
+        {col: backend.contagem(col, filtro) for col in AVALIACOES},
+        backend.distancia_mes(filtro),
+        {m: backend.resumo(m, filtro) for m in METRICAS},
+    )
+
+
+def caminho_cubo(caminho=CAMINHO_CSV):
+    return os.path.splitext(caminho)[0] + ".cubo.pkl"
+
+
+def _ler_cubo_salvo(destino, versao, modo):
+    try:
+        cubo = pd.read_pickle(destino)
+    except (OSError, EOFError, AttributeError, ValueError):
+        return None
+    if isinstance(cubo, Cubo) and cubo.versao == versao and cubo.modo == modo:
+        return cubo
+    return None
+
+
+def _salvar_cubo(cubo, destino):
+    temporario = destino + ".tmp"
+    try:
+        pd.to_pickle(cubo, temporario)
+        os.replace(temporario, destino)
+    except OSError:
+        pass
+
+
+def _construir_cubo(caminho, versao, modo, backend, filtro, completo=None):
+    # Imports locais: os dois módulos reutilizam as funções deste
+    if modo == "streaming":
+        from analise.streaming import construir_cubo_streaming
+        return construir_cubo_streaming(caminho, versao, filtro=filtro)
+    from analise.backends import obter_backend
+    return montar_cubo(obter_backend(caminho, backend), versao, filtro, completo)
+
+
+@st.cache_data(show_spinner="Agregando dados...", max_entries=16)
+def _obter_cubo(caminho, versao, modo, backend, filtro=SEM_FILTRO):
+    registrar_falta("cubo")
+    if filtro.ativo:
+        # Cubos filtrados ficam só no cache em memória, um por combinação de filtros,
+        # e partem das células do cubo completo (também em cache) quando o filtro cabe nelas
+        completo = _obter_cubo(caminho, versao, modo, backend) if modo != "streaming" else None
+        return _construir_cubo(caminho, versao, modo, backend, filtro, completo)
+    destino = caminho_cubo(caminho)
+    cubo = _ler_cubo_salvo(destino, versao, modo)
+    if cubo is None:
+        cubo = _construir_cubo(caminho, versao, modo, backend, filtro)
+        _salvar_cubo(cubo, destino)
+    return cubo
+
+
+def obter_cubo(caminho=CAMINHO_CSV, filtro=SEM_FILTRO):
+    """Cubo da versão atual do dataset (memória → arquivo salvo → reconstrução), opcionalmente filtrado."""
+    return _obter_cubo(caminho, versao_arquivo(caminho), config.MODO, config.BACKEND, filtro)
+
+
+# --------------------------
+# Consultas sobre o cubo
+# --------------------------
+
+def contagem(cubo, dimensao):
+    """Contagem por categoria, em ordem decrescente (como value_counts).
+
+    As dimensões do cubo são somadas sobre as células; as avaliações já vêm contadas.
+    """
+    if dimensao in cubo.avaliacoes:
+        return cubo.avaliacoes[dimensao]
+    contagens = contar_categorias(cubo.celulas[dimensao], pesos=cubo.celulas["Qtd"])
+    return contagens[contagens > 0]
+
+
+def por_mes_e_veiculo(cubo):
+    celulas = cubo.celulas[cubo.celulas["AnoMes"] != SEM_VALOR]
+    resultado = celulas.groupby(["AnoMes", "Vehicle Type"], observed=True)["Qtd"].sum().reset_index()
+    resultado["AnoMes"] = rotulo_mes(resultado["AnoMes"])
+    return resultado
+
+
+def por_hora(cubo):
+    celulas = cubo.celulas[cubo.celulas["Hour"] != SEM_VALOR]
+    return celulas.groupby("Hour")["Qtd"].sum()
+
+
+def cancelamentos(cubo):
+    return pd.DataFrame({
+        "Tipo de Cancelamento": ["Cliente", "Motorista"],
+        "Quantidade": [cubo.celulas[col].sum() for col in CANCELAMENTOS],
+    })
+
+
+def status_simplificado(cubo):
+    """Percentual de corridas concluídas e canceladas."""
+    contagens = contar_categorias(cubo.celulas["Status Simplificado"], pesos=cubo.celulas["Qtd"])
+    return contagens / cubo.total * 100
@@ -0,0 +1,230 @@
+"""Backends de consulta do modo em memória: pandas e DuckDB.
+
+As consultas da página (células do cubo, contagens, média/mediana por mês,
+estatísticas de boxplot e valores das métricas) passam por esta interface.
+O backend pandas usa o DataFrame compartilhado, as colunas derivadas e
+os índices de filtro; o backend DuckDB executa o mesmo cálculo em SQL
+diretamente sobre o Parquet, em várias threads e sem carregar as linhas no
+processo. comparar_backends confere que os dois produzem as mesmas tabelas.
+"""
+
+import sys
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+import streamlit as st
+
+from analise import config
+from analise.agregados import (
+    AVALIACOES, CANCELAMENTOS, COLUNAS_CUBO, DIMENSOES, METRICAS, agregar_celulas, contar_categorias,
+    distancia_por_mes,
+)
+from analise.boxplot import WHIS, EstatisticasBoxplot
+from analise.dados import (
+    CAMINHO_CSV, COLUNAS_CATEGORICAS, carregar_dados, garantir_sidecar, ler_dados, versao_arquivo,
+)
+from analise.derivadas import CATEGORIAS_STATUS, SEM_VALOR, STATUS_CONCLUIDO, obter_derivadas, rotulo_mes
+from analise.filtros import SEM_FILTRO, indice_filtros
+from analise.medicao import registrar_falta
+
+try:
+    import duckdb
+except ImportError:  # dependência opcional, só para ANALISE_BACKEND=duckdb
+    duckdb = None
+
+
+class BackendPandas:
+    nome = "pandas"
+
+    def __init__(self, caminho, versao):
+        self.caminho = caminho
+        self.versao = versao
+
+    def _recorte(self, filtro, colunas):
+        df = carregar_dados(self.caminho, colunas, self.versao)
+        if filtro.ativo:
+            df = df.iloc[indice_filtros(self.caminho).linhas(filtro)]
+        return df
+
+    def total(self, filtro):
+        return len(self._recorte(filtro, ["Booking Status"]))
+
+    def celulas(self, filtro):
+        df = self._recorte(filtro, COLUNAS_CUBO)
+        derivadas = obter_derivadas(self.caminho)
+        return agregar_celulas(df, derivadas.loc[df.index])
+
+    def contagem(self, coluna, filtro):
+        return contar_categorias(self._recorte(filtro, [coluna])[coluna])
+
+    def distancia_mes(self, filtro):
+        df = self._recorte(filtro, ["Ride Distance"])
+        return distancia_por_mes(df["Ride Distance"], obter_derivadas(self.caminho)["AnoMes"].loc[df.index])
+
+    def resumo(self, metrica, filtro):
+        return EstatisticasBoxplot.exatas(self.valores(metrica, filtro))
+
+    def valores(self, coluna, filtro):
+        return self._recorte(filtro, [coluna])[coluna].to_numpy(dtype="float64")
+
+
+def _nome(coluna):
+    return '"' + coluna.replace('"', '""') + '"'
+
+
+class BackendDuckDB:
+    nome = "duckdb"
+
+    def __init__(self, caminho, versao):
+        if duckdb is None:
+            raise ImportError("ANALISE_BACKEND=duckdb requer o pacote duckdb (pip install duckdb)")
+        self.conexao = duckdb.connect()
+        fonte = garantir_sidecar(caminho, versao)
+        if fonte is None:
+            # Sem sidecar gravável: consulta o DataFrame lido do CSV (Time em segundos)
+            df = ler_dados(caminho, None, versao)
+            self.conexao.register("origem", df.assign(Time=df["Time"] // pd.Timedelta(seconds=1)))
+            origem, unidade = "origem", "s"
+        else:
+            origem = "read_parquet('" + fonte.replace("'", "''") + "')"
+            unidade = pq.read_schema(fonte).field("Time").type.unit
+        ticks_hora = 3600 * {"s": 1, "ms": 10**3, "us": 10**6, "ns": 10**9}[unidade]
+        # Mesmas colunas derivadas de analise.derivadas, calculadas pelo DuckDB
+        self.conexao.execute(f"""
+            CREATE VIEW corridas AS SELECT *,
+                CAST(coalesce((year("Date") - 1970) * 12 + month("Date") - 1, {SEM_VALOR}) AS INTEGER) AS "AnoMes",
+                CAST(coalesce(CAST("Time" AS BIGINT) // {ticks_hora}, {SEM_VALOR}) AS TINYINT) AS "Hour",
+                CASE WHEN "Booking Status" = '{STATUS_CONCLUIDO}' THEN '{CATEGORIAS_STATUS[1]}'
+                     ELSE '{CATEGORIAS_STATUS[0]}' END AS "Status Simplificado"
+            FROM {origem}
+        """)
+        # Categorias da base completa, para as células terem o mesmo dtype do pandas
+        self.categorias = {
+            col: [linha[0] for linha in self.conexao.execute(
+                f"SELECT DISTINCT {_nome(col)} FROM corridas WHERE {_nome(col)} IS NOT NULL ORDER BY 1"
+            ).fetchall()]
+            for col in COLUNAS_CATEGORICAS
+        }
+        self.categorias["Status Simplificado"] = CATEGORIAS_STATUS
+
+    def _consulta(self, sql, filtro, parametros=None):
+        """Executa a consulta com o WHERE do filtro no lugar de {onde} (parâmetros nomeados)."""
+        condicoes, valores = ["TRUE"], dict(parametros or {})
+        if filtro.inicio is not None:
+            condicoes.append('CAST("Date" AS DATE) >= $inicio')
+            valores["inicio"] = filtro.inicio
+        if filtro.fim is not None:
+            condicoes.append('CAST("Date" AS DATE) <= $fim')
+            valores["fim"] = filtro.fim
+        for i, (col, selecionadas) in enumerate(filtro.categorias().items()):
+            nomes = [f"c{i}_{j}" for j in range(len(selecionadas))]
+            valores.update(zip(nomes, selecionadas))
+            condicoes.append(f"{_nome(col)} IN ({', '.join('$' + n for n in nomes)})" if nomes else "FALSE")
+        # Um cursor por consulta: a conexão é compartilhada entre sessões
+        cursor = self.conexao.cursor()
+        return cursor.execute(sql.format(onde=" AND ".join(condicoes)), valores)
+
+    def total(self, filtro):
+        return self._consulta("SELECT count(*) FROM corridas WHERE {onde}", filtro).fetchone()[0]
+
+    def celulas(self, filtro):
+        agregados = ['count(*) AS "Qtd"']
+        agregados += [f"coalesce(sum({_nome(col)}), 0) AS {_nome(col)}" for col in CANCELAMENTOS]
+        for m in METRICAS:
+            agregados += [
+                f'count({_nome(m)}) AS {_nome(m + ":n")}',
+                f'coalesce(sum({_nome(m)}), 0) AS {_nome(m + ":soma")}',
+                f'coalesce(sum({_nome(m)} * {_nome(m)}), 0) AS {_nome(m + ":soma2")}',
+            ]
+        dimensoes = ", ".join(_nome(d) for d in DIMENSOES)
+        sql = f"SELECT {dimensoes}, {', '.join(agregados)} FROM corridas WHERE {{onde}} GROUP BY {dimensoes}"
+        celulas = self._consulta(sql, filtro).df()
+        for col, categorias in self.categorias.items():
+            celulas[col] = pd.Categorical(celulas[col], categories=categorias)
+        tipos = {"AnoMes": "int32", "Hour": "int8", "Qtd": "int64"}
+        tipos.update({f"{m}:n": "int64" for m in METRICAS})
+        tipos.update({col: "float64" for col in CANCELAMENTOS})
+        tipos.update({f"{m}:{s}": "float64" for m in METRICAS for s in ("soma", "soma2")})
+        return celulas.astype(tipos)
+
+    def contagem(self, coluna, filtro):
+        col = _nome(coluna)
+        # Desempate pela categoria, como a ordenação estável de contar_categorias
+        sql = (f"SELECT {col}, count(*) AS n FROM corridas WHERE {{onde}} AND {col} IS NOT NULL "
+               f"GROUP BY {col} ORDER BY n DESC, {col}")
+        resultado = self._consulta(sql, filtro).df()
+        return pd.Series(resultado["n"].to_numpy(dtype="int64"), index=pd.Index(resultado[coluna], name=coluna),
+                         name="count")
+
+    def distancia_mes(self, filtro):
+        sql = ('SELECT "AnoMes", avg("Ride Distance") AS mean, quantile_cont("Ride Distance", 0.5) AS median '
+               f'FROM corridas WHERE {{onde}} AND "AnoMes" <> {SEM_VALOR} GROUP BY "AnoMes" ORDER BY "AnoMes"')
+        resultado = self._consulta(sql, filtro).df()
+        resultado["AnoMes"] = rotulo_mes(resultado["AnoMes"])
+        return resultado.astype({"mean": "float64", "median": "float64"})
+
+    def resumo(self, metrica, filtro):
+        col = _nome(metrica)
+        base = f"FROM corridas WHERE {{onde}} AND {col} IS NOT NULL AND NOT isnan({col})"
+        n, media, q1, mediana, q3 = self._consulta(
+            f"SELECT count(*), avg({col}), quantile_cont({col}, 0.25), quantile_cont({col}, 0.5), "
+            f"quantile_cont({col}, 0.75) {base}", filtro,
+        ).fetchone()
+        if n == 0:
+            return EstatisticasBoxplot(0, np.nan, np.nan, np.nan, np.nan, np.nan, np.nan, np.array([]))
+        limite_inf, limite_sup = q1 - WHIS * (q3 - q1), q3 + WHIS * (q3 - q1)
+        bigode_inferior, bigode_superior = self._consulta(
+            f"SELECT min({col}) FILTER (WHERE {col} >= $inf), max({col}) FILTER (WHERE {col} <= $sup) {base}",
+            filtro, {"inf": limite_inf, "sup": limite_sup},
+        ).fetchone()
+        outliers = self._consulta(
+            f"SELECT DISTINCT {col} AS x {base} AND ({col} < $inf OR {col} > $sup) ORDER BY x",
+            filtro, {"inf": limite_inf, "sup": limite_sup},
+        ).df()["x"].to_numpy(dtype="float64")
+        return EstatisticasBoxplot(n, media, q1, mediana, q3, bigode_inferior, bigode_superior, outliers)
+
+    def valores(self, coluna, filtro):
+        sql = f"SELECT {_nome(coluna)} AS x FROM corridas WHERE {{onde}}"
+        return self._consulta(sql, filtro).df()["x"].to_numpy(dtype="float64", na_value=np.nan)
+
+
+BACKENDS = {"pandas": BackendPandas, "duckdb": BackendDuckDB}
+
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def _obter_backend(caminho, versao, nome):
+    registrar_falta("backend")
+    return BACKENDS[nome](caminho, versao)
+
+
+def obter_backend(caminho=CAMINHO_CSV, nome=None):
+    """Backend configurado (config.BACKEND) para a versão atual do dataset."""
+    return _obter_backend(caminho, versao_arquivo(caminho), nome or config.BACKEND)
+
+
+def comparar_backends(caminho=CAMINHO_CSV, filtro=SEM_FILTRO):
+    """Confere que pandas e DuckDB produzem as mesmas tabelas; levanta AssertionError se não."""
+    versao = versao_arquivo(caminho)
+    pandas_, duck = BackendPandas(caminho, versao), BackendDuckDB(caminho, versao)
+    assert pandas_.total(filtro) == duck.total(filtro)
+
+    def ordenadas(celulas):
+        return celulas.sort_values(DIMENSOES, ignore_index=True)[celulas.columns]
+
+    pd.testing.assert_frame_equal(ordenadas(pandas_.celulas(filtro)), ordenadas(duck.celulas(filtro)), rtol=1e-9)
+    for col in AVALIACOES:
+        pd.testing.assert_series_equal(pandas_.contagem(col, filtro), duck.contagem(col, filtro))
+    pd.testing.assert_frame_equal(pandas_.distancia_mes(filtro), duck.distancia_mes(filtro), rtol=1e-9)
+    for m in METRICAS:
+        esperado, obtido = pandas_.resumo(m, filtro), duck.resumo(m, filtro)
+        for campo in ("n", "media", "q1", "mediana", "q3", "bigode_inferior", "bigode_superior"):
+            np.testing.assert_allclose(getattr(obtido, campo), getattr(esperado, campo), rtol=1e-9, err_msg=campo)
+        np.testing.assert_array_equal(obtido.outliers, esperado.outliers)
+        np.testing.assert_array_equal(np.sort(duck.valores(m, filtro)), np.sort(pandas_.valores(m, filtro)))
+
+
+if __name__ == "__main__":
+    # python -m analise.backends [caminho do CSV]
+    comparar_backends(*sys.argv[1:2])
+    print("pandas e duckdb: tabelas iguais")
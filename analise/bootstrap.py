@@ -0,0 +1,167 @@
+"""Intervalos de confiança por bootstrap (percentil e BCa) para as métricas do IC.
+
+A estatística é a média da métrica com clip(upper=percentil_max), a mesma do
+IC t de Student. As reamostragens são feitas em lotes vetorizados: quando a
+métrica tem poucos valores distintos (o caso das colunas do dataset), cada
+reamostragem é uma contagem multinomial sobre os valores distintos, o que é
+exato e bem mais barato que sortear índices. As tarefas têm tamanho fixo e
+sementes derivadas de uma SeedSequence, então o resultado é o mesmo com
+qualquer número de processos. A distribuição fica em cache por (métrica,
+filtro, corte); o nível de confiança e o método só mudam os quantis lidos dela.
+"""
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+import scipy.stats as stats
+import streamlit as st
+
+from analise import config
+from analise.agregados import obter_cubo
+from analise.backends import obter_backend
+from analise.dados import CAMINHO_CSV, versao_arquivo
+from analise.filtros import SEM_FILTRO
+from analise.intervalos import METRICAS_IC
+from analise.medicao import registrar_falta
+
+
+REAMOSTRAGENS = 2000
+SEMENTE = 2024
+
+# Reamostragens por tarefa do pool (fixo, para a reprodutibilidade não depender do pool)
+POR_TAREFA = 250
+
+# Elementos sorteados por lote (limita a memória de cada lote a algumas dezenas de MB)
+ELEMENTOS_LOTE = 1 << 22
+
+METODOS_IC = ["t de Student", "Bootstrap percentil", "Bootstrap BCa"]
+
+
+@dataclass
+class DistribuicaoBootstrap:
+    estimativa: float
+    medias: np.ndarray
+    # Aceleração do BCa (assimetria pelo jackknife)
+    aceleracao: float
+
+    def intervalo(self, conf_level, metodo):
+        """Limites inferior e superior do IC pelo método percentil ou BCa (NaN sem reamostragens)."""
+        if self.medias.size == 0:
+            return np.nan, np.nan
+        alpha = 1 - conf_level/100
+        niveis = np.array([alpha/2, 1 - alpha/2])
+        if metodo == "Bootstrap BCa":
+            # Correção de viés pela fração das reamostragens abaixo da estimativa
+            abaixo = np.mean(self.medias < self.estimativa) + 0.5 * np.mean(self.medias == self.estimativa)
+            z0 = stats.norm.ppf(np.clip(abaixo, 1e-9, 1 - 1e-9))
+            z = stats.norm.ppf(np.clip(niveis, 1e-9, 1 - 1e-9))
+            niveis = stats.norm.cdf(z0 + (z0 + z) / (1 - self.aceleracao * (z0 + z)))
+        inferior, superior = np.quantile(self.medias, niveis)
+        return inferior, superior
+
+
+def _medias_indices(valores, quantidade, semente):
+    """Médias de reamostragens com reposição, sorteando índices em lotes."""
+    rng = np.random.default_rng(semente)
+    n = len(valores)
+    lote = max(1, ELEMENTOS_LOTE // n)
+    medias = np.empty(quantidade)
+    for inicio in range(0, quantidade, lote):
+        k = min(lote, quantidade - inicio)
+        indices = rng.integers(0, n, size=(k, n), dtype=np.int32 if n < 2**31 else np.int64)
+        medias[inicio:inicio + k] = valores[indices].mean(axis=1)
+    return medias
+
+
+def _medias_multinomiais(valores, pesos, quantidade, semente):
+    """Médias de reamostragens de tamanho n = Σpesos sobre valores com multiplicidade."""
+    rng = np.random.default_rng(semente)
+    n = int(pesos.sum())
+    probabilidades = pesos / pesos.sum()
+    lote = max(1, ELEMENTOS_LOTE // len(valores))
+    medias = np.empty(quantidade)
+    for inicio in range(0, quantidade, lote):
+        k = min(lote, quantidade - inicio)
+        medias[inicio:inicio + k] = rng.multinomial(n, probabilidades, size=k) @ valores / n
+    return medias
+
+
+def aceleracao(valores, pesos):
+    """Aceleração do BCa para a média, pela fórmula fechada do jackknife."""
+    media = np.average(valores, weights=pesos)
+    desvio = valores - media
+    soma2 = np.sum(pesos * desvio**2)
+    return np.sum(pesos * desvio**3) / (6 * soma2**1.5) if soma2 > 0 else 0.0
+
+
+@st.cache_resource(show_spinner=False)
+def _executor(processos):
+    # spawn: o servidor do Streamlit tem várias threads, e fork com threads não é seguro
+    return ProcessPoolExecutor(processos, mp_context=multiprocessing.get_context("spawn"))
+
+
+def reamostrar(valores, pesos, reamostragens=REAMOSTRAGENS, semente=SEMENTE, processos=None):
+    """Médias bootstrap de `valores` (com multiplicidades `pesos`), repartidas em tarefas."""
+    processos = processos or config.PROCESSOS
+    sementes = np.random.SeedSequence(semente).spawn(-(-reamostragens // POR_TAREFA))
+    quantidades = [min(POR_TAREFA, reamostragens - i * POR_TAREFA) for i in range(len(sementes))]
+    if len(valores) * 4 < pesos.sum():
+        funcao, argumentos = _medias_multinomiais, (valores, pesos)
+    else:
+        funcao, argumentos = _medias_indices, (np.repeat(valores, pesos.astype("int64")),)
+    if processos > 1:
+        partes = [_executor(processos).submit(funcao, *argumentos, q, s) for q, s in zip(quantidades, sementes)]
+        return np.concatenate([parte.result() for parte in partes])
+    return np.concatenate([funcao(*argumentos, q, s) for q, s in zip(quantidades, sementes)])
+
+
+def distribuicao(valores, pesos, limite, reamostragens=REAMOSTRAGENS, semente=SEMENTE):
+    """DistribuicaoBootstrap da média com clip(upper=limite)."""
+    valores, inverso = np.unique(np.minimum(valores, limite), return_inverse=True)
+    pesos = np.bincount(inverso, weights=pesos, minlength=len(valores))
+    estimativa = np.average(valores, weights=pesos)
+    medias = reamostrar(valores, pesos, reamostragens, semente)
+    return DistribuicaoBootstrap(estimativa, medias, aceleracao(valores, pesos))
+
+
+@st.cache_data(show_spinner="Reamostrando (bootstrap)...", max_entries=64)
+def _obter_distribuicao(caminho, versao, modo, backend, filtro, coluna, percentil_max, reamostragens, semente):
+    registrar_falta("bootstrap")
+    if modo == "streaming":
+        # Cada bin ocupado do resumo entra com a média dos seus valores e a sua contagem
+        sketch = obter_cubo(caminho, filtro).sketches[coluna]
+        ocupados = sketch.contagens > 0
+        valores = sketch.somas[ocupados] / sketch.contagens[ocupados]
+        pesos = sketch.contagens[ocupados].astype("float64")
+        limite = sketch.quantil(percentil_max/100)
+    else:
+        valores = obter_backend(caminho, backend).valores(coluna, filtro)
+        valores = valores[~np.isnan(valores)]
+        pesos = np.ones(len(valores))
+        limite = np.quantile(valores, percentil_max/100) if valores.size else np.nan
+    if valores.size == 0:
+        # Nenhum valor da métrica no filtro: sem estimativa nem intervalo
+        return DistribuicaoBootstrap(np.nan, np.array([]), 0.0)
+    return distribuicao(valores, pesos, limite, reamostragens, semente)
+
+
+def distribuicao_bootstrap(coluna, percentil_max, filtro=SEM_FILTRO, caminho=CAMINHO_CSV,
+                           reamostragens=REAMOSTRAGENS, semente=SEMENTE):
+    """Distribuição bootstrap da métrica, em cache por versão dos dados, filtro e corte."""
+    return _obter_distribuicao(caminho, versao_arquivo(caminho), config.MODO, config.BACKEND, filtro, coluna,
+                               percentil_max, reamostragens, semente)
+
+
+def indicadores_bootstrap(conf_level, percentil_max, metodo, filtro=SEM_FILTRO):
+    """Nomes, médias e limites inferior/superior do IC bootstrap de cada métrica."""
+    nomes, medias, inferiores, superiores = [], [], [], []
+    for nome, col in METRICAS_IC.items():
+        dist = distribuicao_bootstrap(col, percentil_max, filtro)
+        inferior, superior = dist.intervalo(conf_level, metodo)
+        nomes.append(nome)
+        medias.append(dist.estimativa)
+        inferiores.append(inferior)
+        superiores.append(superior)
+    return nomes, medias, inferiores, superiores
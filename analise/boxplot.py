@@ -0,0 +1,66 @@
+"""Estatísticas de boxplot calculadas uma vez por versão dos dados.
+
+Um mesmo objeto alimenta o gráfico (desenhado com Axes.bxp, sem reordenar a
+coluna a cada rerun) e os textos ao lado dele. No modo em memória os valores
+são exatos; no modo streaming vêm do HistogramaStreaming da métrica.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+
+# Comprimento dos bigodes em múltiplos do intervalo interquartil (padrão do seaborn)
+WHIS = 1.5
+
+
+@dataclass
+class EstatisticasBoxplot:
+    n: int
+    media: float
+    q1: float
+    mediana: float
+    q3: float
+    bigode_inferior: float
+    bigode_superior: float
+    # Valores distintos fora dos bigodes (repetições não mudam o desenho)
+    outliers: np.ndarray
+
+    @classmethod
+    def exatas(cls, valores):
+        valores = np.sort(valores[~np.isnan(valores)])
+        if len(valores) == 0:
+            return cls(0, np.nan, np.nan, np.nan, np.nan, np.nan, np.nan, valores)
+        q1, mediana, q3 = np.quantile(valores, [0.25, 0.5, 0.75])
+        limite_inf, limite_sup = q1 - WHIS * (q3 - q1), q3 + WHIS * (q3 - q1)
+        # Com os valores ordenados, os bigodes saem por busca binária
+        inicio = np.searchsorted(valores, limite_inf, side="left")
+        fim = np.searchsorted(valores, limite_sup, side="right")
+        outliers = np.unique(np.concatenate((valores[:inicio], valores[fim:])))
+        return cls(len(valores), valores.mean(), q1, mediana, q3, valores[inicio], valores[fim - 1], outliers)
+
+    @classmethod
+    def de_sketch(cls, sketch):
+        """Aproximação a partir de um HistogramaStreaming (erro de até uma largura de bin)."""
+        q1, mediana, q3 = (sketch.quantil(q) for q in (0.25, 0.5, 0.75))
+        limite_inf, limite_sup = q1 - WHIS * (q3 - q1), q3 + WHIS * (q3 - q1)
+        # Cada bin ocupado é representado pela média dos seus valores
+        ocupados = sketch.contagens > 0
+        representantes = sketch.somas[ocupados] / sketch.contagens[ocupados]
+        dentro = representantes[(representantes >= limite_inf) & (representantes <= limite_sup)]
+        fora = representantes[(representantes < limite_inf) | (representantes > limite_sup)]
+        bigode_inferior = max(dentro.min(), sketch.minimo) if len(dentro) else q1
+        bigode_superior = min(dentro.max(), sketch.maximo) if len(dentro) else q3
+        return cls(sketch.n, sketch.media(), q1, mediana, q3, bigode_inferior, bigode_superior, fora)
+
+    def para_bxp(self):
+        """Dicionário no formato esperado por matplotlib Axes.bxp."""
+        return {
+            "med": self.mediana,
+            "q1": self.q1,
+            "q3": self.q3,
+            "whislo": self.bigode_inferior,
+            "whishi": self.bigode_superior,
+            "mean": self.media,
+            "fliers": self.outliers,
+        }
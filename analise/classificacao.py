@@ -0,0 +1,57 @@
+"""Classificação das variáveis do dataset por tipo (nominal, ordinal, discreta, contínua)."""
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from analise.medicao import registrar_falta
+
+
+COLUNAS_ORDINAIS = ["Driver Ratings", "Customer Rating"]
+
+# Tamanho dos blocos verificados antes de desistir de uma coluna
+TAMANHO_BLOCO = 1 << 16
+
+
+def valores_inteiros(serie):
+    """True se todos os valores não nulos da série numérica forem inteiros."""
+    if pd.api.types.is_integer_dtype(serie) or pd.api.types.is_bool_dtype(serie):
+        return True
+    valores = serie.to_numpy(dtype="float64", na_value=np.nan)
+    # Verificação vetorizada em blocos: para no primeiro bloco com valor fracionário
+    for inicio in range(0, len(valores), TAMANHO_BLOCO):
+        bloco = valores[inicio:inicio + TAMANHO_BLOCO]
+        bloco = bloco[~np.isnan(bloco)]
+        if not np.all(np.mod(bloco, 1) == 0):
+            return False
+    return True
+
+
+def tipo_variavel(nome, numerica, inteira):
+    if numerica:
+        return "Quantitativa Discreta" if inteira else "Quantitativa Contínua"
+    if nome in COLUNAS_ORDINAIS:
+        return "Qualitativa Ordinal"
+    return "Qualitativa Nominal"
+
+
+def classificar_coluna(serie):
+    numerica = pd.api.types.is_numeric_dtype(serie)
+    return tipo_variavel(serie.name, numerica, numerica and valores_inteiros(serie))
+
+
+def classificar_variaveis(df):
+    """Tabela com o tipo detalhado de cada coluna do DataFrame."""
+    return tabela_tipos({col: classificar_coluna(df[col]) for col in df.columns})
+
+
+def tabela_tipos(tipos):
+    """Monta a tabela a partir de {coluna: tipo detalhado}."""
+    return pd.DataFrame({"Variável": list(tipos), "Tipo Detalhado": list(tipos.values())})
+
+
+@st.cache_data(max_entries=4)
+def tabela_classificacao(_df, versao):
+    registrar_falta("classificacao")
+    # O DataFrame não entra na chave do cache; a versão dos dados identifica o conteúdo
+    return classificar_variaveis(_df)
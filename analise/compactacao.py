@@ -0,0 +1,101 @@
+"""Compactação do DataFrame de corridas em memória, sem perda, e relatório de memória.
+
+Cada coluna recebe o menor tipo que representa exatamente os mesmos valores:
+
+- texto com poucos valores distintos (locais, motivos) vira categórica:
+  códigos int8/int16 e cada texto guardado uma vez;
+- texto de alta cardinalidade (Booking ID, Customer ID) continua como str:
+  com quase um valor distinto por linha, as categorias repetiriam todo o texto
+  e ainda somariam os códigos (a str do pandas, baseada em Arrow, já não cria
+  um objeto Python por linha);
+- colunas de indicador (só 1.0 ou vazio, como Cancelled Rides by Customer)
+  viram bool: vazio ↔ False e 1.0 ↔ True, uma correspondência exata;
+- números inteiros sem vazios viram o menor inteiro que os comporta;
+- floats que voltam idênticos de float32 (Booking Value, que só tem reais
+  inteiros) viram float32. Avaliações, distâncias e tempos com casas decimais
+  continuam float64: 4.3 não é representável em float32.
+
+Os tipos escolhidos mantêm a classificação das variáveis (bool e inteiros
+continuam numéricos e inteiros) e as agregações convertem para float64
+antes de somar. O relatório compara a memória de cada coluna antes e depois.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+# Fração máxima de valores distintos para um texto virar categórico
+LIMITE_CARDINALIDADE = 0.5
+
+MB = 1024 * 1024
+
+
+def _inteiros(valores):
+    return bool(np.all(np.mod(valores, 1) == 0))
+
+
+def tipo_compacto(serie):
+    """Tipo sem perda para a série (ou None para manter) e o motivo da escolha."""
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        return None, "já categórica"
+    if pd.api.types.is_string_dtype(serie) or serie.dtype == object:
+        preenchidos = serie.count()
+        if preenchidos and serie.nunique() <= LIMITE_CARDINALIDADE * preenchidos:
+            return "category", "poucos valores distintos"
+        return None, "alta cardinalidade"
+    if pd.api.types.is_bool_dtype(serie) or not pd.api.types.is_numeric_dtype(serie):
+        return None, "sem tipo menor"
+    valores = serie.to_numpy(dtype="float64", na_value=np.nan)
+    vazios = np.isnan(valores)
+    presentes = valores[~vazios]
+    if len(presentes) and np.all(presentes == 1.0):
+        return "bool", "indicador (1 ou vazio)"
+    if not vazios.any() and len(presentes) and _inteiros(presentes):
+        return np.result_type(np.min_scalar_type(int(presentes.min())),
+                              np.min_scalar_type(int(presentes.max())), np.int8).name, "inteiros"
+    if serie.dtype == "float64" and np.array_equal(presentes.astype("float32").astype("float64"), presentes):
+        return "float32", "exato em float32"
+    return None, "precisão necessária"
+
+
+def _converter(serie, tipo):
+    if tipo == "bool":
+        return serie.notna()
+    return serie.astype(tipo)
+
+
+def plano(df):
+    """{coluna: (tipo compacto ou None, motivo)} para cada coluna do DataFrame."""
+    return {col: tipo_compacto(df[col]) for col in df.columns}
+
+
+def compactar(df, escolhas=None):
+    """DataFrame novo com cada coluna no tipo compacto (o original não é alterado)."""
+    escolhas = escolhas or plano(df)
+    colunas = {}
+    for col in df.columns:
+        tipo, _ = escolhas[col]
+        colunas[col] = df[col] if tipo is None else _converter(df[col], tipo)
+    return pd.DataFrame(colunas, index=df.index)
+
+
+def relatorio_memoria(original, compacto, escolhas):
+    """Memória (MB) de cada coluna antes e depois, com o tipo e o motivo de cada escolha."""
+    antes = original.memory_usage(deep=True, index=False) / MB
+    depois = compacto.memory_usage(deep=True, index=False) / MB
+    tabela = pd.DataFrame({
+        "Coluna": original.columns,
+        "Tipo original": [str(t) for t in original.dtypes],
+        "Tipo compacto": [str(t) for t in compacto.dtypes],
+        "Motivo": [escolhas[col][1] for col in original.columns],
+        "MB antes": antes.to_numpy(),
+        "MB depois": depois.to_numpy(),
+    })
+    tabela["Redução (%)"] = 100 * (1 - tabela["MB depois"] / tabela["MB antes"])
+    return tabela.round({"MB antes": 3, "MB depois": 3, "Redução (%)": 1})
+
+
+def totais(relatorio):
+    antes, depois = relatorio["MB antes"].sum(), relatorio["MB depois"].sum()
+    return {"mb_antes": round(float(antes), 2), "mb_depois": round(float(depois), 2),
+            "reducao_pct": round(float(100 * (1 - depois / antes)), 1) if antes else 0.0}
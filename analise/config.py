@@ -0,0 +1,44 @@
+"""Configuração da página de análise, lida de variáveis de ambiente."""
+
+import os
+
+
+# "memoria": DataFrame completo em memória (padrão)
+# "streaming": CSV lido em blocos e agregado sem manter as linhas
+MODO = os.environ.get("ANALISE_MODO", "memoria")
+
+# Motor das consultas do modo em memória: "pandas" (padrão) ou "duckdb"
+# (SQL embarcado sobre o sidecar Parquet, multi-thread; requer o pacote duckdb)
+BACKEND = os.environ.get("ANALISE_BACKEND", "pandas")
+
+# Linhas por bloco no modo streaming (define o pico de memória da leitura)
+TAMANHO_BLOCO = int(os.environ.get("ANALISE_TAMANHO_BLOCO", 200_000))
+
+# Processos usados no bootstrap (1 = sem pool, tudo no processo do Streamlit)
+PROCESSOS = int(os.environ.get("ANALISE_PROCESSOS", os.cpu_count() or 1))
+
+# Renderização dos gráficos: "matplotlib" (PNG gerado no servidor, padrão) ou
+# "vega" (spec Vega-Lite com os agregados, desenhada no navegador)
+RENDER = os.environ.get("ANALISE_RENDER", "matplotlib")
+
+# Intervalo (s) para verificar se o CSV mudou e atualizar a página sozinha; 0 = desligado.
+# Linhas acrescentadas ao fim do arquivo são lidas e agregadas de forma incremental.
+ATUALIZACAO_SEGUNDOS = float(os.environ.get("ANALISE_ATUALIZACAO_SEGUNDOS", 0))
+
+# Compactação sem perda dos tipos do dataset em memória (categóricas, bool, float32); "0" desliga
+COMPACTAR = os.environ.get("ANALISE_COMPACTAR", "1") != "0"
+
+# Medição de desempenho por seção ligada para todas as sessões ("1"); cada
+# sessão também pode ligá-la na barra lateral
+MEDICAO = os.environ.get("ANALISE_MEDICAO", "0") == "1"
+
+# Destino das medições em JSON lines: caminho de arquivo ou "-" (stderr); vazio = não grava
+MEDICAO_LOG = os.environ.get("ANALISE_MEDICAO_LOG", "")
+
+
+def modo_streaming():
+    return MODO == "streaming"
+
+
+def render_vega():
+    return RENDER == "vega"
@@ -0,0 +1,321 @@
+"""Gráficos e textos (insights) da página de análise, compartilhados com o relatório.
+
+Cada gráfico é registrado em GRAFICOS com o mesmo id usado no cache de
+figuras, um título e as funções que o desenham (com matplotlib e, quando
+existe, com Altair para o modo vega) e geram os insights a partir do cubo, do
+filtro e do caminho do CSV (usado pelos gráficos que leem mais que o cubo:
+histogramas, IC, locais, tabelas cruzadas e dispersão). A página (pages/4_Analise.py) e o relatório em lote
+(analise/relatorio.py) usam o mesmo registro.
+
+O que os gráficos leem fora do cubo passa por agregado(): na página vem dos
+caches de cada função; no relatório é calculado uma vez no processo principal
+(calcular_agregados) e entregue aos processos do pool (usar_agregados).
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from analise import graficos_vega as vega
+from analise.agregados import status_simplificado
+from analise.cruzamentos import insights_cancelamentos, obter_tabelas
+from analise.densidade import obter_histograma
+from analise.dispersao import EIXO_X, EIXO_Y, insights_dispersao, obter_dispersao
+from analise.graficos import (
+    grafico_boxplot, grafico_cancelamentos, grafico_contagem, grafico_densidade_2d, grafico_distancia_mes,
+    grafico_ic, grafico_ic_grupos, grafico_mapa_od, grafico_por_hora, grafico_status, grafico_tabela_cruzada,
+    grafico_top_pares, grafico_veiculos_tempo, plot_hist,
+)
+from analise.intervalos import ic_por_grupo, indicadores_ic, series_ic
+from analise.localizacao import insights_localizacao, obter_od
+
+
+# Parâmetros fixos dos gráficos sem controles na página (e do relatório)
+BINS = 20
+CONF_PADRAO = 95
+PERCENTIL_PADRAO = 95
+MEDIDA_OD_PADRAO = "Corridas"
+TOP_PARES_PADRAO = 10
+LOCAIS_MAPA_PADRAO = 25
+
+
+@dataclass(frozen=True)
+class Grafico:
+    titulo: str
+    # desenhar(cubo, filtro, caminho) -> Figure
+    desenhar: object
+    # insights(cubo, filtro, caminho) -> lista de frases em markdown
+    insights: object = None
+    # Parâmetros que entram na chave do cache de figuras
+    parametros: tuple = ()
+    # vega(cubo, filtro, caminho) -> alt.Chart (desenhado no navegador); None = só matplotlib
+    vega: object = None
+
+
+# Dados que os gráficos leem fora do cubo: nome -> calcular(cubo, filtro, caminho)
+AGREGADOS = {
+    "hist_distancia": lambda cubo, filtro, caminho: obter_histograma("Ride Distance", BINS, caminho, filtro),
+    "hist_valor": lambda cubo, filtro, caminho: obter_histograma("Booking Value", BINS, caminho, filtro),
+    "series_ic": series_ic,
+    "od": lambda cubo, filtro, caminho: obter_od(filtro, caminho),
+    "tabelas": lambda cubo, filtro, caminho: obter_tabelas(filtro=filtro, caminho=caminho),
+    "dispersao": lambda cubo, filtro, caminho: obter_dispersao(filtro, caminho),
+}
+
+# Agregados recebidos de outro processo, por (nome, filtro, caminho)
+_prontos = {}
+
+
+def agregado(nome, cubo, filtro, caminho):
+    """Agregado `nome` do filtro: o recebido em usar_agregados, se houver, senão o dos caches."""
+    chave = (nome, filtro, caminho)
+    if chave in _prontos:
+        return _prontos[chave]
+    return AGREGADOS[nome](cubo, filtro, caminho)
+
+
+def calcular_agregados(cubo, filtro, caminho):
+    """Todos os agregados fora do cubo do filtro, no formato de usar_agregados."""
+    return {(nome, filtro, caminho): calcular(cubo, filtro, caminho) for nome, calcular in AGREGADOS.items()}
+
+
+def usar_agregados(agregados):
+    _prontos.update(agregados)
+
+
+def itens_markdown(itens):
+    return "\n".join(f"- {item}  " for item in itens)
+
+
+def _fixos(*itens):
+    return lambda cubo, filtro, caminho: list(itens)
+
+
+def insights_status(cubo, filtro, caminho):
+    status_counts = status_simplificado(cubo)
+    return [
+        "A maioria das corridas foram **concluídas**.",
+        f"Apenas **{status_counts['Cancelada']:.1f}%** das corridas resultaram em cancelamento.",
+        "Isso indica uma **boa taxa de sucesso operacional**.",
+    ]
+
+
+def insights_distancia(cubo, filtro, caminho):
+    resumo = cubo.resumo["Ride Distance"]
+    return [
+        f"Média da distância: {resumo.media:.2f} km.",
+        f"A maior parte das corridas está entre {resumo.q1:.2f} km e {resumo.q3:.2f} km.",
+        "Há algumas corridas muito longas (outliers), que aumentam a média.",
+    ]
+
+
+def insights_valor(cubo, filtro, caminho):
+    resumo = cubo.resumo["Booking Value"]
+    return [
+        f"Média: R$ {resumo.media:.2f}",
+        f"A maioria das corridas custa entre R$ {resumo.q1:.2f} e R$ {resumo.q3:.2f}.",
+        "Corridas muito caras ou muito baratas aparecem como outliers, aumentando a média.",
+    ]
+
+
+def insights_vtat(cubo, filtro, caminho):
+    resumo = cubo.resumo["Avg VTAT"]
+    return [
+        f"Média: {resumo.media:.2f} min",
+        f"A maior parte dos tempos está entre {resumo.q1:.2f} e {resumo.q3:.2f} min.",
+        "Outliers indicam alguns motoristas que demoram muito mais para chegar, provavelmente em horários ou regiões específicas.",
+    ]
+
+
+def insights_ic(medias, inferiores, superiores, conf_level):
+    """Textos do IC das três métricas (na ordem de METRICAS_IC); métrica com média NaN aparece como sem dados."""
+    def texto(i, rotulo, frase):
+        return frase if np.isfinite(medias[i]) else f"{rotulo} sem dados nos filtros selecionados."
+
+    return [
+        texto(1, "**Ride Distance (km):**", f"**Ride Distance (km):** a média das distâncias percorridas é {medias[1]:.2f} km, com IC {conf_level}% de {inferiores[1]:.2f} a {superiores[1]:.2f} km."),
+        texto(2, "**Avg VTAT (min):**", f"**Avg VTAT (min):** o tempo médio que os motoristas levam para chegar aos clientes é {medias[2]:.2f} minutos, com IC {conf_level}% de {inferiores[2]:.2f} a {superiores[2]:.2f} minutos."),
+        "Cada barra do gráfico representa a média de uma métrica e as linhas de erro mostram a variação provável da média real (intervalo de confiança).",
+        "Ajuste o percentil máximo para remover outliers extremos e visualizar melhor a maioria dos dados.",
+        texto(0, "Booking Value (R$):", f"Booking Value (R$): R$ {medias[0]:.2f}. O intervalo de confiança de {conf_level}% indica que estamos confiantes de que a média real do valor das corridas está entre R$ {inferiores[0]:.2f} e R$ {superiores[0]:.2f}."),
+    ]
+
+
+def _ic_padrao(cubo, filtro, caminho):
+    nomes, medias, intervalos = indicadores_ic(agregado("series_ic", cubo, filtro, caminho), CONF_PADRAO, PERCENTIL_PADRAO)
+    inferiores = [m - i for m, i in zip(medias, intervalos)]
+    superiores = [m + i for m, i in zip(medias, intervalos)]
+    return nomes, medias, intervalos, inferiores, superiores
+
+
+def _desenhar_ic(cubo, filtro, caminho):
+    nomes, medias, intervalos, _, _ = _ic_padrao(cubo, filtro, caminho)
+    return grafico_ic(nomes, medias, intervalos, CONF_PADRAO)
+
+
+def _vega_ic(cubo, filtro, caminho):
+    nomes, medias, intervalos, _, _ = _ic_padrao(cubo, filtro, caminho)
+    return vega.grafico_ic(nomes, medias, [intervalos, intervalos], CONF_PADRAO)
+
+
+def _insights_ic(cubo, filtro, caminho):
+    _, medias, _, inferiores, superiores = _ic_padrao(cubo, filtro, caminho)
+    return insights_ic(medias, inferiores, superiores, CONF_PADRAO)
+
+
+def _mapa_od(desenhar):
+    def gerar(cubo, filtro, caminho):
+        rotulos, matriz = agregado("od", cubo, filtro, caminho).submatriz(LOCAIS_MAPA_PADRAO, MEDIDA_OD_PADRAO)
+        return desenhar(rotulos, matriz, MEDIDA_OD_PADRAO)
+    return gerar
+
+
+def _top_pares(desenhar):
+    def gerar(cubo, filtro, caminho):
+        return desenhar(agregado("od", cubo, filtro, caminho).top_pares(TOP_PARES_PADRAO, MEDIDA_OD_PADRAO), MEDIDA_OD_PADRAO)
+    return gerar
+
+
+def _dispersao(desenhar):
+    def gerar(cubo, filtro, caminho):
+        dispersao = agregado("dispersao", cubo, filtro, caminho)
+        return desenhar(*dispersao.vista(), dispersao.comomentos.regressao(), "Distância (km)", "Valor (R$)")
+    return gerar
+
+
+def _motivos_veiculo(desenhar):
+    def gerar(cubo, filtro, caminho):
+        proporcoes = agregado("tabelas", cubo, filtro, caminho)[("Motivo", "Vehicle Type")].proporcoes()
+        return desenhar(proporcoes, "Tipo de veículo por Motivo do cancelamento (% da linha)")
+    return gerar
+
+
+GRAFICOS = {
+    "contagem_status": Grafico(
+        "Distribuição do Status das Reservas",
+        lambda cubo, filtro, caminho: grafico_contagem(cubo, "Booking Status", "Set2", rotation=45),
+        vega=lambda cubo, filtro, caminho: vega.grafico_contagem(cubo, "Booking Status", "Set2", rotation=45)),
+    "contagem_veiculos": Grafico(
+        "Tipos de Veículos mais Utilizados",
+        lambda cubo, filtro, caminho: grafico_contagem(cubo, "Vehicle Type", "Set3", rotation=45),
+        vega=lambda cubo, filtro, caminho: vega.grafico_contagem(cubo, "Vehicle Type", "Set3", rotation=45)),
+    "hist_distancia": Grafico(
+        "Distribuição das Distâncias das Corridas",
+        lambda cubo, filtro, caminho: plot_hist(agregado("hist_distancia", cubo, filtro, caminho),
+                                                color="skyblue", xlabel="Distância (km)"),
+        parametros=(BINS,),
+        vega=lambda cubo, filtro, caminho: vega.plot_hist(agregado("hist_distancia", cubo, filtro, caminho),
+                                                          color="skyblue", xlabel="Distância (km)")),
+    "hist_valor": Grafico(
+        "Distribuição do Valor das Corridas",
+        lambda cubo, filtro, caminho: plot_hist(agregado("hist_valor", cubo, filtro, caminho),
+                                                color="lightgreen", xlabel="Valor"),
+        parametros=(BINS,),
+        vega=lambda cubo, filtro, caminho: vega.plot_hist(agregado("hist_valor", cubo, filtro, caminho),
+                                                          color="lightgreen", xlabel="Valor")),
+    "cancelamentos": Grafico(
+        "Cancelamentos por Cliente e Motorista",
+        lambda cubo, filtro, caminho: grafico_cancelamentos(cubo),
+        vega=lambda cubo, filtro, caminho: vega.grafico_cancelamentos(cubo)),
+    "contagem_pagamento": Grafico(
+        "Método de Pagamento mais Utilizado",
+        lambda cubo, filtro, caminho: grafico_contagem(cubo, "Payment Method", "Set1", rotation=45),
+        vega=lambda cubo, filtro, caminho: vega.grafico_contagem(cubo, "Payment Method", "Set1", rotation=45)),
+    "avaliacoes_motoristas": Grafico(
+        "Avaliações dos Motoristas",
+        lambda cubo, filtro, caminho: grafico_contagem(cubo, "Driver Ratings", "Blues"),
+        vega=lambda cubo, filtro, caminho: vega.grafico_contagem(cubo, "Driver Ratings", "Blues")),
+    "avaliacoes_clientes": Grafico(
+        "Avaliações dos Clientes",
+        lambda cubo, filtro, caminho: grafico_contagem(cubo, "Customer Rating", "Greens"),
+        vega=lambda cubo, filtro, caminho: vega.grafico_contagem(cubo, "Customer Rating", "Greens")),
+    "status_simplificado": Grafico(
+        "Proporção de Corridas Concluídas vs Canceladas",
+        lambda cubo, filtro, caminho: grafico_status(cubo),
+        insights_status,
+        vega=lambda cubo, filtro, caminho: vega.grafico_status(cubo)),
+    "veiculos_tempo": Grafico(
+        "Uso de Tipos de Veículo ao Longo do Tempo",
+        lambda cubo, filtro, caminho: grafico_veiculos_tempo(cubo),
+        _fixos(
+            "Podemos identificar quais **tipos de veículos são mais populares ao longo do tempo**.",
+            "Se houver tendências claras (como crescimento no uso de **eBikes** ou queda no uso de **Autos**), isso pode indicar **mudanças no comportamento dos clientes**.",
+            "Também é útil para entender **picos sazonais** (feriados, fins de semana, meses de maior movimento).",
+        ),
+        vega=lambda cubo, filtro, caminho: vega.grafico_veiculos_tempo(cubo)),
+    "corridas_hora": Grafico(
+        "Volume de Corridas por Hora do Dia",
+        lambda cubo, filtro, caminho: grafico_por_hora(cubo),
+        _fixos(
+            "É possível identificar os **picos de demanda** ao longo do dia.",
+            "Geralmente, há **mais corridas nos horários de pico** (manhã e final da tarde).",
+            "Horários com menor volume podem indicar **oportunidades de incentivo a corridas**.",
+        ),
+        vega=lambda cubo, filtro, caminho: vega.grafico_por_hora(cubo)),
+    "distancia_mes": Grafico(
+        "Distância Média e Mediana das Corridas ao Longo do Tempo",
+        lambda cubo, filtro, caminho: grafico_distancia_mes(cubo),
+        _fixos(
+            "A **distância média** geralmente é maior que a **mediana**, indicando algumas corridas muito longas que puxam a média para cima.",
+            "Podemos observar **tendências sazonais**: alguns meses têm distâncias maiores ou menores, possivelmente relacionadas a feriados ou demanda específica.",
+            "Esse gráfico ajuda a entender o **padrão de uso dos veículos ao longo do tempo**, útil para planejamento operacional.",
+        ),
+        vega=lambda cubo, filtro, caminho: vega.grafico_distancia_mes(cubo)),
+    "boxplot_distancia": Grafico(
+        "Distância das Corridas",
+        lambda cubo, filtro, caminho: grafico_boxplot(cubo.resumo["Ride Distance"], "#4CAF50",
+                                                      "Distância das Corridas", "Distância (km)"),
+        insights_distancia,
+        vega=lambda cubo, filtro, caminho: vega.grafico_boxplot(cubo.resumo["Ride Distance"], "#4CAF50",
+                                                                "Distância das Corridas", "Distância (km)")),
+    "boxplot_valor": Grafico(
+        "Valor das Corridas",
+        lambda cubo, filtro, caminho: grafico_boxplot(cubo.resumo["Booking Value"], "#2196F3",
+                                                      "Valor das Corridas", "Valor (R$)"),
+        insights_valor,
+        vega=lambda cubo, filtro, caminho: vega.grafico_boxplot(cubo.resumo["Booking Value"], "#2196F3",
+                                                                "Valor das Corridas", "Valor (R$)")),
+    "boxplot_vtat": Grafico(
+        "Tempo Médio do Motorista (VTAT)",
+        lambda cubo, filtro, caminho: grafico_boxplot(cubo.resumo["Avg VTAT"], "#FF9800",
+                                                      "Tempo Médio do Motorista (VTAT)", "Tempo (min)"),
+        insights_vtat,
+        vega=lambda cubo, filtro, caminho: vega.grafico_boxplot(cubo.resumo["Avg VTAT"], "#FF9800",
+                                                                "Tempo Médio do Motorista (VTAT)", "Tempo (min)")),
+    "ic_metricas": Grafico(
+        f"Indicadores com Intervalo de Confiança ({CONF_PADRAO}%, corte no percentil {PERCENTIL_PADRAO})",
+        _desenhar_ic,
+        _insights_ic,
+        parametros=(CONF_PADRAO, PERCENTIL_PADRAO, "t de Student"),
+        vega=_vega_ic),
+    "ic_grupos": Grafico(
+        f"Intervalos de Confiança por Tipo de Veículo ({CONF_PADRAO}%)",
+        lambda cubo, filtro, caminho: grafico_ic_grupos(ic_por_grupo(cubo, ["Vehicle Type"], CONF_PADRAO),
+                                                        "Vehicle Type", CONF_PADRAO),
+        parametros=(("Vehicle Type",), CONF_PADRAO),
+        vega=lambda cubo, filtro, caminho: vega.grafico_ic_grupos(ic_por_grupo(cubo, ["Vehicle Type"], CONF_PADRAO),
+                                                                  "Vehicle Type", CONF_PADRAO)),
+    "od_mapa": Grafico(
+        f"Corridas por Partida e Destino ({LOCAIS_MAPA_PADRAO} locais mais movimentados)",
+        _mapa_od(grafico_mapa_od),
+        lambda cubo, filtro, caminho: insights_localizacao(agregado("od", cubo, filtro, caminho)),
+        parametros=(MEDIDA_OD_PADRAO, LOCAIS_MAPA_PADRAO),
+        vega=_mapa_od(vega.grafico_mapa_od)),
+    "od_pares": Grafico(
+        f"Top {TOP_PARES_PADRAO} Trajetos por Número de Corridas",
+        _top_pares(grafico_top_pares),
+        parametros=(MEDIDA_OD_PADRAO, TOP_PARES_PADRAO),
+        vega=_top_pares(vega.grafico_top_pares)),
+    "motivos_veiculo": Grafico(
+        "Motivos de Cancelamento por Tipo de Veículo",
+        _motivos_veiculo(grafico_tabela_cruzada),
+        lambda cubo, filtro, caminho: insights_cancelamentos(agregado("tabelas", cubo, filtro, caminho)),
+        parametros=("Motivo", "Vehicle Type"),
+        vega=_motivos_veiculo(vega.grafico_tabela_cruzada)),
+    "valor_distancia": Grafico(
+        "Relação entre Valor e Distância das Corridas",
+        _dispersao(grafico_densidade_2d),
+        lambda cubo, filtro, caminho: insights_dispersao(agregado("dispersao", cubo, filtro, caminho)),
+        parametros=(EIXO_X, EIXO_Y),
+        vega=_dispersao(vega.grafico_densidade_2d)),
+}
@@ -0,0 +1,286 @@
+"""Tabelas cruzadas (contingência) entre colunas categóricas, com teste qui-quadrado.
+
+As colunas categóricas do dataset e as derivadas (hora, mês, status
+simplificado e o motivo de cancelamento unificado) são codificadas uma vez
+por versão dos dados em inteiros (-1 = sem valor), com as categorias em ordem
+crescente. Uma tabela de duas ou três vias sai de um único np.bincount sobre
+o código combinado (c1 · n2 · n3 + c2 · n3 + c3), então pedir uma tabela nova
+na página não relê o dataset: só soma os códigos em cache, com a máscara do
+IndiceFiltros para os filtros globais. No modo streaming todas as tabelas
+pedidas são contadas na mesma passada pelos blocos e combinadas alinhando as
+categorias.
+
+O teste de independência usa scipy.stats.chi2_contingency sobre a tabela sem
+linhas e colunas vazias, com o V de Cramér como tamanho de efeito.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+import scipy.stats as stats
+import streamlit as st
+
+from analise import config
+from analise.dados import CAMINHO_CSV, carregar_dados, converter_datas, versao_arquivo
+from analise.derivadas import SEM_VALOR, derivar, obter_derivadas, rotulo_mes
+from analise.filtros import SEM_FILTRO, indice_filtros, mascara_linhas
+from analise.medicao import registrar_falta
+
+
+MOTIVOS = {
+    "Reason for cancelling by Customer": "Cliente",
+    "Driver Cancellation Reason": "Motorista",
+    "Incomplete Rides Reason": "Incompleta",
+}
+
+# Dimensões oferecidas nas tabelas cruzadas (rótulo → coluna)
+DIMENSOES_CRUZADAS = {
+    "Motivo do cancelamento": "Motivo",
+    "Status": "Booking Status",
+    "Status simplificado": "Status Simplificado",
+    "Tipo de veículo": "Vehicle Type",
+    "Método de pagamento": "Payment Method",
+    "Hora do dia": "Hour",
+    "Mês": "AnoMes",
+    "Motivo (cliente)": "Reason for cancelling by Customer",
+    "Motivo (motorista)": "Driver Cancellation Reason",
+    "Motivo (incompleta)": "Incomplete Rides Reason",
+}
+
+COLUNAS_ORIGEM = ["Booking Status", "Vehicle Type", "Payment Method"] + list(MOTIVOS)
+
+# Tabelas da seção de cancelamentos, contadas juntas (e prontas no cache para as outras seções)
+TABELAS_PADRAO = (
+    ("Motivo", "Vehicle Type"),
+    ("Motivo", "Hour"),
+    ("Payment Method", "Booking Status"),
+    ("Status Simplificado", "Vehicle Type"),
+    ("Status Simplificado", "Hour"),
+)
+
+# Mínimo de casos na tabela para o teste qui-quadrado
+MINIMO_TESTE = 20
+
+
+def motivo(df):
+    """Motivo de cancelamento unificado ("Cliente: ...", "Motorista: ...", "Incompleta: ...")."""
+    resultado = pd.Series(pd.NA, index=df.index, dtype="str")
+    for col, origem in MOTIVOS.items():
+        presente = df[col].notna()
+        resultado = resultado.mask(presente, origem + ": " + df[col].astype("str"))
+    return resultado
+
+
+def colunas_cruzaveis(df, derivadas):
+    """Colunas de origem e derivadas usadas nas tabelas (sem copiar as de origem)."""
+    colunas = {col: df[col] for col in COLUNAS_ORIGEM}
+    colunas["Motivo"] = motivo(df)
+    colunas["Status Simplificado"] = derivadas["Status Simplificado"]
+    colunas["Hour"] = derivadas["Hour"]
+    colunas["AnoMes"] = derivadas["AnoMes"]
+    return colunas
+
+
+@dataclass
+class Codificada:
+    # Categorias em ordem crescente e o código de cada linha (-1 = sem valor)
+    categorias: np.ndarray
+    codigos: np.ndarray
+
+
+def codificar(serie):
+    if pd.api.types.is_integer_dtype(serie):
+        # Hour e AnoMes: inteiros com SEM_VALOR para o que não pôde ser convertido
+        valores = serie.to_numpy()
+        categorias = np.unique(valores[valores != SEM_VALOR])
+        codigos = np.where(valores == SEM_VALOR, -1, np.searchsorted(categorias, valores))
+        return Codificada(categorias, codigos.astype("int32"))
+    categorica = serie.astype("category")
+    ordem = np.argsort(categorica.cat.categories.astype(str).to_numpy(), kind="stable")
+    categorica = categorica.cat.reorder_categories(categorica.cat.categories[ordem])
+    return Codificada(categorica.cat.categories.astype(str).to_numpy(dtype=object),
+                      categorica.cat.codes.to_numpy().astype("int32"))
+
+
+def rotulos(coluna, categorias):
+    if coluna == "AnoMes":
+        return rotulo_mes(categorias)
+    return np.asarray(categorias)
+
+
+@dataclass
+class Teste:
+    estatistica: float
+    p: float
+    graus_liberdade: int
+    v_cramer: float
+    n: int
+
+    def resumo(self):
+        if np.isnan(self.p):
+            return f"Teste qui-quadrado indisponível (n = {self.n})."
+        return (f"χ² = {self.estatistica:.1f} ({self.graus_liberdade} g.l.), p = {self.p:.3g}, "
+                f"V de Cramér = {self.v_cramer:.3f}, n = {self.n}")
+
+
+@dataclass
+class TabelaCruzada:
+    colunas: tuple
+    categorias: list
+    contagens: np.ndarray
+
+    @property
+    def total(self):
+        return int(self.contagens.sum())
+
+    def combinar(self, outra):
+        """Soma outra tabela das mesmas colunas, alinhando as categorias (usada no modo streaming)."""
+        categorias = [np.union1d(a, b) for a, b in zip(self.categorias, outra.categorias)]
+        contagens = np.zeros([len(c) for c in categorias], dtype="int64")
+        for tabela in (self, outra):
+            posicoes = [np.searchsorted(u, c) for u, c in zip(categorias, tabela.categorias)]
+            contagens[np.ix_(*posicoes)] += tabela.contagens
+        return TabelaCruzada(self.colunas, categorias, contagens)
+
+    def marginal(self, *colunas):
+        """Tabela só com as colunas pedidas (soma sobre as demais)."""
+        eixos = tuple(i for i, col in enumerate(self.colunas) if col not in colunas)
+        manter = [i for i, col in enumerate(self.colunas) if col in colunas]
+        return TabelaCruzada(tuple(self.colunas[i] for i in manter), [self.categorias[i] for i in manter],
+                             self.contagens.sum(axis=eixos))
+
+    def camada(self, indice):
+        """Tabela das duas primeiras colunas para uma categoria da terceira."""
+        return TabelaCruzada(self.colunas[:2], self.categorias[:2], self.contagens[..., indice])
+
+    def dataframe(self):
+        """Contagens com as categorias como índice (linhas) e colunas (a terceira via vira índice)."""
+        nomes = [rotulos(col, cat) for col, cat in zip(self.colunas, self.categorias)]
+        if len(self.colunas) == 1:
+            return pd.Series(self.contagens, index=pd.Index(nomes[0], name=self.colunas[0]), name="count")
+        if len(self.colunas) == 2:
+            return pd.DataFrame(self.contagens, index=pd.Index(nomes[0], name=self.colunas[0]),
+                                columns=pd.Index(nomes[1], name=self.colunas[1]))
+        # Três vias: (primeira, terceira) nas linhas, segunda nas colunas
+        contagens = np.moveaxis(self.contagens, 2, 1).reshape(-1, self.contagens.shape[1])
+        indice = pd.MultiIndex.from_product([nomes[0], nomes[2]], names=[self.colunas[0], self.colunas[2]])
+        return pd.DataFrame(contagens, index=indice, columns=pd.Index(nomes[1], name=self.colunas[1]))
+
+    def proporcoes(self):
+        """Percentual de cada célula na sua linha (duas vias), sem linhas e colunas vazias."""
+        df = self.dataframe()
+        df = df.loc[df.sum(axis=1) > 0, df.sum(axis=0) > 0]
+        return 100 * df.div(df.sum(axis=1), axis=0)
+
+    def qui_quadrado(self):
+        """Teste de independência entre as duas primeiras colunas (somando sobre a terceira, se houver)."""
+        contagens = self.contagens if len(self.colunas) == 2 else self.contagens.sum(axis=tuple(range(2, self.contagens.ndim)))
+        contagens = contagens[contagens.sum(axis=1) > 0][:, contagens.sum(axis=0) > 0]
+        n = int(contagens.sum())
+        if min(contagens.shape) < 2 or n < MINIMO_TESTE:
+            return Teste(np.nan, np.nan, 0, np.nan, n)
+        resultado = stats.chi2_contingency(contagens, correction=False)
+        v = np.sqrt(resultado.statistic / (n * (min(contagens.shape) - 1)))
+        return Teste(float(resultado.statistic), float(resultado.pvalue), int(resultado.dof), float(v), n)
+
+    def qui_quadrado_por_camada(self):
+        """Um teste das duas primeiras colunas para cada categoria da terceira."""
+        linhas = []
+        for i, categoria in enumerate(rotulos(self.colunas[2], self.categorias[2])):
+            teste = self.camada(i).qui_quadrado()
+            linhas.append({self.colunas[2]: categoria, "qui2": teste.estatistica, "p": teste.p,
+                           "g.l.": teste.graus_liberdade, "V de Cramér": teste.v_cramer, "n": teste.n})
+        return pd.DataFrame(linhas)
+
+
+def contar(codificadas, colunas, mascara=None):
+    """Tabela das colunas por um único bincount sobre o código combinado."""
+    dims = [codificadas[col] for col in colunas]
+    tamanhos = [len(d.categorias) for d in dims]
+    validos = np.ones(len(dims[0].codigos), dtype=bool) if mascara is None else mascara.copy()
+    combinado = np.zeros(len(dims[0].codigos), dtype="int64")
+    for d, tamanho in zip(dims, tamanhos):
+        validos &= d.codigos >= 0
+        combinado = combinado * tamanho + d.codigos
+    contagens = np.bincount(combinado[validos], minlength=int(np.prod(tamanhos))).reshape(tamanhos)
+    return TabelaCruzada(tuple(colunas), [d.categorias for d in dims], contagens)
+
+
+def codificar_tudo(df, derivadas):
+    return {col: codificar(serie) for col, serie in colunas_cruzaveis(df, derivadas).items()}
+
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def _codigos_categoricos(caminho, versao):
+    registrar_falta("codigos_categoricos")
+    return codificar_tudo(carregar_dados(caminho, COLUNAS_ORIGEM, versao), obter_derivadas(caminho))
+
+
+def _tabelas_streaming(caminho, pedidos, filtro):
+    from analise.streaming import ler_blocos
+    tabelas = {}
+    for bloco in ler_blocos(caminho):
+        bloco = converter_datas(bloco)
+        if filtro.ativo:
+            bloco = bloco[mascara_linhas(bloco, filtro)]
+        codificadas = codificar_tudo(bloco, derivar(bloco))
+        for colunas in pedidos:
+            parte = contar(codificadas, colunas)
+            tabelas[colunas] = parte if colunas not in tabelas else tabelas[colunas].combinar(parte)
+    return tabelas
+
+
+@st.cache_data(show_spinner="Cruzando categorias...", max_entries=32)
+def _obter_tabelas(caminho, versao, modo, pedidos, filtro):
+    registrar_falta("tabelas_cruzadas")
+    if modo == "streaming":
+        return _tabelas_streaming(caminho, pedidos, filtro)
+    codificadas = _codigos_categoricos(caminho, versao)
+    mascara = indice_filtros(caminho).mascara(filtro) if filtro.ativo else None
+    return {colunas: contar(codificadas, colunas, mascara) for colunas in pedidos}
+
+
+def obter_tabelas(pedidos=TABELAS_PADRAO, filtro=SEM_FILTRO, caminho=CAMINHO_CSV):
+    """Várias tabelas cruzadas da versão atual de uma vez (pedidos = tuplas de colunas)."""
+    pedidos = tuple(tuple(colunas) for colunas in pedidos)
+    return _obter_tabelas(caminho, versao_arquivo(caminho), config.MODO, pedidos, filtro)
+
+
+def obter_tabela(colunas, filtro=SEM_FILTRO, caminho=CAMINHO_CSV):
+    colunas = tuple(colunas)
+    return obter_tabelas((colunas,), filtro, caminho)[colunas]
+
+
+def insights_cancelamentos(tabelas):
+    """Frases sobre motivos de cancelamento por veículo e hora e sobre o pagamento."""
+    itens = []
+    motivos_veiculo = tabelas[("Motivo", "Vehicle Type")].dataframe()
+    if motivos_veiculo.to_numpy().sum():
+        principal = motivos_veiculo.sum(axis=1).idxmax()
+        itens.append(f"Motivo mais comum: **{principal}** "
+                     f"({100 * motivos_veiculo.sum(axis=1).max() / motivos_veiculo.to_numpy().sum():.1f}% dos cancelamentos com motivo).")
+        teste = tabelas[("Motivo", "Vehicle Type")].qui_quadrado()
+        if not np.isnan(teste.p):
+            conclusao = "dependem" if teste.p < 0.05 else "não mostram dependência"
+            itens.append(f"Motivos × tipo de veículo: os motivos {conclusao} do veículo ao nível de 5% "
+                         f"(p = {teste.p:.3g}, V de Cramér = {teste.v_cramer:.3f}).")
+
+    status_hora = tabelas[("Status Simplificado", "Hour")].dataframe()
+    if "Cancelada" in status_hora.index and status_hora.to_numpy().sum():
+        taxa = 100 * status_hora.loc["Cancelada"] / status_hora.sum(axis=0).replace(0, np.nan)
+        itens.append(f"Hora com maior taxa de cancelamento: **{taxa.idxmax()}h** ({taxa.max():.1f}%); "
+                     f"menor: **{taxa.idxmin()}h** ({taxa.min():.1f}%).")
+
+    pagamento = tabelas[("Payment Method", "Booking Status")].dataframe()
+    if "Incomplete" in pagamento.columns and pagamento.to_numpy().sum():
+        taxa = 100 * pagamento["Incomplete"] / pagamento.sum(axis=1).replace(0, np.nan)
+        teste = tabelas[("Payment Method", "Booking Status")].qui_quadrado()
+        frase = (f"O método de pagamento só é registrado em corridas concluídas ou incompletas, então a comparação "
+                 f"possível é a taxa de incompletas: **{taxa.idxmax()}** tem a maior ({taxa.max():.1f}%)")
+        if "Cash" in taxa.index:
+            frase += f" e **Cash** tem {taxa['Cash']:.1f}%"
+        if not np.isnan(teste.p):
+            frase += f" (p = {teste.p:.3g} no qui-quadrado)"
+        itens.append(frase + ".")
+    return itens
@@ -0,0 +1,255 @@
+"""Carregamento do dataset de corridas com esquema declarado e cache.
+
+Na primeira leitura o CSV é convertido para um arquivo Parquet ao lado dele
+(sidecar). As leituras seguintes usam o Parquet, lendo só as colunas pedidas,
+e o sidecar é atualizado quando o hash do CSV muda: se o CSV só ganhou linhas
+no fim (analise/incremental.py), apenas o trecho novo é lido e acrescentado;
+senão o sidecar é refeito. O hash de versão também continua do ponto em que
+parou quando o arquivo só cresceu.
+
+Na página o dataset é carregado uma única vez por processo e compartilhado
+por todas as sessões (st.cache_resource), já com os tipos compactos de
+analise/compactacao.py. carregar_dados devolve cópias rasas: com o
+Copy-on-Write do pandas, nada que uma sessão faça com a cópia altera o
+dataset compartilhado.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from dataclasses import dataclass
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import streamlit as st
+
+from analise import config
+from analise.compactacao import compactar, plano, relatorio_memoria
+from analise.incremental import Marca, abrir_trecho, acrescimo, assinatura, avancar, fim_linhas, marca_inicial
+from analise.medicao import registrar_falta
+
+
+CAMINHO_CSV = "ncr_ride_bookings.csv"
+
+# Chaves dos metadados do Parquet: hash do CSV de origem e até onde ele foi lido
+CHAVE_VERSAO = b"versao_origem"
+CHAVE_MARCA = b"marca_origem"
+
+# Formatos explícitos: evita a inferência linha a linha do pandas
+FORMATO_DATA = "%Y-%m-%d"
+FORMATO_HORA = "%H:%M:%S"
+
+# Colunas de baixa cardinalidade armazenadas como categóricas
+COLUNAS_CATEGORICAS = ["Booking Status", "Vehicle Type", "Payment Method"]
+
+# Esquema do CSV (Date e Time são lidas como texto e convertidas depois)
+ESQUEMA = {
+    "Date": "str",
+    "Time": "str",
+    "Booking ID": "str",
+    "Booking Status": "category",
+    "Customer ID": "str",
+    "Vehicle Type": "category",
+    "Pickup Location": "str",
+    "Drop Location": "str",
+    "Avg VTAT": "float64",
+    "Avg CTAT": "float64",
+    "Cancelled Rides by Customer": "float64",
+    "Reason for cancelling by Customer": "str",
+    "Cancelled Rides by Driver": "float64",
+    "Driver Cancellation Reason": "str",
+    "Incomplete Rides": "float64",
+    "Incomplete Rides Reason": "str",
+    "Booking Value": "float64",
+    "Ride Distance": "float64",
+    "Driver Ratings": "float64",
+    "Customer Rating": "float64",
+    "Payment Method": "category",
+}
+
+
+def converter_datas(df):
+    """Converte Date para datetime e Time para timedelta (hora do dia)."""
+    # Colunas já convertidas são mantidas (a função pode ser aplicada de novo ao mesmo bloco)
+    if "Date" in df and not pd.api.types.is_datetime64_any_dtype(df["Date"]):
+        df["Date"] = pd.to_datetime(df["Date"], format=FORMATO_DATA, errors="coerce")
+    if "Time" in df and not pd.api.types.is_timedelta64_dtype(df["Time"]):
+        hora = pd.to_datetime(df["Time"], format=FORMATO_HORA, errors="coerce")
+        df["Time"] = hora - pd.Timestamp("1900-01-01")
+    return df
+
+
+def ler_csv(caminho=CAMINHO_CSV):
+    """Lê o CSV aplicando o esquema declarado, sem cache."""
+    df = pd.read_csv(caminho, dtype=ESQUEMA)
+    return converter_datas(df)
+
+
+def ler_trecho_csv(caminho, inicio, fim):
+    """Lê só as linhas em [inicio, fim) do CSV (offsets em bytes), com o esquema declarado."""
+    with abrir_trecho(caminho, inicio, fim) as arquivo:
+        return pd.read_csv(arquivo, dtype=ESQUEMA)
+
+
+@dataclass
+class _Rastro:
+    mtime_ns: int
+    tamanho: int
+    # Estado do blake2b depois de ler `tamanho` bytes (continua em um acréscimo)
+    hash: object
+    assinatura: str
+    versao: str
+
+
+# Último hash calculado por arquivo, neste processo
+_rastros = {}
+_lock_rastros = threading.Lock()
+
+
+def versao_arquivo(caminho=CAMINHO_CSV):
+    """Identificador do conteúdo atual do arquivo (hash), usado como chave de cache.
+
+    Só é recalculado quando o mtime ou o tamanho mudam; se o arquivo apenas
+    cresceu, o hash continua do estado anterior lendo só os bytes novos. Com o
+    mesmo tamanho (ou menor) e outro mtime, o arquivo inteiro é relido: uma
+    reescrita do mesmo tamanho no meio do arquivo também muda a versão.
+    """
+    chave = os.path.abspath(caminho)
+    info = os.stat(chave)
+    with _lock_rastros:
+        rastro = _rastros.get(chave)
+    if rastro is not None and (rastro.mtime_ns, rastro.tamanho) == (info.st_mtime_ns, info.st_size):
+        return rastro.versao
+    if rastro is not None and info.st_size > rastro.tamanho and assinatura(chave, rastro.tamanho) == rastro.assinatura:
+        h, inicio = rastro.hash.copy(), rastro.tamanho
+    else:
+        h, inicio = hashlib.blake2b(digest_size=16), 0
+    with open(chave, "rb") as f:
+        f.seek(inicio)
+        restante = info.st_size - inicio
+        while restante > 0:
+            bloco = f.read(min(1 << 20, restante))
+            if not bloco:
+                break
+            h.update(bloco)
+            restante -= len(bloco)
+    rastro = _Rastro(info.st_mtime_ns, info.st_size, h, assinatura(chave, info.st_size), h.hexdigest())
+    with _lock_rastros:
+        _rastros[chave] = rastro
+    return rastro.versao
+
+
+def caminho_sidecar(caminho=CAMINHO_CSV):
+    return os.path.splitext(caminho)[0] + ".parquet"
+
+
+def _metadados_sidecar(caminho_parquet):
+    try:
+        return pq.read_schema(caminho_parquet).metadata or {}
+    except (OSError, ValueError):
+        return {}
+
+
+def _versao_sidecar(caminho_parquet):
+    versao = _metadados_sidecar(caminho_parquet).get(CHAVE_VERSAO)
+    return versao.decode() if versao else None
+
+
+def _marca_sidecar(caminho_parquet):
+    marca = _metadados_sidecar(caminho_parquet).get(CHAVE_MARCA)
+    return Marca(**json.loads(marca)) if marca else None
+
+
+def _gravar_sidecar(tabela, destino, versao, marca):
+    metadados = dict(tabela.schema.metadata or {})
+    metadados[CHAVE_VERSAO] = versao.encode()
+    metadados[CHAVE_MARCA] = json.dumps(marca.__dict__).encode()
+    temporario = destino + ".tmp"
+    pq.write_table(tabela.replace_schema_metadata(metadados), temporario, compression="zstd")
+    # Grava em arquivo temporário e troca de forma atômica
+    os.replace(temporario, destino)
+
+
+def converter_para_parquet(caminho, versao):
+    """Converte o CSV (até a última linha completa) para o sidecar Parquet."""
+    marca = marca_inicial(caminho)
+    fim = fim_linhas(caminho)
+    df = converter_datas(ler_trecho_csv(caminho, marca.offset, fim))
+    tabela = pa.Table.from_pandas(df, preserve_index=False)
+    _gravar_sidecar(tabela, caminho_sidecar(caminho), versao, avancar(caminho, marca, fim, len(df)))
+    return df
+
+
+def acrescentar_ao_sidecar(caminho, versao):
+    """Acrescenta ao sidecar só as linhas novas do CSV; None se o conteúdo anterior mudou."""
+    destino = caminho_sidecar(caminho)
+    marca = _marca_sidecar(destino)
+    trecho = acrescimo(caminho, marca)
+    if trecho is None:
+        return None
+    inicio, fim = trecho
+    anterior = pq.read_table(destino)
+    novas = converter_datas(ler_trecho_csv(caminho, inicio, fim)) if fim > inicio else None
+    if novas is not None and len(novas):
+        novas = pa.Table.from_pandas(novas, schema=anterior.schema, preserve_index=False)
+        tabela = pa.concat_tables([anterior, novas])
+    else:
+        tabela = anterior
+    _gravar_sidecar(tabela, destino, versao, avancar(caminho, marca, fim, tabela.num_rows - anterior.num_rows))
+    return tabela.to_pandas()
+
+
+def atualizar_sidecar(caminho, versao):
+    """Leva o sidecar à versão atual do CSV (acréscimo se possível); devolve o DataFrame completo."""
+    df = acrescentar_ao_sidecar(caminho, versao)
+    return df if df is not None else converter_para_parquet(caminho, versao)
+
+
+def garantir_sidecar(caminho=CAMINHO_CSV, versao=None):
+    """Caminho do sidecar Parquet atualizado, ou None se não puder ser gravado."""
+    versao = versao or versao_arquivo(caminho)
+    destino = caminho_sidecar(caminho)
+    if _versao_sidecar(destino) != versao:
+        try:
+            atualizar_sidecar(caminho, versao)
+        except OSError:
+            return None
+    return destino
+
+
+def ler_dados(caminho=CAMINHO_CSV, colunas=None, versao=None):
+    """Lê as colunas pedidas do sidecar Parquet, criando-o a partir do CSV se preciso."""
+    versao = versao or versao_arquivo(caminho)
+    destino = caminho_sidecar(caminho)
+    if _versao_sidecar(destino) != versao:
+        try:
+            df = atualizar_sidecar(caminho, versao)
+        except OSError:
+            # Diretório somente leitura: segue direto do CSV
+            df = ler_csv(caminho)
+        return df[list(colunas)] if colunas else df
+    return pd.read_parquet(destino, columns=list(colunas) if colunas else None, memory_map=True)
+
+
+@st.cache_resource(show_spinner="Carregando dataset...", max_entries=2)
+def _dataset(caminho, versao):
+    registrar_falta("dataset")
+    df = ler_dados(caminho, None, versao)
+    escolhas = plano(df) if config.COMPACTAR else {col: (None, "compactação desligada") for col in df.columns}
+    compacto = compactar(df, escolhas)
+    # O relatório é montado agora, enquanto a versão sem compactação ainda existe
+    return compacto, relatorio_memoria(df, compacto, escolhas)
+
+
+def carregar_dados(caminho=CAMINHO_CSV, colunas=None, versao=None):
+    """Dataset (ou só as colunas pedidas) compartilhado entre as sessões, como cópia rasa."""
+    df, _ = _dataset(caminho, versao or versao_arquivo(caminho))
+    return df[list(colunas)] if colunas else df.copy(deep=False)
+
+
+def relatorio_memoria_dados(caminho=CAMINHO_CSV):
+    """Memória por coluna do dataset compartilhado, antes e depois da compactação."""
+    _, relatorio = _dataset(caminho, versao_arquivo(caminho))
+    return relatorio
@@ -0,0 +1,116 @@
+"""Histogramas com curva de densidade (KDE) calculada por FFT sobre uma grade.
+
+Os dados são distribuídos uma única vez em uma grade regular (binning linear)
+e a KDE gaussiana sai da convolução dessa grade com o núcleo via FFT. Depois
+do binning o custo depende só do tamanho da grade, não do número de corridas.
+No modo streaming a grade é montada a partir dos bins finos do
+HistogramaStreaming da coluna, sem reler as linhas.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+import scipy.signal as signal
+import streamlit as st
+
+from analise import config
+from analise.agregados import obter_cubo
+from analise.dados import CAMINHO_CSV, versao_arquivo
+from analise.backends import obter_backend
+from analise.filtros import SEM_FILTRO
+from analise.medicao import registrar_falta
+
+
+PONTOS_GRADE = 1024
+
+# O núcleo gaussiano é truncado em 4 larguras de banda
+CORTE_NUCLEO = 4
+
+
+@dataclass
+class Histograma:
+    contagens: np.ndarray
+    bordas: np.ndarray
+    kde_x: np.ndarray
+    kde_y: np.ndarray
+
+    @property
+    def total(self):
+        return int(self.contagens.sum())
+
+
+def histograma_vazio(bins):
+    """Histograma sem valores (filtro que não deixa nenhuma corrida com a coluna): sem curva KDE."""
+    return Histograma(np.zeros(bins, dtype="int64"), np.linspace(0.0, 1.0, bins + 1), np.array([]), np.array([]))
+
+
+def grade_linear(valores, pesos, inicio, fim, pontos=PONTOS_GRADE):
+    """Distribui cada valor entre os dois pontos vizinhos da grade (binning linear)."""
+    passo = (fim - inicio) / (pontos - 1)
+    posicao = (valores - inicio) / passo
+    esquerda = np.clip(np.floor(posicao).astype("int64"), 0, pontos - 2)
+    fracao = np.clip(posicao - esquerda, 0.0, 1.0)
+    grade = np.bincount(esquerda, weights=pesos * (1 - fracao), minlength=pontos)
+    grade += np.bincount(esquerda + 1, weights=pesos * fracao, minlength=pontos)
+    return grade
+
+
+def kde_fft(grade, inicio, fim, banda):
+    """Densidade (integra em 1) nos pontos da grade, para núcleo gaussiano de largura `banda`."""
+    pontos = len(grade)
+    passo = (fim - inicio) / (pontos - 1)
+    alcance = min(pontos - 1, int(np.ceil(CORTE_NUCLEO * banda / passo)))
+    deslocamentos = np.arange(-alcance, alcance + 1) * passo
+    nucleo = np.exp(-0.5 * (deslocamentos / banda) ** 2) / (banda * np.sqrt(2 * np.pi))
+    densidade = signal.fftconvolve(grade, nucleo, mode="same") / grade.sum()
+    return np.maximum(densidade, 0.0)
+
+
+def histograma_de_grade(contagens, bordas, grade, total, desvio):
+    """Monta o Histograma com a KDE em escala de contagem (como histplot(kde=True))."""
+    if total == 0:
+        return Histograma(contagens, bordas, np.array([]), np.array([]))
+    inicio, fim = bordas[0], bordas[-1]
+    # Regra de Scott, a mesma do scipy.stats.gaussian_kde usado pelo seaborn
+    # (com piso de um passo da grade, para o núcleo não degenerar)
+    banda = max(desvio * total ** (-1 / 5), (fim - inicio) / (len(grade) - 1))
+    kde_x = np.linspace(inicio, fim, len(grade))
+    kde_y = kde_fft(grade, inicio, fim, banda) * total * (bordas[1] - bordas[0])
+    return Histograma(contagens, bordas, kde_x, kde_y)
+
+
+def histograma_exato(valores, bins):
+    """Histograma exato das linhas em memória, com a KDE pela grade."""
+    valores = valores[~np.isnan(valores)]
+    if len(valores) == 0:
+        return histograma_vazio(bins)
+    contagens, bordas = np.histogram(valores, bins=bins)
+    grade = grade_linear(valores, np.ones(len(valores)), bordas[0], bordas[-1])
+    return histograma_de_grade(contagens, bordas, grade, len(valores),
+                               valores.std(ddof=1) if len(valores) > 1 else 0.0)
+
+
+def histograma_de_sketch(sketch, bins):
+    """Histograma e KDE a partir de um HistogramaStreaming (modo streaming)."""
+    if sketch.n == 0:
+        return histograma_vazio(bins)
+    contagens, bordas = sketch.histograma(bins)
+    ocupados = sketch.contagens > 0
+    pesos = sketch.contagens[ocupados].astype("float64")
+    grade = grade_linear(sketch.centros[ocupados], pesos, bordas[0], bordas[-1])
+    n = sketch.n
+    variancia = (sketch.somas2.sum() - sketch.somas.sum() ** 2 / n) / max(n - 1, 1)
+    return histograma_de_grade(contagens, bordas, grade, n, np.sqrt(max(variancia, 0.0)))
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def _obter_histograma(caminho, versao, modo, backend, coluna, bins, filtro):
+    registrar_falta("histograma")
+    if modo == "streaming":
+        return histograma_de_sketch(obter_cubo(caminho, filtro).sketches[coluna], bins)
+    return histograma_exato(obter_backend(caminho, backend).valores(coluna, filtro), bins)
+
+
+def obter_histograma(coluna, bins=20, caminho=CAMINHO_CSV, filtro=SEM_FILTRO):
+    """Histograma + KDE da coluna, em cache por versão dos dados, filtro, coluna e número de bins."""
+    return _obter_histograma(caminho, versao_arquivo(caminho), config.MODO, config.BACKEND, coluna, bins, filtro)
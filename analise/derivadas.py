@@ -0,0 +1,77 @@
+"""Colunas derivadas do dataset, calculadas uma vez por versão dos dados.
+
+Todas as colunas derivadas são declaradas em DERIVADAS e calculadas de forma
+vetorizada a partir de Date, Time e Booking Status já convertidos pelo
+carregador. O resultado é um DataFrame novo: o DataFrame de origem nunca é
+alterado. Como o dataset, as colunas derivadas ficam uma vez por processo,
+compartilhadas entre as sessões.
+"""
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from analise.dados import CAMINHO_CSV, carregar_dados, versao_arquivo
+from analise.medicao import registrar_falta
+
+
+# Valor usado em Mes e Hour quando Date/Time não puderam ser convertidos
+SEM_VALOR = -1
+
+STATUS_CONCLUIDO = "Completed"
+# Só os cancelamentos de fato (Incomplete e No Driver Found não entram)
+STATUS_CANCELADOS = ("Cancelled by Customer", "Cancelled by Driver")
+CATEGORIAS_STATUS = ["Cancelada", "Concluída"]
+
+COLUNAS_ORIGEM = ["Date", "Time", "Booking Status"]
+
+
+def mes(df):
+    """Mês como código inteiro (meses desde 1970-01), int32."""
+    datas = df["Date"].to_numpy(dtype="datetime64[ns]")
+    codigos = datas.astype("datetime64[M]").astype("int64")
+    return np.where(np.isnat(datas), SEM_VALOR, codigos).astype("int32")
+
+
+def hora(df):
+    """Hora do dia (0 a 23), int8."""
+    horarios = df["Time"].to_numpy(dtype="timedelta64[ns]")
+    horas = horarios.astype("timedelta64[h]").astype("int64")
+    return np.where(np.isnat(horarios), SEM_VALOR, horas).astype("int8")
+
+
+def status_simplificado(df):
+    """Concluída / Cancelada, categórica (qualquer status diferente de Completed conta como cancelada)."""
+    concluida = (df["Booking Status"] == STATUS_CONCLUIDO).to_numpy(dtype=bool)
+    return pd.Categorical.from_codes(concluida.astype("int8"), categories=CATEGORIAS_STATUS)
+
+
+# Pipeline declarado: nome da coluna derivada → função que a calcula
+DERIVADAS = {
+    "AnoMes": mes,
+    "Hour": hora,
+    "Status Simplificado": status_simplificado,
+}
+
+
+def derivar(df):
+    """DataFrame só com as colunas derivadas, no mesmo índice de `df`."""
+    return pd.DataFrame({nome: funcao(df) for nome, funcao in DERIVADAS.items()}, index=df.index)
+
+
+def rotulo_mes(codigos):
+    """Converte códigos de mês em rótulos "AAAA-MM"."""
+    codigos = np.asarray(codigos, dtype="int64")
+    rotulos = np.datetime_as_string(codigos.astype("datetime64[M]"), unit="M")
+    return np.where(codigos == SEM_VALOR, "NaT", rotulos)
+
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def _obter_derivadas(caminho, versao):
+    registrar_falta("derivadas")
+    return derivar(carregar_dados(caminho, COLUNAS_ORIGEM, versao))
+
+
+def obter_derivadas(caminho=CAMINHO_CSV):
+    """Colunas derivadas da versão atual do dataset (cópia rasa do DataFrame compartilhado)."""
+    return _obter_derivadas(caminho, versao_arquivo(caminho)).copy(deep=False)
@@ -0,0 +1,245 @@
+"""Relação entre Ride Distance e Booking Value: histograma 2D e regressão.
+
+Em vez de um gráfico de dispersão com uma marca por corrida, os pares
+(distância, valor) são contados em uma grade fina BINS_FINOS × BINS_FINOS. Cada
+eixo usa os mesmos bins do HistogramaStreaming (analise/sketches.py):
+larguras potência de 2 e bins alinhados a múltiplos delas, que dobram
+quando a faixa dos dados cresce, então grades de blocos diferentes se somam
+sem perda. Para exibir, a grade é reduzida à resolução pedida, e o custo de
+desenho depende só da resolução, não do número de corridas.
+
+A correlação de Pearson e a reta de mínimos quadrados saem dos co-momentos
+(n, médias, somas dos quadrados dos desvios e soma dos produtos dos
+desvios), combinados bloco a bloco pelas fórmulas de Chan et al., estáveis
+mesmo com dezenas de milhões de linhas. Só entram pares com os dois valores
+preenchidos (corridas concluídas ou incompletas).
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+import streamlit as st
+
+from analise import config
+from analise.dados import CAMINHO_CSV, carregar_dados, converter_datas, versao_arquivo
+from analise.filtros import SEM_FILTRO, indice_filtros, mascara_linhas
+from analise.medicao import registrar_falta
+from analise.sketches import acomodar_bins, dobrar_bins, indices_bins
+
+
+EIXO_X = "Ride Distance"
+EIXO_Y = "Booking Value"
+
+BINS_FINOS = 512
+BINS_PADRAO = 60
+# A vista corta o eixo do valor neste percentil (a cauda longa achataria o resto do mapa)
+PERCENTIL_PADRAO = 99
+
+
+class Comomentos:
+    def __init__(self):
+        self.n = 0
+        self.media_x = 0.0
+        self.media_y = 0.0
+        # Somas de (x - x̄)², (y - ȳ)² e (x - x̄)(y - ȳ)
+        self.m2_x = 0.0
+        self.m2_y = 0.0
+        self.c_xy = 0.0
+
+    def adicionar(self, x, y):
+        """Inclui um bloco de pares já sem NaN."""
+        if len(x) == 0:
+            return self
+        bloco = Comomentos()
+        bloco.n = len(x)
+        bloco.media_x, bloco.media_y = float(x.mean()), float(y.mean())
+        dx, dy = x - bloco.media_x, y - bloco.media_y
+        bloco.m2_x, bloco.m2_y, bloco.c_xy = float(dx @ dx), float(dy @ dy), float(dx @ dy)
+        return self.combinar(bloco)
+
+    def combinar(self, outro):
+        n = self.n + outro.n
+        if outro.n == 0:
+            return self
+        dx, dy = outro.media_x - self.media_x, outro.media_y - self.media_y
+        peso = self.n * outro.n / n
+        self.m2_x += outro.m2_x + dx * dx * peso
+        self.m2_y += outro.m2_y + dy * dy * peso
+        self.c_xy += outro.c_xy + dx * dy * peso
+        self.media_x += dx * outro.n / n
+        self.media_y += dy * outro.n / n
+        self.n = n
+        return self
+
+    def correlacao(self):
+        if self.n < 2 or self.m2_x == 0 or self.m2_y == 0:
+            return np.nan
+        return self.c_xy / np.sqrt(self.m2_x * self.m2_y)
+
+    def regressao(self):
+        """Inclinação e intercepto da reta de mínimos quadrados de y em x."""
+        if self.n < 2 or self.m2_x == 0:
+            return np.nan, np.nan
+        inclinacao = self.c_xy / self.m2_x
+        return inclinacao, self.media_y - inclinacao * self.media_x
+
+
+class Histograma2D:
+    def __init__(self, bins=BINS_FINOS):
+        self.bins = bins
+        self.largura = [None, None]
+        self.inicio = [None, None]
+        self.minimo = [np.inf, np.inf]
+        self.maximo = [-np.inf, -np.inf]
+        self.contagens = np.zeros((bins, bins), dtype="int64")
+
+    @property
+    def n(self):
+        return int(self.contagens.sum())
+
+    def _dobrar(self, eixo):
+        self.largura[eixo], self.inicio[eixo], (self.contagens,) = dobrar_bins(
+            self.largura[eixo], self.inicio[eixo], self.bins, [self.contagens], eixo)
+
+    def _acomodar(self, eixo, minimo, maximo):
+        minimo, maximo = min(minimo, self.minimo[eixo]), max(maximo, self.maximo[eixo])
+        self.largura[eixo], self.inicio[eixo], (self.contagens,) = acomodar_bins(
+            self.largura[eixo], self.inicio[eixo], self.bins, [self.contagens], minimo, maximo, eixo)
+        self.minimo[eixo], self.maximo[eixo] = minimo, maximo
+
+    def _indices(self, eixo, valores):
+        return indices_bins(valores, self.largura[eixo], self.inicio[eixo], self.bins)
+
+    def _somar(self, x, y, pesos=None):
+        combinado = self._indices(0, x) * self.bins + self._indices(1, y)
+        self.contagens += np.bincount(combinado, weights=pesos, minlength=self.bins ** 2).astype("int64").reshape(
+            self.bins, self.bins)
+
+    def adicionar(self, x, y):
+        """Inclui um bloco de pares já sem NaN."""
+        if len(x) == 0:
+            return self
+        self._acomodar(0, x.min(), x.max())
+        self._acomodar(1, y.min(), y.max())
+        self._somar(x, y)
+        return self
+
+    def combinar(self, outro):
+        """Soma outra grade a esta (as larguras potência de 2 se encaixam)."""
+        if outro.n == 0:
+            return self
+        for eixo in (0, 1):
+            if self.largura[eixo] is None:
+                self.largura[eixo], self.inicio[eixo] = outro.largura[eixo], outro.inicio[eixo]
+            while self.largura[eixo] < outro.largura[eixo]:
+                self._dobrar(eixo)
+            self._acomodar(eixo, outro.minimo[eixo], outro.maximo[eixo])
+        linhas, colunas = np.nonzero(outro.contagens)
+        centros_x = outro.inicio[0] + (linhas + 0.5) * outro.largura[0]
+        centros_y = outro.inicio[1] + (colunas + 0.5) * outro.largura[1]
+        self._somar(centros_x, centros_y, outro.contagens[linhas, colunas])
+        return self
+
+    def quantil(self, eixo, q):
+        """Quantil marginal de um eixo (erro de no máximo um bin fino)."""
+        marginal = self.contagens.sum(axis=1 - eixo)
+        indice = int(np.searchsorted(np.cumsum(marginal), q * self.n, side="left"))
+        return min(self.inicio[eixo] + (indice + 1) * self.largura[eixo], self.maximo[eixo])
+
+    def reduzir(self, bins, maximos=(None, None)):
+        """Contagens (bins_x × bins_y) e bordas de cada eixo, agrupando os bins finos ocupados.
+
+        `maximos` corta a vista de cada eixo no valor dado (as células acima ficam de fora).
+        """
+        bordas, fatias, fatores = [], [], []
+        for eixo in (0, 1):
+            maximo = self.maximo[eixo] if maximos[eixo] is None else min(maximos[eixo], self.maximo[eixo])
+            primeiro = int(self._indices(eixo, np.array([self.minimo[eixo]]))[0])
+            ultimo = int(self._indices(eixo, np.array([maximo]))[0])
+            fator = -(-(ultimo - primeiro + 1) // bins)
+            grupos = -(-(ultimo - primeiro + 1) // fator)
+            fatias.append(slice(primeiro, min(primeiro + grupos * fator, self.bins)))
+            fatores.append((grupos, fator))
+            bordas.append(self.inicio[eixo] + (primeiro + np.arange(grupos + 1) * fator) * self.largura[eixo])
+        recorte = np.zeros((fatores[0][0] * fatores[0][1], fatores[1][0] * fatores[1][1]), dtype="int64")
+        parte = self.contagens[fatias[0], fatias[1]]
+        recorte[:parte.shape[0], :parte.shape[1]] = parte
+        contagens = recorte.reshape(fatores[0][0], fatores[0][1], fatores[1][0], fatores[1][1]).sum(axis=(1, 3))
+        return contagens, bordas[0], bordas[1]
+
+
+@dataclass
+class Dispersao:
+    histograma: Histograma2D
+    comomentos: Comomentos
+
+    def adicionar(self, x, y):
+        x, y = np.asarray(x, dtype="float64"), np.asarray(y, dtype="float64")
+        validos = ~(np.isnan(x) | np.isnan(y))
+        x, y = x[validos], y[validos]
+        self.histograma.adicionar(x, y)
+        self.comomentos.adicionar(x, y)
+        return self
+
+    def combinar(self, outra):
+        self.histograma.combinar(outra.histograma)
+        self.comomentos.combinar(outra.comomentos)
+        return self
+
+    def vista(self, bins=BINS_PADRAO, percentil=PERCENTIL_PADRAO):
+        """Contagens e bordas na resolução pedida, com o valor cortado no percentil (100 = sem corte).
+
+        Sem nenhum par (filtro que só deixa corridas sem distância ou valor) a grade vem zerada em [0, 1].
+        """
+        if self.histograma.n == 0:
+            bordas = np.linspace(0.0, 1.0, bins + 1)
+            return np.zeros((bins, bins), dtype="int64"), bordas, bordas.copy()
+        maximo_y = None if percentil >= 100 else self.histograma.quantil(1, percentil / 100)
+        return self.histograma.reduzir(bins, (None, maximo_y))
+
+
+def nova_dispersao():
+    return Dispersao(Histograma2D(), Comomentos())
+
+
+def _dispersao_streaming(caminho, filtro):
+    from analise.streaming import ler_blocos
+    dispersao = nova_dispersao()
+    for bloco in ler_blocos(caminho):
+        if filtro.ativo:
+            bloco = converter_datas(bloco)
+            bloco = bloco[mascara_linhas(bloco, filtro)]
+        # Cada bloco vira uma grade própria, somada à acumulada (o mesmo caminho de um merge entre processos)
+        dispersao.combinar(nova_dispersao().adicionar(bloco[EIXO_X].to_numpy(), bloco[EIXO_Y].to_numpy()))
+    return dispersao
+
+
+@st.cache_data(show_spinner="Contando pares distância × valor...", max_entries=16)
+def _obter_dispersao(caminho, versao, modo, filtro):
+    registrar_falta("dispersao")
+    if modo == "streaming":
+        return _dispersao_streaming(caminho, filtro)
+    df = carregar_dados(caminho, [EIXO_X, EIXO_Y], versao)
+    if filtro.ativo:
+        df = df.iloc[indice_filtros(caminho).linhas(filtro)]
+    return nova_dispersao().adicionar(df[EIXO_X].to_numpy(), df[EIXO_Y].to_numpy())
+
+
+def obter_dispersao(filtro=SEM_FILTRO, caminho=CAMINHO_CSV):
+    """Histograma 2D e co-momentos de distância × valor da versão atual, com o filtro da página."""
+    return _obter_dispersao(caminho, versao_arquivo(caminho), config.MODO, filtro)
+
+
+def insights_dispersao(dispersao):
+    comomentos = dispersao.comomentos
+    r = comomentos.correlacao()
+    if np.isnan(r):
+        return ["Não há pares suficientes de distância e valor para estimar a relação."]
+    inclinacao, intercepto = comomentos.regressao()
+    forca = "forte" if abs(r) >= 0.7 else "moderada" if abs(r) >= 0.4 else "fraca"
+    return [
+        f"Correlação de Pearson entre distância e valor: **r = {r:.3f}** (relação {forca}, R² = {r * r:.3f}).",
+        f"Reta de mínimos quadrados: valor ≈ R$ {intercepto:.2f} + R$ {inclinacao:.2f} por km.",
+        f"Calculado a partir de {comomentos.n} corridas com distância e valor registrados; "
+        "a cor do mapa mostra quantas corridas caem em cada célula (escala logarítmica).",
+    ]
@@ -0,0 +1,160 @@
+"""Filtros globais da página (período, veículo, pagamento e status).
+
+No modo em memória a seleção usa índices montados uma vez por versão dos
+dados: as datas ordenadas (o período vira duas buscas binárias) e um bitmap
+por categoria (np.packbits), combinados com OR dentro da mesma coluna e AND
+entre colunas. No modo streaming a mesma seleção é aplicada a cada bloco.
+"""
+
+from dataclasses import astuple, dataclass
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from analise.dados import CAMINHO_CSV, COLUNAS_CATEGORICAS, carregar_dados, versao_arquivo
+from analise.medicao import registrar_falta
+
+
+@dataclass(frozen=True)
+class Filtro:
+    # Período em datetime.date; None deixa o lado em aberto
+    inicio: object = None
+    fim: object = None
+    # Categorias selecionadas por coluna; None = todas
+    veiculos: tuple = None
+    pagamentos: tuple = None
+    status: tuple = None
+
+    @property
+    def ativo(self):
+        return any(valor is not None for valor in astuple(self))
+
+    def categorias(self):
+        """Coluna → categorias selecionadas, só para as colunas filtradas."""
+        selecao = {"Vehicle Type": self.veiculos, "Payment Method": self.pagamentos, "Booking Status": self.status}
+        return {col: valores for col, valores in selecao.items() if valores is not None}
+
+    def periodo(self):
+        """Período como dias desde 1970-01-01 (fim inclusivo)."""
+        inicio = dia(self.inicio) if self.inicio is not None else np.iinfo("int64").min + 1
+        fim = dia(self.fim) if self.fim is not None else np.iinfo("int64").max
+        return inicio, fim
+
+
+SEM_FILTRO = Filtro()
+
+
+def dia(data):
+    return np.datetime64(data, "D").astype("int64")
+
+
+def dias(df):
+    """Date como dias desde 1970-01-01 (NaT vira o menor int64)."""
+    return df["Date"].to_numpy(dtype="datetime64[ns]").astype("datetime64[D]").astype("int64")
+
+
+def mascara_linhas(df, filtro):
+    """Seleção direta sobre um DataFrame (usada nos blocos do modo streaming)."""
+    mascara = np.ones(len(df), dtype=bool)
+    if filtro.inicio is not None or filtro.fim is not None:
+        inicio, fim = filtro.periodo()
+        d = dias(df)
+        mascara &= (d >= inicio) & (d <= fim)
+    for col, valores in filtro.categorias().items():
+        mascara &= df[col].isin(valores).to_numpy(dtype=bool)
+    return mascara
+
+
+class IndiceFiltros:
+    def __init__(self, df):
+        self.n = len(df)
+        d = dias(df)
+        self.ordem = np.argsort(d, kind="stable")
+        self.dias = d[self.ordem]
+        # Um bitmap compactado (1 bit por linha) para cada categoria
+        self.bitmaps = {}
+        for col in COLUNAS_CATEGORICAS:
+            serie = df[col].astype("category")
+            codigos = serie.cat.codes.to_numpy()
+            self.bitmaps[col] = {
+                categoria: np.packbits(codigos == i) for i, categoria in enumerate(serie.cat.categories)
+            }
+        for arr in (self.ordem, self.dias):
+            arr.flags.writeable = False
+
+    def vazio(self):
+        return np.zeros((self.n + 7) // 8, dtype="uint8")
+
+    def bitmap_periodo(self, inicio, fim):
+        """Linhas com data em [inicio, fim], por busca binária nas datas ordenadas."""
+        a = np.searchsorted(self.dias, inicio, side="left")
+        b = np.searchsorted(self.dias, fim, side="right")
+        mascara = np.zeros(self.n, dtype=bool)
+        mascara[self.ordem[a:b]] = True
+        return np.packbits(mascara)
+
+    def bitmap_categorias(self, col, valores):
+        bitmap = self.vazio()
+        for valor in valores:
+            if valor in self.bitmaps[col]:
+                bitmap |= self.bitmaps[col][valor]
+        return bitmap
+
+    def mascara(self, filtro):
+        """Máscara booleana das linhas selecionadas pelo filtro."""
+        if not filtro.ativo:
+            return np.ones(self.n, dtype=bool)
+        partes = [self.bitmap_categorias(col, valores) for col, valores in filtro.categorias().items()]
+        if filtro.inicio is not None or filtro.fim is not None:
+            partes.append(self.bitmap_periodo(*filtro.periodo()))
+        bitmap = partes[0]
+        for parte in partes[1:]:
+            bitmap = bitmap & parte
+        return np.unpackbits(bitmap, count=self.n).astype(bool)
+
+    def linhas(self, filtro):
+        """Posições (iloc) das linhas selecionadas, em ordem."""
+        return np.flatnonzero(self.mascara(filtro))
+
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def _indice_filtros(caminho, versao):
+    registrar_falta("indice_filtros")
+    return IndiceFiltros(carregar_dados(caminho, ["Date"] + COLUNAS_CATEGORICAS, versao))
+
+
+def indice_filtros(caminho=CAMINHO_CSV):
+    """Índices de filtro da versão atual, compartilhados (somente leitura) entre sessões."""
+    return _indice_filtros(caminho, versao_arquivo(caminho))
+
+
+def _selecao(rotulo, opcoes, chave):
+    selecionadas = st.sidebar.multiselect(rotulo, opcoes, default=opcoes, key=chave)
+    # Todas marcadas equivale a não filtrar (usa o cubo completo)
+    return None if set(selecionadas) == set(opcoes) else tuple(sorted(selecionadas))
+
+
+def barra_filtros(cubo):
+    """Filtros na barra lateral; opções e limites vêm do cubo completo."""
+    st.sidebar.header("Filtros")
+    meses = cubo.celulas["AnoMes"]
+    meses = meses[meses >= 0]
+    primeiro = np.datetime64(int(meses.min()), "M").astype("datetime64[D]").item()
+    ultimo = (np.datetime64(int(meses.max()) + 1, "M").astype("datetime64[D]") - 1).item()
+    periodo = st.sidebar.date_input("Período", value=(primeiro, ultimo), min_value=primeiro, max_value=ultimo,
+                                    key="filtro_periodo")
+    # Enquanto só a data inicial foi escolhida, o período fica em aberto no fim
+    inicio = periodo[0] if len(periodo) > 0 else primeiro
+    fim = periodo[1] if len(periodo) > 1 else ultimo
+
+    def opcoes(col):
+        return list(pd.unique(cubo.celulas.loc[cubo.celulas["Qtd"] > 0, col].dropna().astype(str)))
+
+    return Filtro(
+        inicio=None if inicio <= primeiro else inicio,
+        fim=None if fim >= ultimo else fim,
+        veiculos=_selecao("Tipo de veículo", sorted(opcoes("Vehicle Type")), "filtro_veiculos"),
+        pagamentos=_selecao("Método de pagamento", sorted(opcoes("Payment Method")), "filtro_pagamentos"),
+        status=_selecao("Status da reserva", sorted(opcoes("Booking Status")), "filtro_status"),
+    )
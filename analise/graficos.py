@@ -0,0 +1,234 @@
+"""Gráficos da página de análise, desenhados a partir dos agregados.
+
+Cada função recebe dados já agregados e devolve uma figura do matplotlib,
+sem depender do Streamlit.
+"""
+
+import matplotlib.pyplot as plt
+import numpy as np
+import seaborn as sns
+from matplotlib.colors import LogNorm
+
+from analise.agregados import cancelamentos, contagem, por_hora, por_mes_e_veiculo, status_simplificado
+
+
+fig_width, fig_height = 7, 4  # Tamanho uniforme
+
+
+def sem_dados(ax):
+    """Aviso no lugar do gráfico quando o filtro não deixa dados para ele."""
+    ax.text(0.5, 0.5, "Sem dados nos filtros selecionados", ha="center", va="center", transform=ax.transAxes)
+
+
+def limite_y_padrao(contagens):
+    # Limite y padrão para contagens grandes, sem cortar a barra mais alta
+    return max(contagens.sum() * 0.3, contagens.max() * 1.1)
+
+
+def plot_count(contagens, palette="Set2", xlabel="", ylabel="Número de Ocorrências", rotation=0, limite_y=None):
+    # Recebe a série de contagens já agregada (uma linha por barra) e só desenha
+    contagens = contagens[contagens > 0].sort_values(ascending=False, kind="stable")
+    fig, ax = plt.subplots(figsize=(fig_width, fig_height))
+    rotulos = contagens.index.astype(str)
+    ax.bar(rotulos, contagens.to_numpy(), width=0.8, color=sns.color_palette(palette, len(contagens)))
+    ax.set_xlabel(xlabel if xlabel else contagens.index.name)
+    ax.set_ylabel(ylabel)
+    if rotation:
+        ax.tick_params(axis='x', labelrotation=rotation)
+    ax.set_ylim(0, limite_y if limite_y else limite_y_padrao(contagens))
+    return fig
+
+
+def plot_hist(hist, color="skyblue", xlabel="", ylabel="Número de Ocorrências"):
+    fig, ax = plt.subplots(figsize=(fig_width, fig_height))
+    ax.bar(hist.bordas[:-1], hist.contagens, width=np.diff(hist.bordas), align="edge",
+           color=color, alpha=0.75, edgecolor="white")
+    ax.plot(hist.kde_x, hist.kde_y, color=color)
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel(ylabel)
+    return fig
+
+
+def grafico_contagem(cubo, coluna, palette, rotation=0):
+    return plot_count(contagem(cubo, coluna), palette=palette, rotation=rotation)
+
+
+def grafico_cancelamentos(cubo):
+    cancel_df = cancelamentos(cubo)
+    fig, ax = plt.subplots(figsize=(fig_width, fig_height))
+    sns.barplot(data=cancel_df, x="Tipo de Cancelamento", y="Quantidade", hue="Tipo de Cancelamento",
+                palette="pastel", legend=False, ax=ax)
+    ax.set_ylim(0, cancel_df["Quantidade"].max() * 1.1)  # Limite y uniforme
+    return fig
+
+
+def grafico_status(cubo):
+    status_counts = status_simplificado(cubo)
+    fig, ax = plt.subplots(figsize=(4, 4))
+    ax.pie(
+        status_counts,
+        labels=status_counts.index,
+        autopct='%1.1f%%',
+        colors=["#4CAF50", "#F44336"],
+        startangle=90
+    )
+    ax.set_title("Corridas Concluídas vs Canceladas", fontsize=12)
+    return fig
+
+
+def grafico_veiculos_tempo(cubo):
+    veiculo_tempo = por_mes_e_veiculo(cubo)
+    fig, ax = plt.subplots(figsize=(6, 4))
+    sns.lineplot(data=veiculo_tempo, x="AnoMes", y="Qtd", hue="Vehicle Type", marker="o", ax=ax)
+
+    ax.set_title("Uso de Tipos de Veículo ao Longo do Tempo", fontsize=12)
+    ax.set_xlabel("Período (Ano-Mês)", fontsize=10)
+    ax.set_ylabel("Quantidade de Corridas", fontsize=10)
+    ax.tick_params(axis='x', rotation=45, labelsize=8)
+    ax.tick_params(axis='y', labelsize=8)
+    ax.legend(title="Tipo de Veículo", fontsize=8)
+    return fig
+
+
+def grafico_por_hora(cubo):
+    corridas_hora = por_hora(cubo)
+    fig, ax = plt.subplots(figsize=(5, 3))
+    sns.barplot(x=corridas_hora.index, y=corridas_hora.values, hue=corridas_hora.index,
+                palette="coolwarm", legend=False, ax=ax)
+
+    ax.set_title("Número de Corridas por Hora do Dia", fontsize=12)
+    ax.set_xlabel("Hora do Dia", fontsize=10)
+    ax.set_ylabel("Quantidade de Corridas", fontsize=10)
+    ax.set_xticks(range(0, 24))  # Apenas números inteiros de 0 a 23
+    ax.tick_params(axis='x', labelsize=8)
+    ax.tick_params(axis='y', labelsize=8)
+    return fig
+
+
+def grafico_distancia_mes(cubo):
+    distancia_stats = cubo.distancia_mes
+    fig, ax = plt.subplots(figsize=(6, 4))
+    sns.lineplot(data=distancia_stats, x="AnoMes", y="mean", marker="o", label="Média", ax=ax)
+    sns.lineplot(data=distancia_stats, x="AnoMes", y="median", marker="o", label="Mediana", ax=ax)
+
+    ax.set_title("Distância Média e Mediana por Mês", fontsize=12)
+    ax.set_xlabel("Período (Ano-Mês)", fontsize=10)
+    ax.set_ylabel("Distância (km)", fontsize=10)
+    ax.tick_params(axis='x', rotation=45, labelsize=8)
+    ax.tick_params(axis='y', labelsize=8)
+    ax.legend(title="Estatística", fontsize=8)
+    return fig
+
+
+def grafico_boxplot(estatisticas, cor, titulo, ylabel):
+    # Desenha a partir das estatísticas pré-calculadas, sem passar os dados ao seaborn
+    fig, ax = plt.subplots(figsize=(5, 3))
+    ax.bxp([estatisticas.para_bxp()], widths=0.8, capwidths=0.4, patch_artist=True,
+           boxprops={"facecolor": cor}, medianprops={"color": "#333333"},
+           flierprops={"marker": "d", "markerfacecolor": "#333333", "markeredgecolor": "none", "markersize": 4})
+    ax.set_xticks([])
+    ax.set_title(titulo, fontsize=12)
+    ax.set_ylabel(ylabel, fontsize=10)
+    ax.tick_params(axis='y', labelsize=8)
+    return fig
+
+
+def grafico_ic_grupos(tabela, dimensao, conf_level, subdivisao=None):
+    """Barras de erro (média ± IC) por grupo, um painel por métrica."""
+    if tabela.empty:
+        # Filtro sem nenhuma métrica preenchida: figura só com o aviso
+        fig, ax = plt.subplots(figsize=(fig_width, fig_height))
+        sem_dados(ax)
+        ax.set_axis_off()
+        return fig
+    metricas = list(dict.fromkeys(tabela["Métrica"]))
+    grupos = list(dict.fromkeys(tabela[dimensao].astype(str)))
+    posicao = {grupo: i for i, grupo in enumerate(grupos)}
+    series = [(None, tabela)] if subdivisao is None else list(tabela.groupby(subdivisao, observed=True, sort=False))
+    cores = sns.color_palette("tab10", len(series))
+    largura = 0.8 / len(series)
+
+    fig, eixos = plt.subplots(len(metricas), 1, figsize=(fig_width, 2.2 * len(metricas)), sharex=True, squeeze=False)
+    for ax, metrica in zip(eixos[:, 0], metricas):
+        for i, (rotulo, parte) in enumerate(series):
+            parte = parte[parte["Métrica"] == metrica]
+            x = parte[dimensao].astype(str).map(posicao).to_numpy() + (i - (len(series) - 1) / 2) * largura
+            ax.errorbar(x, parte["media"], yerr=parte["intervalo"], fmt="o", markersize=3, capsize=2,
+                        color=cores[i], label=rotulo)
+        ax.set_ylabel(metrica, fontsize=8)
+        ax.tick_params(axis='y', labelsize=8)
+    ax.set_xticks(range(len(grupos)), grupos, rotation=45 if len(grupos) > 8 else 0, fontsize=8)
+    eixos[0, 0].set_title(f"Média por Grupo com IC {conf_level}%")
+    if subdivisao is not None:
+        eixos[0, 0].legend(fontsize=7, ncols=min(len(series), 6), loc="upper center", bbox_to_anchor=(0.5, 1.5))
+    return fig
+
+
+def grafico_ic(nomes, medias, intervalos, conf_level):
+    fig, ax = plt.subplots(figsize=(6, 4))
+    ax.bar(nomes, medias, yerr=intervalos, capsize=10, color=["#2196F3", "#4CAF50", "#FF9800"])
+    ax.set_ylabel("Valores")
+    ax.set_title(f"Média das Métricas com IC {conf_level}%")
+    ax.tick_params(axis='y', labelsize=10)
+    return fig
+
+
+def grafico_mapa_od(rotulos, matriz, medida):
+    """Mapa de calor origem × destino (linhas = partida, colunas = destino)."""
+    fig, ax = plt.subplots(figsize=(fig_width, fig_width * 0.8))
+    imagem = ax.imshow(matriz, cmap="YlOrRd", aspect="auto")
+    ax.set_xticks(range(len(rotulos)), rotulos, rotation=90, fontsize=6)
+    ax.set_yticks(range(len(rotulos)), rotulos, fontsize=6)
+    ax.set_xlabel("Destino")
+    ax.set_ylabel("Partida")
+    fig.colorbar(imagem, ax=ax, label=medida)
+    ax.set_title(f"{medida} por Partida e Destino")
+    return fig
+
+
+def grafico_top_pares(tabela, medida):
+    """Barras horizontais dos trajetos (partida → destino) com maior valor da medida."""
+    rotulos = (tabela["Partida"] + " → " + tabela["Destino"]).to_numpy()[::-1]
+    fig, ax = plt.subplots(figsize=(fig_width, max(fig_height, 0.3 * len(tabela))))
+    ax.barh(rotulos, tabela[medida].to_numpy()[::-1], color=sns.color_palette("YlOrRd_r", len(tabela))[::-1])
+    ax.set_xlabel(medida)
+    ax.tick_params(axis='y', labelsize=7)
+    ax.set_title(f"Top {len(tabela)} Trajetos por {medida}")
+    return fig
+
+
+def grafico_tabela_cruzada(proporcoes, titulo):
+    """Mapa de calor do percentual de cada coluna dentro da linha (tabela cruzada de duas vias)."""
+    fig, ax = plt.subplots(figsize=(fig_width, max(fig_height, 0.35 * len(proporcoes) + 1.5)))
+    if proporcoes.empty:
+        # Nenhuma corrida com as duas categorias preenchidas (ex.: motivos com só corridas concluídas)
+        sem_dados(ax)
+        ax.set_axis_off()
+    else:
+        sns.heatmap(proporcoes, cmap="Blues", annot=proporcoes.shape[1] <= 12, fmt=".1f", annot_kws={"fontsize": 7},
+                    cbar_kws={"label": "% da linha"}, ax=ax)
+        ax.tick_params(axis='both', labelsize=7)
+    ax.set_title(titulo)
+    return fig
+
+
+def grafico_densidade_2d(contagens, bordas_x, bordas_y, reta, xlabel, ylabel):
+    """Histograma 2D (células vazias em branco, cor em escala log) com a reta de regressão."""
+    fig, ax = plt.subplots(figsize=(fig_width, fig_height))
+    if contagens.any():
+        ocupadas = np.ma.masked_equal(contagens.T, 0)
+        malha = ax.pcolormesh(bordas_x, bordas_y, ocupadas, cmap="viridis", norm=LogNorm())
+        fig.colorbar(malha, ax=ax, label="Corridas")
+    else:
+        # A escala log não tem limites sem nenhuma célula ocupada
+        sem_dados(ax)
+    inclinacao, intercepto = reta
+    if not np.isnan(inclinacao):
+        x = np.array([bordas_x[0], bordas_x[-1]])
+        ax.plot(x, intercepto + inclinacao * x, color="#FF5722", linewidth=2, label="Regressão linear")
+        ax.legend(fontsize=8, loc="upper left")
+    ax.set_xlim(bordas_x[0], bordas_x[-1])
+    ax.set_ylim(bordas_y[0], bordas_y[-1])
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel(ylabel)
+    return fig
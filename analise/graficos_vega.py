@@ -0,0 +1,245 @@
+"""Versões Vega-Lite (Altair) dos gráficos da página, desenhadas no navegador.
+
+Recebem os mesmos agregados das funções de analise.graficos e devolvem um
+alt.Chart com só a tabela agregada embutida (algumas dezenas de linhas por
+gráfico), em vez de uma imagem rasterizada no servidor. Usadas quando
+ANALISE_RENDER=vega.
+"""
+
+import altair as alt
+import numpy as np
+import pandas as pd
+
+from analise.agregados import cancelamentos, contagem, por_hora, por_mes_e_veiculo, status_simplificado
+
+
+largura, altura = "container", 260
+
+# Paletas do seaborn usadas na versão matplotlib → esquemas do Vega
+ESQUEMAS = {"Set1": "set1", "Set2": "set2", "Set3": "set3", "Blues": "blues", "Greens": "greens",
+            "pastel": "pastel1", "coolwarm": "blueorange"}
+
+# Pontos da KDE enviados ao navegador (a grade completa tem 1024)
+PONTOS_KDE = 200
+
+
+def _base(dados, titulo=None):
+    grafico = alt.Chart(dados).properties(width=largura, height=altura)
+    return grafico.properties(title=titulo) if titulo else grafico
+
+
+def plot_count(contagens, palette="Set2", xlabel="", ylabel="Número de Ocorrências", rotation=0):
+    contagens = contagens[contagens > 0].sort_values(ascending=False, kind="stable")
+    dados = pd.DataFrame({"categoria": contagens.index.astype(str), "Qtd": contagens.to_numpy()})
+    ordem = list(dados["categoria"])
+    return _base(dados).mark_bar().encode(
+        x=alt.X("categoria:N", sort=ordem, title=xlabel or contagens.index.name, axis=alt.Axis(labelAngle=-rotation)),
+        y=alt.Y("Qtd:Q", title=ylabel),
+        color=alt.Color("categoria:N", sort=ordem, scale=alt.Scale(scheme=ESQUEMAS.get(palette, palette)),
+                        legend=None),
+        tooltip=[alt.Tooltip("categoria:N", title=xlabel or contagens.index.name), "Qtd:Q"],
+    )
+
+
+def plot_hist(hist, color="skyblue", xlabel="", ylabel="Número de Ocorrências"):
+    barras = pd.DataFrame({"inicio": hist.bordas[:-1], "fim": hist.bordas[1:], "Qtd": hist.contagens})
+    passo = max(1, len(hist.kde_x) // PONTOS_KDE)
+    kde = pd.DataFrame({"x": hist.kde_x[::passo], "densidade": hist.kde_y[::passo]})
+    colunas = _base(barras).mark_bar(color=color, opacity=0.75, stroke="white").encode(
+        x=alt.X("inicio:Q", title=xlabel), x2="fim:Q", y=alt.Y("Qtd:Q", title=ylabel),
+        tooltip=["inicio:Q", "fim:Q", "Qtd:Q"],
+    )
+    curva = alt.Chart(kde).mark_line(color=color).encode(x="x:Q", y="densidade:Q")
+    return alt.layer(colunas, curva)
+
+
+def grafico_contagem(cubo, coluna, palette, rotation=0):
+    return plot_count(contagem(cubo, coluna), palette=palette, rotation=rotation)
+
+
+def grafico_cancelamentos(cubo):
+    cancel_df = cancelamentos(cubo)
+    return _base(cancel_df).mark_bar().encode(
+        x=alt.X("Tipo de Cancelamento:N", sort=None),
+        y="Quantidade:Q",
+        color=alt.Color("Tipo de Cancelamento:N", scale=alt.Scale(scheme=ESQUEMAS["pastel"]), legend=None),
+        tooltip=["Tipo de Cancelamento:N", "Quantidade:Q"],
+    )
+
+
+def grafico_status(cubo):
+    status_counts = status_simplificado(cubo)
+    dados = pd.DataFrame({"Status": status_counts.index.astype(str), "Percentual": status_counts.to_numpy()})
+    return alt.Chart(dados).mark_arc().encode(
+        theta="Percentual:Q",
+        color=alt.Color("Status:N", sort=list(dados["Status"]),
+                        scale=alt.Scale(range=["#4CAF50", "#F44336"])),
+        tooltip=["Status:N", alt.Tooltip("Percentual:Q", format=".1f")],
+    ).properties(title="Corridas Concluídas vs Canceladas", height=altura)
+
+
+def grafico_veiculos_tempo(cubo):
+    veiculo_tempo = por_mes_e_veiculo(cubo)
+    return _base(veiculo_tempo, "Uso de Tipos de Veículo ao Longo do Tempo").mark_line(point=True).encode(
+        x=alt.X("AnoMes:O", title="Período (Ano-Mês)", axis=alt.Axis(labelAngle=-45)),
+        y=alt.Y("Qtd:Q", title="Quantidade de Corridas"),
+        color=alt.Color("Vehicle Type:N", title="Tipo de Veículo"),
+        tooltip=["AnoMes:O", "Vehicle Type:N", "Qtd:Q"],
+    )
+
+
+def grafico_por_hora(cubo):
+    corridas_hora = por_hora(cubo).reset_index()
+    return _base(corridas_hora, "Número de Corridas por Hora do Dia").mark_bar().encode(
+        x=alt.X("Hour:O", title="Hora do Dia", axis=alt.Axis(labelAngle=0)),
+        y=alt.Y("Qtd:Q", title="Quantidade de Corridas"),
+        color=alt.Color("Hour:O", scale=alt.Scale(scheme=ESQUEMAS["coolwarm"]), legend=None),
+        tooltip=["Hour:O", "Qtd:Q"],
+    )
+
+
+def grafico_distancia_mes(cubo):
+    distancia_stats = cubo.distancia_mes.rename(columns={"mean": "Média", "median": "Mediana"})
+    dados = distancia_stats.melt(id_vars="AnoMes", value_vars=["Média", "Mediana"], var_name="Estatística",
+                                 value_name="Distância")
+    return _base(dados, "Distância Média e Mediana por Mês").mark_line(point=True).encode(
+        x=alt.X("AnoMes:O", title="Período (Ano-Mês)", axis=alt.Axis(labelAngle=-45)),
+        y=alt.Y("Distância:Q", title="Distância (km)", scale=alt.Scale(zero=False)),
+        color="Estatística:N",
+        tooltip=["AnoMes:O", "Estatística:N", alt.Tooltip("Distância:Q", format=".2f")],
+    )
+
+
+def grafico_boxplot(estatisticas, cor, titulo, ylabel):
+    # Caixa, bigodes e mediana a partir das estatísticas; só os outliers distintos vão como pontos
+    caixa = pd.DataFrame([{
+        "q1": estatisticas.q1, "mediana": estatisticas.mediana, "q3": estatisticas.q3,
+        "bigode_inferior": estatisticas.bigode_inferior, "bigode_superior": estatisticas.bigode_superior,
+    }])
+    base = _base(caixa, titulo)
+    bigodes = base.mark_rule().encode(y=alt.Y("bigode_inferior:Q", title=ylabel), y2="bigode_superior:Q")
+    retangulo = base.mark_bar(size=60, color=cor).encode(
+        y="q1:Q", y2="q3:Q",
+        tooltip=[alt.Tooltip(c + ":Q", format=".2f") for c in caixa.columns],
+    )
+    mediana = base.mark_tick(size=60, color="#333333", thickness=2).encode(y="mediana:Q")
+    outliers = alt.Chart(pd.DataFrame({"valor": np.asarray(estatisticas.outliers)})).mark_point(
+        shape="diamond", size=12, filled=True, color="#333333").encode(y="valor:Q")
+    return alt.layer(bigodes, retangulo, mediana, outliers)
+
+
+def grafico_ic(nomes, medias, erros, conf_level):
+    # erros = [abaixo, acima] da média (assimétricos no bootstrap)
+    dados = pd.DataFrame({
+        "Métrica": nomes, "media": medias,
+        "inferior": np.asarray(medias) - np.asarray(erros[0]),
+        "superior": np.asarray(medias) + np.asarray(erros[1]),
+    })
+    base = _base(dados, f"Média das Métricas com IC {conf_level}%")
+    barras = base.mark_bar().encode(
+        x=alt.X("Métrica:N", sort=None, axis=alt.Axis(labelAngle=0)),
+        y=alt.Y("media:Q", title="Valores"),
+        color=alt.Color("Métrica:N", sort=None, scale=alt.Scale(range=["#2196F3", "#4CAF50", "#FF9800"]),
+                        legend=None),
+        tooltip=["Métrica:N"] + [alt.Tooltip(c + ":Q", format=".2f") for c in ("media", "inferior", "superior")],
+    )
+    barras_erro = base.mark_errorbar(ticks=True).encode(x=alt.X("Métrica:N", sort=None), y="inferior:Q",
+                                                        y2="superior:Q")
+    return alt.layer(barras, barras_erro)
+
+
+def grafico_ic_grupos(tabela, dimensao, conf_level, subdivisao=None):
+    """Média ± IC por grupo, um painel por métrica (eixo y independente)."""
+    dados = pd.DataFrame({
+        "Métrica": tabela["Métrica"].astype(str),
+        "grupo": tabela[dimensao].astype(str),
+        "media": tabela["media"],
+        "inferior": tabela["media"] - tabela["intervalo"],
+        "superior": tabela["media"] + tabela["intervalo"],
+    })
+    codificacao = {"x": alt.X("grupo:N", sort=None, title=dimensao)}
+    if subdivisao is not None:
+        dados["subgrupo"] = tabela[subdivisao].astype(str).to_numpy()
+        codificacao["xOffset"] = "subgrupo:N"
+        codificacao["color"] = alt.Color("subgrupo:N", title=subdivisao)
+    # Gráficos em facetas não aceitam largura "container"
+    base = alt.Chart(dados).encode(**codificacao).properties(width=460, height=120)
+    pontos = base.mark_point(filled=True, size=20).encode(
+        y=alt.Y("media:Q", title=None, scale=alt.Scale(zero=False)),
+        tooltip=list(dados.columns),
+    )
+    barras_erro = base.mark_rule().encode(y="inferior:Q", y2="superior:Q")
+    return alt.layer(pontos, barras_erro).facet(
+        row=alt.Row("Métrica:N", sort=list(dict.fromkeys(dados["Métrica"])), title=None),
+        title=f"Média por Grupo com IC {conf_level}%",
+    ).resolve_scale(y="independent")
+
+
+def grafico_mapa_od(rotulos, matriz, medida):
+    # Só as células não nulas vão para o navegador (o fundo vazio fica sem retângulo)
+    linhas, colunas = np.nonzero(matriz)
+    dados = pd.DataFrame({
+        "Partida": np.asarray(rotulos)[linhas], "Destino": np.asarray(rotulos)[colunas],
+        medida: matriz[linhas, colunas],
+    })
+    ordem = list(rotulos)
+    return alt.Chart(dados).mark_rect().encode(
+        x=alt.X("Destino:N", sort=ordem, axis=alt.Axis(labelFontSize=8)),
+        y=alt.Y("Partida:N", sort=ordem, axis=alt.Axis(labelFontSize=8)),
+        color=alt.Color(f"{medida}:Q", scale=alt.Scale(scheme="yelloworangered")),
+        tooltip=["Partida:N", "Destino:N", alt.Tooltip(f"{medida}:Q", format=",.0f")],
+    ).properties(width=largura, height=460, title=f"{medida} por Partida e Destino")
+
+
+def grafico_top_pares(tabela, medida):
+    dados = pd.DataFrame({"Trajeto": tabela["Partida"] + " → " + tabela["Destino"]})
+    for col in ("Corridas", "Receita", "Cancelamentos"):
+        dados[col] = tabela[col].to_numpy()
+    return alt.Chart(dados).mark_bar().encode(
+        x=alt.X(f"{medida}:Q"),
+        y=alt.Y("Trajeto:N", sort=None, title=None, axis=alt.Axis(labelFontSize=9)),
+        color=alt.Color(f"{medida}:Q", scale=alt.Scale(scheme="yelloworangered"), legend=None),
+        tooltip=["Trajeto:N", "Corridas:Q", alt.Tooltip("Receita:Q", format=",.0f"), "Cancelamentos:Q"],
+    ).properties(width=largura, height=max(altura, 18 * len(dados)), title=f"Top {len(dados)} Trajetos por {medida}")
+
+
+def grafico_tabela_cruzada(proporcoes, titulo):
+    linha, coluna = proporcoes.index.name, proporcoes.columns.name
+    dados = proporcoes.rename_axis(index="linha", columns="coluna").stack().dropna().rename("pct").reset_index()
+    dados["linha"], dados["coluna"] = dados["linha"].astype(str), dados["coluna"].astype(str)
+    base = alt.Chart(dados).encode(
+        x=alt.X("coluna:N", sort=list(proporcoes.columns.astype(str)), title=coluna),
+        y=alt.Y("linha:N", sort=list(proporcoes.index.astype(str)), title=linha, axis=alt.Axis(labelLimit=260)),
+    )
+    celulas = base.mark_rect().encode(
+        color=alt.Color("pct:Q", title="% da linha", scale=alt.Scale(scheme="blues")),
+        tooltip=[alt.Tooltip("linha:N", title=linha), alt.Tooltip("coluna:N", title=coluna),
+                 alt.Tooltip("pct:Q", format=".1f", title="% da linha")],
+    )
+    return celulas.properties(width=largura, height=max(altura, 22 * len(proporcoes)), title=titulo)
+
+
+def grafico_densidade_2d(contagens, bordas_x, bordas_y, reta, xlabel, ylabel):
+    # Uma linha por célula ocupada (no máximo bins × bins), com as bordas da célula
+    i, j = np.nonzero(contagens)
+    dados = pd.DataFrame({"x": bordas_x[i], "x2": bordas_x[i + 1], "y": bordas_y[j], "y2": bordas_y[j + 1],
+                          "Corridas": contagens[i, j]})
+    escala_x = alt.Scale(domain=[float(bordas_x[0]), float(bordas_x[-1])], nice=False)
+    escala_y = alt.Scale(domain=[float(bordas_y[0]), float(bordas_y[-1])], nice=False)
+    # Até 120 × 120 células: passa do limite de linhas do Altair, então os dados vão já como valores
+    celulas = alt.Chart(alt.Data(values=dados.to_dict(orient="records"))).mark_rect().encode(
+        x=alt.X("x:Q", title=xlabel, scale=escala_x), x2="x2:Q",
+        y=alt.Y("y:Q", title=ylabel, scale=escala_y), y2="y2:Q",
+        color=alt.Color("Corridas:Q", scale=alt.Scale(type="log", scheme="viridis")),
+        tooltip=[alt.Tooltip("x:Q", format=".1f", title=f"{xlabel} de"), alt.Tooltip("x2:Q", format=".1f", title="até"),
+                 alt.Tooltip("y:Q", format=".0f", title=f"{ylabel} de"), alt.Tooltip("y2:Q", format=".0f", title="até"),
+                 "Corridas:Q"],
+    )
+    camadas = [celulas]
+    inclinacao, intercepto = reta
+    if not np.isnan(inclinacao):
+        x = np.array([bordas_x[0], bordas_x[-1]])
+        linha = pd.DataFrame({"x": x, "y": intercepto + inclinacao * x})
+        camadas.append(alt.Chart(linha).mark_line(color="#FF5722", strokeWidth=2, clip=True).encode(
+            x=alt.X("x:Q", scale=escala_x), y=alt.Y("y:Q", scale=escala_y)))
+    return alt.layer(*camadas).properties(width=largura, height=altura + 60)
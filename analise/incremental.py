@@ -0,0 +1,125 @@
+"""Detecção de linhas acrescentadas ao fim do CSV.
+
+Cada artefato derivado do CSV (hash de versão, sidecar Parquet, estado do
+modo streaming) guarda uma Marca: até que byte do arquivo já foi processado,
+quantas linhas isso deu, o tamanho do arquivo naquele momento e uma
+assinatura do conteúdo até ali (o começo do arquivo e o trecho logo antes do
+fim processado). Se o arquivo cresceu (ficou estritamente maior) e a
+assinatura confere, o conteúdo anterior é tratado como intacto e só o trecho
+novo [offset, fim da última linha completa) precisa ser lido. Se o arquivo
+ficou do mesmo tamanho ou encolheu, ou a assinatura mudou, o artefato é
+refeito do zero: uma reescrita do mesmo tamanho nunca é tomada por acréscimo.
+
+A assinatura lê no máximo 2 × JANELA bytes: só uma reescrita feita junto com
+um acréscimo, que não toque nem o começo nem o fim do trecho já processado,
+passa despercebida (o mesmo limite de qualquer detecção por amostragem).
+"""
+
+import hashlib
+import io
+import os
+from dataclasses import dataclass
+
+
+JANELA = 64 * 1024
+
+
+@dataclass(frozen=True)
+class Marca:
+    # Byte logo depois da última linha completa processada
+    offset: int
+    linhas: int
+    assinatura: str
+    # Tamanho do arquivo quando a marca foi feita (só um arquivo maior que isso pode ter acréscimo)
+    tamanho: int = 0
+
+
+def assinatura(caminho, offset):
+    """Hash do começo do arquivo e dos JANELA bytes antes de `offset`."""
+    h = hashlib.blake2b(str(offset).encode(), digest_size=16)
+    with open(caminho, "rb") as f:
+        h.update(f.read(min(JANELA, offset)))
+        f.seek(max(0, offset - JANELA))
+        h.update(f.read(offset - f.tell()))
+    return h.hexdigest()
+
+
+def fim_linhas(caminho, tamanho=None):
+    """Offset logo depois do último "\\n" (uma linha incompleta no fim fica para depois)."""
+    tamanho = os.path.getsize(caminho) if tamanho is None else tamanho
+    with open(caminho, "rb") as f:
+        fim = tamanho
+        while fim > 0:
+            inicio = max(0, fim - JANELA)
+            f.seek(inicio)
+            bloco = f.read(fim - inicio)
+            posicao = bloco.rfind(b"\n")
+            if posicao >= 0:
+                return inicio + posicao + 1
+            fim = inicio
+    return 0
+
+
+def fim_cabecalho(caminho):
+    with open(caminho, "rb") as f:
+        return len(f.readline())
+
+
+def marca_inicial(caminho):
+    """Marca de um arquivo do qual só o cabeçalho foi processado."""
+    offset = fim_cabecalho(caminho)
+    return Marca(offset, 0, assinatura(caminho, offset), os.path.getsize(caminho))
+
+
+def acrescimo(caminho, marca):
+    """Trecho (inicio, fim) ainda não processado, ou None se o conteúdo anterior mudou."""
+    if marca is None:
+        return None
+    tamanho = os.path.getsize(caminho)
+    # Mesmo tamanho (ou menor) com conteúdo diferente é reescrita, não acréscimo
+    if tamanho <= marca.tamanho or tamanho < marca.offset or assinatura(caminho, marca.offset) != marca.assinatura:
+        return None
+    return marca.offset, fim_linhas(caminho, tamanho)
+
+
+def avancar(caminho, marca, fim, linhas):
+    """Marca depois de processar [marca.offset, fim) com `linhas` linhas."""
+    # O tamanho é lido depois do processamento: se o arquivo cresceu no meio, o
+    # pior caso é tomar o próximo acréscimo por reescrita e refazer do zero
+    tamanho = os.path.getsize(caminho)
+    if fim == marca.offset:
+        return Marca(marca.offset, marca.linhas, marca.assinatura, tamanho)
+    return Marca(fim, marca.linhas + linhas, assinatura(caminho, fim), tamanho)
+
+
+class _Trecho(io.RawIOBase):
+    """Arquivo somente leitura com o cabeçalho do CSV seguido dos bytes [inicio, fim)."""
+
+    def __init__(self, caminho, inicio, fim):
+        self._arquivo = open(caminho, "rb")
+        self._cabecalho = self._arquivo.readline()
+        self._arquivo.seek(inicio)
+        self._restante = fim - inicio
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if self._cabecalho:
+            n = min(len(buffer), len(self._cabecalho))
+            buffer[:n] = self._cabecalho[:n]
+            self._cabecalho = self._cabecalho[n:]
+            return n
+        dados = self._arquivo.read(min(len(buffer), self._restante))
+        self._restante -= len(dados)
+        buffer[:len(dados)] = dados
+        return len(dados)
+
+    def close(self):
+        self._arquivo.close()
+        super().close()
+
+
+def abrir_trecho(caminho, inicio, fim):
+    """Trecho do CSV (com o cabeçalho) como arquivo binário para o pd.read_csv."""
+    return io.BufferedReader(_Trecho(caminho, inicio, fim), buffer_size=1 << 20)
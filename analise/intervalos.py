@@ -0,0 +1,172 @@
+"""Intervalos de confiança das métricas com corte de outliers por percentil.
+
+Cada métrica é guardada ordenada, junto com as somas acumuladas de x e x².
+Com isso o quantil de corte, a média e o desvio padrão da série cortada
+(clip) saem por busca binária e consulta às somas, sem percorrer os dados.
+No modo streaming os mesmos cálculos usam os HistogramaStreaming do cubo.
+
+Os ICs por grupo (veículo, mês, hora, pagamento) saem dos momentos n, Σx e Σx²
+guardados nas células do cubo: um groupby sobre as células e o t crítico
+calculado de uma vez para todos os tamanhos de grupo.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+import scipy.stats as stats
+import streamlit as st
+
+from analise import config
+from analise.backends import obter_backend
+from analise.dados import CAMINHO_CSV, versao_arquivo
+from analise.derivadas import SEM_VALOR, rotulo_mes
+from analise.filtros import SEM_FILTRO
+from analise.medicao import registrar_falta
+
+
+# Métricas exibidas na seção de IC (rótulo → coluna)
+METRICAS_IC = {
+    "Booking Value (R$)": "Booking Value",
+    "Ride Distance (km)": "Ride Distance",
+    "Avg VTAT (min)": "Avg VTAT",
+}
+
+# Agrupamentos oferecidos no IC por grupo (rótulo → dimensão do cubo)
+DIMENSOES_IC = {
+    "Tipo de veículo": "Vehicle Type",
+    "Mês": "AnoMes",
+    "Hora do dia": "Hour",
+    "Método de pagamento": "Payment Method",
+}
+
+
+@dataclass
+class SerieOrdenada:
+    valores: np.ndarray
+    # Somas acumuladas de (x - centro) e (x - centro)², com zero na posição 0
+    prefixo: np.ndarray
+    prefixo2: np.ndarray
+    # Centralizar na média reduz o erro numérico do cálculo da variância
+    centro: float
+
+    @classmethod
+    def de_valores(cls, valores):
+        valores = np.sort(valores[~np.isnan(valores)])
+        centro = valores.mean() if len(valores) else 0.0
+        desvio = valores - centro
+        prefixo = np.concatenate(([0.0], np.cumsum(desvio)))
+        prefixo2 = np.concatenate(([0.0], np.cumsum(desvio * desvio)))
+        for arr in (valores, prefixo, prefixo2):
+            arr.flags.writeable = False
+        return cls(valores, prefixo, prefixo2, centro)
+
+    @property
+    def n(self):
+        return len(self.valores)
+
+    def quantil(self, q):
+        """Quantil com interpolação linear (mesmo critério do Series.quantile); NaN se a série é vazia."""
+        if self.n == 0:
+            return np.nan
+        posicao = q * (self.n - 1)
+        abaixo = int(np.floor(posicao))
+        acima = min(abaixo + 1, self.n - 1)
+        fracao = posicao - abaixo
+        return self.valores[abaixo] + (self.valores[acima] - self.valores[abaixo]) * fracao
+
+    def media_std_cortada(self, limite):
+        """Média e desvio padrão (ddof=1) da série com clip(upper=limite)."""
+        n = self.n
+        k = np.searchsorted(self.valores, limite, side="right")
+        excesso = limite - self.centro
+        soma = self.prefixo[k] + (n - k) * excesso
+        soma2 = self.prefixo2[k] + (n - k) * excesso * excesso
+        media = soma / n
+        if n < 2:
+            return self.centro + media, np.nan
+        variancia = max(soma2 - n * media * media, 0.0) / (n - 1)
+        return self.centro + media, np.sqrt(variancia)
+
+
+def calcular_ic(media, std, n, alpha):
+    """Média e meia largura do IC t de Student."""
+    t_crit = stats.t.ppf(1 - alpha/2, df=n-1)
+    intervalo = t_crit * (std/np.sqrt(n))
+    return media, intervalo
+
+
+def calcular_ic_momentos(n, soma, soma2, alpha):
+    """calcular_ic vetorizado: média e meia largura a partir de n, Σx e Σx² de cada grupo.
+
+    Grupos com menos de duas observações ficam com intervalo NaN.
+    """
+    n = np.asarray(n, dtype="float64")
+    with np.errstate(divide="ignore", invalid="ignore"):
+        media = soma / n
+        variancia = np.maximum(soma2 - soma * media, 0.0) / (n - 1)
+        t_crit = stats.t.ppf(1 - alpha/2, df=np.where(n > 1, n - 1, np.nan))
+        intervalo = t_crit * np.sqrt(variancia / n)
+    return media, intervalo
+
+
+def ic_por_grupo(cubo, dimensoes, conf_level):
+    """Média e IC de cada métrica por grupo, em formato longo (uma linha por grupo e métrica)."""
+    alpha = 1 - conf_level/100
+    celulas = cubo.celulas
+    for dim in dimensoes:
+        if dim in ("AnoMes", "Hour"):
+            celulas = celulas[celulas[dim] != SEM_VALOR]
+    colunas = [f"{col}:{s}" for col in METRICAS_IC.values() for s in ("n", "soma", "soma2")]
+    momentos = celulas.groupby(list(dimensoes), observed=True)[colunas].sum()
+    partes = []
+    for nome, col in METRICAS_IC.items():
+        n = momentos[f"{col}:n"].to_numpy()
+        media, intervalo = calcular_ic_momentos(n, momentos[f"{col}:soma"].to_numpy(),
+                                                momentos[f"{col}:soma2"].to_numpy(), alpha)
+        partes.append(pd.DataFrame({"Métrica": nome, "n": n, "media": media, "intervalo": intervalo},
+                                   index=momentos.index))
+    tabela = pd.concat(partes).reset_index()
+    tabela = tabela[tabela["n"] > 0].reset_index(drop=True)
+    if "AnoMes" in tabela:
+        tabela["AnoMes"] = rotulo_mes(tabela["AnoMes"])
+    return tabela
+
+
+def indicadores_ic(series, conf_level, percentil_max):
+    """Nomes, médias e meias larguras do IC de cada métrica, com corte no percentil.
+
+    Métrica sem valores no filtro fica com média e intervalo NaN.
+    """
+    alpha = 1 - conf_level/100
+    nomes, medias, intervalos = [], [], []
+    for nome, serie in series.items():
+        if serie.n == 0:
+            media, intervalo = np.nan, np.nan
+        else:
+            limite = serie.quantil(percentil_max/100)
+            media, std = serie.media_std_cortada(limite)
+            media, intervalo = calcular_ic(media, std, serie.n, alpha)
+        nomes.append(nome)
+        medias.append(media)
+        intervalos.append(intervalo)
+    return nomes, medias, intervalos
+
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def _series_ordenadas(caminho, versao, backend, filtro):
+    registrar_falta("series_ic")
+    backend = obter_backend(caminho, backend)
+    return {nome: SerieOrdenada.de_valores(backend.valores(col, filtro)) for nome, col in METRICAS_IC.items()}
+
+
+def series_ordenadas(caminho=CAMINHO_CSV, filtro=SEM_FILTRO):
+    """Séries ordenadas da versão atual, compartilhadas (somente leitura) entre sessões."""
+    return _series_ordenadas(caminho, versao_arquivo(caminho), config.BACKEND, filtro)
+
+
+def series_ic(cubo, filtro=SEM_FILTRO, caminho=CAMINHO_CSV):
+    """Séries usadas no IC: ordenadas (modo memória) ou resumos do cubo já filtrado (modo streaming)."""
+    if config.modo_streaming():
+        return {nome: cubo.sketches[col] for nome, col in METRICAS_IC.items()}
+    return series_ordenadas(caminho, filtro)
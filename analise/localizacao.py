@@ -0,0 +1,229 @@
+"""Análise de locais de partida e destino com matrizes origem-destino esparsas.
+
+Os nomes em Pickup Location e Drop Location são codificados uma vez por versão
+dos dados em inteiros de um dicionário único (a mesma posição para o mesmo
+local nas duas colunas). A partir dos códigos, uma única passada vetorizada
+monta as matrizes origem × destino de corridas, concluídas, receita (soma de
+Booking Value das concluídas) e cancelamentos (Cancelled by Customer ou by
+Driver; Incomplete e No Driver Found não são nem concluídas nem canceladas),
+em scipy.sparse com duplicatas somadas na conversão de COO para CSR. Os
+filtros da página (período, veículo, pagamento, status) são aplicados com a
+máscara do IndiceFiltros sobre os códigos, sem reler as strings. No modo streaming as matrizes são montadas bloco a bloco e somadas.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sparse
+import streamlit as st
+
+from analise import config
+from analise.dados import CAMINHO_CSV, carregar_dados, converter_datas, versao_arquivo
+from analise.derivadas import STATUS_CANCELADOS, STATUS_CONCLUIDO
+from analise.filtros import SEM_FILTRO, indice_filtros, mascara_linhas
+from analise.medicao import registrar_falta
+
+
+COLUNAS_LOCAIS = ["Pickup Location", "Drop Location"]
+COLUNAS_OD = COLUNAS_LOCAIS + ["Booking Value", "Booking Status"]
+
+MEDIDAS_OD = {"Corridas": "contagens", "Receita": "receita", "Cancelamentos": "canceladas"}
+# Todas as matrizes de MatrizesOD (as medidas e as concluídas, base do valor médio)
+MATRIZES_OD = list(MEDIDAS_OD.values()) + ["concluidas"]
+
+# Mínimo de corridas para um local entrar no ranking de taxa de cancelamento
+MINIMO_CORRIDAS_TAXA = 30
+
+
+@dataclass
+class CodigosLocais:
+    """Colunas de locais codificadas (uma linha por corrida), na ordem do dataset."""
+    locais: np.ndarray
+    origem: np.ndarray
+    destino: np.ndarray
+    valor: np.ndarray
+    concluida: np.ndarray
+    cancelada: np.ndarray
+
+
+def codificar(df, locais=None):
+    """Codifica partida e destino em um dicionário único (estendendo `locais`, se dado)."""
+    origem = df["Pickup Location"].astype("category")
+    destino = df["Drop Location"].astype("category")
+    # O dicionário só cresce: os códigos de blocos anteriores continuam válidos
+    indice = {} if locais is None else {nome: i for i, nome in enumerate(locais)}
+    for nome in origem.cat.categories.union(destino.cat.categories):
+        indice.setdefault(nome, len(indice))
+
+    def recodificar(serie):
+        mapa = np.array([indice[nome] for nome in serie.cat.categories] + [-1], dtype="int32")
+        # Código -1 (local ausente) aponta para o último item do mapa, que é -1
+        return mapa[serie.cat.codes.to_numpy()]
+
+    return CodigosLocais(
+        locais=np.array(list(indice), dtype=object),
+        origem=recodificar(origem),
+        destino=recodificar(destino),
+        valor=df["Booking Value"].to_numpy(dtype="float64", na_value=np.nan),
+        concluida=(df["Booking Status"] == STATUS_CONCLUIDO).to_numpy(dtype=bool),
+        cancelada=df["Booking Status"].isin(STATUS_CANCELADOS).to_numpy(dtype=bool),
+    )
+
+
+@dataclass
+class MatrizesOD:
+    locais: np.ndarray
+    # Matrizes CSR locais × locais (linha = partida, coluna = destino)
+    contagens: sparse.csr_matrix
+    receita: sparse.csr_matrix
+    canceladas: sparse.csr_matrix
+    concluidas: sparse.csr_matrix
+
+    @classmethod
+    def de_codigos(cls, codigos, mascara=None):
+        """Monta as quatro matrizes em uma passada sobre os códigos (só as linhas da máscara)."""
+        validos = (codigos.origem >= 0) & (codigos.destino >= 0)
+        if mascara is not None:
+            validos &= mascara
+        origem, destino = codigos.origem[validos], codigos.destino[validos]
+        concluida, cancelada = codigos.concluida[validos], codigos.cancelada[validos]
+        # Receita só das corridas concluídas (as incompletas também têm Booking Value)
+        receita = np.where(concluida, np.nan_to_num(codigos.valor[validos]), 0.0)
+        n = len(codigos.locais)
+
+        def matriz(pesos, dtype):
+            return sparse.coo_matrix((pesos, (origem, destino)), shape=(n, n), dtype=dtype).tocsr()
+
+        return cls(
+            codigos.locais,
+            matriz(np.ones(len(origem), dtype="int64"), "int64"),
+            matriz(receita, "float64"),
+            matriz(cancelada.astype("int64"), "int64"),
+            matriz(concluida.astype("int64"), "int64"),
+        )
+
+    def combinar(self, outro):
+        """Soma as matrizes de outra parte dos dados (o dicionário de `outro` estende o deste)."""
+        n = len(outro.locais)
+        for nome in MATRIZES_OD:
+            atual = getattr(self, nome)
+            atual.resize((n, n))
+            setattr(self, nome, atual + getattr(outro, nome))
+        self.locais = outro.locais
+        return self
+
+    @property
+    def total(self):
+        return int(self.contagens.sum())
+
+    def por_local(self, eixo="partida"):
+        """Totais por local de partida (soma das linhas) ou de destino (soma das colunas)."""
+        dim = 1 if eixo == "partida" else 0
+        corridas = np.asarray(self.contagens.sum(axis=dim)).ravel()
+        receita = np.asarray(self.receita.sum(axis=dim)).ravel()
+        canceladas = np.asarray(self.canceladas.sum(axis=dim)).ravel()
+        concluidas = np.asarray(self.concluidas.sum(axis=dim)).ravel()
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return pd.DataFrame({
+                "Local": self.locais.astype(str),
+                "Corridas": corridas,
+                "Receita": receita,
+                "Cancelamentos": canceladas,
+                "Valor médio": receita / concluidas,
+                "% canceladas": 100 * canceladas / corridas,
+            })
+
+    def top_locais(self, k, eixo="partida", medida="Corridas", minimo=0):
+        tabela = self.por_local(eixo)
+        tabela = tabela[tabela["Corridas"] >= max(minimo, 1)]
+        tabela = tabela.sort_values([medida, "Local"], ascending=[False, True], kind="stable")
+        return tabela.head(k).reset_index(drop=True)
+
+    def top_pares(self, k, medida="Corridas"):
+        """Os k pares origem → destino com maior valor da medida, sem densificar a matriz."""
+        matriz = getattr(self, MEDIDAS_OD[medida]).tocoo()
+        if k <= 0 or matriz.nnz == 0:
+            escolhidos = np.array([], dtype="int64")
+        else:
+            # Candidatos: células com valor >= o k-ésimo maior (empates no corte resolvidos pelo nome)
+            corte = np.partition(matriz.data, -min(k, matriz.nnz))[-min(k, matriz.nnz)]
+            escolhidos = np.flatnonzero(matriz.data >= corte)
+        linhas, colunas = matriz.row[escolhidos], matriz.col[escolhidos]
+        corridas = np.asarray(self.contagens[linhas, colunas]).ravel()
+        receita = np.asarray(self.receita[linhas, colunas]).ravel()
+        canceladas = np.asarray(self.canceladas[linhas, colunas]).ravel()
+        concluidas = np.asarray(self.concluidas[linhas, colunas]).ravel()
+        with np.errstate(invalid="ignore", divide="ignore"):
+            tabela = pd.DataFrame({
+                "Partida": self.locais[linhas].astype(str),
+                "Destino": self.locais[colunas].astype(str),
+                "Corridas": corridas,
+                "Receita": receita,
+                "Cancelamentos": canceladas,
+                "Valor médio": receita / concluidas,
+                "% canceladas": 100 * canceladas / corridas,
+            })
+        tabela = tabela.sort_values([medida, "Partida", "Destino"], ascending=[False, True, True], kind="stable")
+        return tabela.head(k).reset_index(drop=True)
+
+    def submatriz(self, n, medida="Corridas"):
+        """Rótulos e matriz densa n × n dos locais com mais corridas (partidas + destinos)."""
+        volume = np.asarray(self.contagens.sum(axis=0)).ravel() + np.asarray(self.contagens.sum(axis=1)).ravel()
+        escolhidos = np.sort(np.argsort(volume, kind="stable")[::-1][:n])
+        matriz = getattr(self, MEDIDAS_OD[medida])[escolhidos][:, escolhidos]
+        return self.locais[escolhidos], matriz.toarray()
+
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def _codigos_locais(caminho, versao):
+    registrar_falta("codigos_locais")
+    return codificar(carregar_dados(caminho, COLUNAS_OD, versao))
+
+
+def _od_streaming(caminho, filtro):
+    from analise.streaming import ler_blocos
+    od = None
+    for bloco in ler_blocos(caminho):
+        if filtro.ativo:
+            bloco = converter_datas(bloco)
+            bloco = bloco[mascara_linhas(bloco, filtro)]
+        codigos = codificar(bloco, None if od is None else od.locais)
+        parte = MatrizesOD.de_codigos(codigos)
+        od = parte if od is None else od.combinar(parte)
+    return od
+
+
+@st.cache_data(show_spinner="Montando matrizes origem-destino...", max_entries=16)
+def _obter_od(caminho, versao, modo, filtro):
+    registrar_falta("od")
+    if modo == "streaming":
+        return _od_streaming(caminho, filtro)
+    mascara = indice_filtros(caminho).mascara(filtro) if filtro.ativo else None
+    return MatrizesOD.de_codigos(_codigos_locais(caminho, versao), mascara)
+
+
+def obter_od(filtro=SEM_FILTRO, caminho=CAMINHO_CSV):
+    """Matrizes origem-destino da versão atual, com o filtro da página."""
+    return _obter_od(caminho, versao_arquivo(caminho), config.MODO, filtro)
+
+
+def insights_localizacao(od):
+    partidas = od.top_locais(1, "partida")
+    destinos = od.top_locais(1, "destino")
+    par = od.top_pares(1)
+    cancelamento = od.top_locais(1, "partida", "% canceladas", minimo=MINIMO_CORRIDAS_TAXA)
+    valor = od.top_locais(1, "destino", "Valor médio", minimo=MINIMO_CORRIDAS_TAXA)
+    itens = []
+    if len(partidas) and len(destinos):
+        itens.append(f"Local de partida mais comum: **{partidas['Local'][0]}** ({partidas['Corridas'][0]} corridas); "
+                     f"destino mais comum: **{destinos['Local'][0]}** ({destinos['Corridas'][0]}).")
+    if len(par):
+        itens.append(f"Trajeto mais frequente: **{par['Partida'][0]} → {par['Destino'][0]}** ({par['Corridas'][0]} corridas).")
+    if len(cancelamento):
+        itens.append(f"Maior taxa de cancelamento na partida: **{cancelamento['Local'][0]}** "
+                     f"({cancelamento['% canceladas'][0]:.1f}% das corridas).")
+    if len(valor):
+        itens.append(f"Destino com maior valor médio por corrida concluída: **{valor['Local'][0]}** "
+                     f"(R$ {valor['Valor médio'][0]:.2f}).")
+    return itens
@@ -0,0 +1,166 @@
+"""Medição de desempenho por seção da página (tempo, CPU, linhas, memória e cache).
+
+Cada seção medida (`with medidor.secao("nome", linhas=...)`) gera um registro
+com o tempo de parede, o tempo de CPU da thread da sessão, as linhas
+envolvidas, o pico de memória Python durante a seção (tracemalloc) e os
+acessos a cache: as funções em cache chamam registrar_falta() no corpo, que
+só roda quando o valor não estava em cache, e o cache de figuras registra
+acertos e faltas. Os registros aparecem no painel da barra lateral e, se
+ANALISE_MEDICAO_LOG estiver definido, vão como JSON lines para o arquivo
+(ou "-" para stderr).
+
+Desligada, uma seção é um contexto vazio e registrar_falta() só lê uma
+variável da thread; o tracemalloc só fica ligado enquanto alguma sessão mede.
+"""
+
+import json
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+
+import pandas as pd
+import streamlit as st
+
+from analise import config
+
+
+MB = 1024 * 1024
+
+# Medições em andamento na thread atual (seções aninhadas)
+_local = threading.local()
+_lock_log = threading.Lock()
+
+# Sessões com a medição ligada (o tracemalloc é do processo inteiro)
+_sessoes_ativas = set()
+_lock_sessoes = threading.Lock()
+
+
+def _pilha():
+    if not hasattr(_local, "pilha"):
+        _local.pilha = []
+    return _local.pilha
+
+
+def registrar_falta(cache):
+    """Chamada no corpo das funções em cache: conta uma falta (recálculo) na seção atual."""
+    pilha = getattr(_local, "pilha", None)
+    if pilha:
+        pilha[-1]["faltas"][cache] += 1
+
+
+def registrar_figura(acerto):
+    pilha = getattr(_local, "pilha", None)
+    if pilha:
+        pilha[-1]["figuras_acertos" if acerto else "figuras_faltas"] += 1
+
+
+def _id_sessao():
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+    contexto = get_script_run_ctx(suppress_warning=True)
+    return contexto.session_id if contexto else None
+
+
+def emitir(registro, destino=None):
+    """Escreve o registro como uma linha JSON no log configurado."""
+    destino = destino or config.MEDICAO_LOG
+    if not destino:
+        return
+    linha = json.dumps(registro, ensure_ascii=False, default=str)
+    with _lock_log:
+        if destino == "-":
+            print(linha, file=sys.stderr, flush=True)
+        else:
+            with open(destino, "a", encoding="utf-8") as f:
+                f.write(linha + "\n")
+
+
+class Medidor:
+    def __init__(self, ativo=False):
+        self.ativo = ativo
+        self.registros = []
+        self.sessao = _id_sessao()
+        with _lock_sessoes:
+            if ativo:
+                _sessoes_ativas.add(self.sessao)
+                if not tracemalloc.is_tracing():
+                    tracemalloc.start()
+            elif self.sessao in _sessoes_ativas:
+                _sessoes_ativas.discard(self.sessao)
+                if not _sessoes_ativas:
+                    tracemalloc.stop()
+
+    def secao(self, nome, linhas=None):
+        """Contexto que mede a seção; o dicionário devolvido aceita `linhas` definido dentro dela."""
+        if not self.ativo:
+            return nullcontext({})
+        return self._medir(nome, linhas)
+
+    @contextmanager
+    def _medir(self, nome, linhas):
+        pilha = _pilha()
+        memoria, pico = tracemalloc.get_traced_memory()
+        if pilha:
+            # O pico da seção externa não pode se perder com o reset da interna
+            pilha[-1]["pico"] = max(pilha[-1]["pico"], pico)
+        tracemalloc.reset_peak()
+        atual = {"linhas": linhas, "faltas": Counter(), "figuras_acertos": 0, "figuras_faltas": 0,
+                 "memoria": memoria, "pico": 0}
+        pilha.append(atual)
+        inicio, inicio_cpu = time.perf_counter(), time.thread_time()
+        try:
+            yield atual
+        finally:
+            parede, cpu = time.perf_counter() - inicio, time.thread_time() - inicio_cpu
+            pilha.pop()
+            pico = max(atual["pico"], tracemalloc.get_traced_memory()[1])
+            if pilha:
+                externo = pilha[-1]
+                externo["pico"] = max(externo["pico"], pico)
+                externo["faltas"].update(atual["faltas"])
+                externo["figuras_acertos"] += atual["figuras_acertos"]
+                externo["figuras_faltas"] += atual["figuras_faltas"]
+            faltas = dict(atual["faltas"])
+            registro = {
+                "momento": time.time(),
+                "sessao": self.sessao,
+                "secao": nome,
+                "parede_ms": round(parede * 1000, 2),
+                "cpu_ms": round(cpu * 1000, 2),
+                "linhas": None if atual["linhas"] is None else int(atual["linhas"]),
+                "pico_mb": round((pico - atual["memoria"]) / MB, 2),
+                "cache": "falta" if faltas or atual["figuras_faltas"] else "acerto",
+                "faltas_cache": faltas,
+                "figuras_acertos": atual["figuras_acertos"],
+                "figuras_faltas": atual["figuras_faltas"],
+            }
+            if "dados_mb" in atual:
+                # Memória ocupada pelo dataset em memória (definida pela seção que o carrega)
+                registro["dados_mb"] = atual["dados_mb"]
+            self.registros.append(registro)
+            emitir(registro)
+
+    def tabela(self):
+        tabela = pd.DataFrame(self.registros, columns=["secao", "parede_ms", "cpu_ms", "linhas", "pico_mb", "cache",
+                                                       "faltas_cache"])
+        tabela["faltas_cache"] = [", ".join(f"{nome} ×{n}" for nome, n in faltas.items())
+                                  for faltas in tabela["faltas_cache"]]
+        return tabela
+
+    def exibir(self, destino=None):
+        """Painel com os registros desta execução da página."""
+        if not self.ativo:
+            return
+        with (destino or st.sidebar).expander("Desempenho por seção", expanded=True):
+            tabela = self.tabela()
+            st.dataframe(tabela, hide_index=True)
+            st.caption(f"Total: {tabela['parede_ms'].sum():.0f} ms de parede, {tabela['cpu_ms'].sum():.0f} ms de CPU. "
+                       "Pico de memória é do processo inteiro (tracemalloc).")
+
+
+def medidor_da_pagina():
+    """Medidor desta execução; ligado por ANALISE_MEDICAO=1 ou pela opção na barra lateral."""
+    ativo = st.sidebar.toggle("Medir desempenho", value=config.MEDICAO, key="medicao_ativa")
+    return Medidor(ativo)
@@ -0,0 +1,181 @@
+"""Relatório estático com os gráficos e insights da página de análise, sem Streamlit.
+
+Gera um arquivo por gráfico (PNG e/ou SVG) e um index.html com os títulos,
+as figuras e os insights. Os gráficos são desenhados em um pool de processos,
+cada processo com o seu matplotlib (backend Agg) e, recebidos uma vez na
+inicialização, o cubo e os agregados que os gráficos leem fora dele
+(histogramas, IC, origem-destino, tabelas cruzadas e dispersão), calculados
+no processo principal: os processos do pool só desenham. Com um processo ou
+poucos gráficos o desenho é feito no próprio processo principal. O cubo vem do
+mesmo cache da página (o arquivo salvo ao lado do dataset), então um
+relatório sem filtros não reagrega os dados.
+
+Uso:
+    python -m analise.relatorio --saida relatorio --formatos png svg
+    python -m analise.relatorio --inicio 2024-03-01 --fim 2024-05-31 --veiculos Auto Bike
+"""
+
+import argparse
+import datetime
+import html
+import multiprocessing
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from analise import config
+from analise.agregados import obter_cubo
+from analise.dados import CAMINHO_CSV
+from analise.filtros import Filtro
+
+
+FORMATOS = ["png", "svg"]
+# Gráficos por processo abaixo dos quais o pool (subir processos e enviar cubo e agregados) não compensa
+MINIMO_POR_PROCESSO = 4
+
+# Estado de cada processo do pool, definido em _iniciar
+_cubo = None
+_filtro = None
+_caminho = None
+
+
+def _iniciar(cubo, filtro, caminho, agregados=None):
+    global _cubo, _filtro, _caminho
+    import matplotlib
+    matplotlib.use("Agg")
+    from analise.conteudo import usar_agregados
+    _cubo, _filtro, _caminho = cubo, filtro, caminho
+    if agregados:
+        usar_agregados(agregados)
+
+
+def _renderizar(id_grafico, formatos, pasta):
+    """Desenha um gráfico do registro e grava um arquivo por formato."""
+    import matplotlib.pyplot as plt
+    from analise.conteudo import GRAFICOS
+    from analise.render import OPCOES_SAVEFIG
+
+    inicio = time.perf_counter()
+    fig = GRAFICOS[id_grafico].desenhar(_cubo, _filtro, _caminho)
+    for formato in formatos:
+        fig.savefig(os.path.join(pasta, f"{id_grafico}.{formato}"), format=formato, **OPCOES_SAVEFIG)
+    plt.close(fig)
+    return id_grafico, time.perf_counter() - inicio
+
+
+def renderizar_graficos(cubo, filtro, ids, formatos, pasta, processos, caminho=CAMINHO_CSV):
+    """Grava os gráficos `ids`; devolve o tempo de desenho de cada um."""
+    from analise.conteudo import calcular_agregados
+
+    # Mais processos que CPUs só somam o custo de subi-los
+    processos = min(processos, os.cpu_count() or 1, len(ids) // MINIMO_POR_PROCESSO)
+    if processos > 1:
+        # Calculados (ou lidos dos caches) uma vez aqui, em vez de uma vez por processo do pool
+        agregados = calcular_agregados(cubo, filtro, caminho)
+        contexto = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(processos, mp_context=contexto, initializer=_iniciar,
+                                 initargs=(cubo, filtro, caminho, agregados)) as executor:
+            return dict(executor.map(_renderizar, ids, [formatos] * len(ids), [pasta] * len(ids)))
+    _iniciar(cubo, filtro, caminho)
+    return dict(_renderizar(id_grafico, formatos, pasta) for id_grafico in ids)
+
+
+def _markdown_html(texto):
+    """Converte o markdown simples dos insights (só **negrito**) em HTML."""
+    return re.sub(r"\*\*(.+?)\*\*", r"<strong>\1</strong>", html.escape(texto))
+
+
+def _descrever_filtro(filtro):
+    if not filtro.ativo:
+        return "sem filtros"
+    partes = []
+    if filtro.inicio is not None or filtro.fim is not None:
+        partes.append(f"período {filtro.inicio or '…'} a {filtro.fim or '…'}")
+    for col, valores in filtro.categorias().items():
+        partes.append(f"{col}: {', '.join(valores) or '(nenhum)'}")
+    return "; ".join(partes)
+
+
+def gerar_html(cubo, filtro, ids, formato_imagem, caminho=CAMINHO_CSV):
+    from analise.conteudo import GRAFICOS
+
+    secoes = []
+    for id_grafico in ids:
+        grafico = GRAFICOS[id_grafico]
+        itens = grafico.insights(cubo, filtro, caminho) if grafico.insights else []
+        lista = "".join(f"<li>{_markdown_html(item)}</li>" for item in itens)
+        secoes.append(
+            f'<section><h2>{html.escape(grafico.titulo)}</h2>'
+            f'<img src="{id_grafico}.{formato_imagem}" alt="{html.escape(grafico.titulo)}">'
+            + (f"<ul>{lista}</ul>" if lista else "") + "</section>"
+        )
+    gerado = datetime.datetime.now().strftime("%Y-%m-%d %H:%M")
+    total = f"{cubo.total:,}".replace(",", ".")
+    return f"""<!DOCTYPE html>
+<html lang="pt-BR">
+<head>
+<meta charset="utf-8">
+<title>Uber Ride Analytics 2024 — Relatório</title>
+<style>
+body {{ font-family: sans-serif; margin: 2rem auto; max-width: 1200px; color: #222; }}
+main {{ display: grid; grid-template-columns: repeat(auto-fill, minmax(520px, 1fr)); gap: 1.5rem; }}
+section {{ border: 1px solid #ddd; border-radius: 6px; padding: 1rem; }}
+h2 {{ font-size: 1.05rem; margin-top: 0; }}
+img {{ width: 100%; }}
+</style>
+</head>
+<body>
+<h1>🚗 Uber Ride Analytics Dataset 2024</h1>
+<p>Gerado em {gerado} · {total} corridas · {html.escape(_descrever_filtro(filtro))} · versão dos dados {cubo.versao}</p>
+<main>
+{chr(10).join(secoes)}
+</main>
+</body>
+</html>
+"""
+
+
+def gerar_relatorio(pasta, caminho=CAMINHO_CSV, filtro=Filtro(), formatos=("png", "svg"), processos=None):
+    """Gera o relatório completo em `pasta`; devolve os tempos de desenho por gráfico."""
+    from analise.conteudo import GRAFICOS
+
+    os.makedirs(pasta, exist_ok=True)
+    cubo = obter_cubo(caminho, filtro)
+    ids = list(GRAFICOS)
+    tempos = renderizar_graficos(cubo, filtro, ids, list(formatos), pasta, processos or config.PROCESSOS, caminho)
+    with open(os.path.join(pasta, "index.html"), "w", encoding="utf-8") as f:
+        f.write(gerar_html(cubo, filtro, ids, formatos[0], caminho))
+    return tempos
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gera o relatório estático da análise de corridas.")
+    parser.add_argument("--csv", default=CAMINHO_CSV, help="CSV de origem (padrão: %(default)s)")
+    parser.add_argument("--saida", default="relatorio", help="pasta de saída (padrão: %(default)s)")
+    parser.add_argument("--formatos", nargs="+", choices=FORMATOS, default=FORMATOS)
+    parser.add_argument("--processos", type=int, default=config.PROCESSOS)
+    parser.add_argument("--inicio", type=datetime.date.fromisoformat)
+    parser.add_argument("--fim", type=datetime.date.fromisoformat)
+    parser.add_argument("--veiculos", nargs="+")
+    parser.add_argument("--pagamentos", nargs="+")
+    parser.add_argument("--status", nargs="+")
+    args = parser.parse_args(argv)
+
+    filtro = Filtro(
+        inicio=args.inicio,
+        fim=args.fim,
+        veiculos=tuple(sorted(args.veiculos)) if args.veiculos else None,
+        pagamentos=tuple(sorted(args.pagamentos)) if args.pagamentos else None,
+        status=tuple(sorted(args.status)) if args.status else None,
+    )
+    if obter_cubo(args.csv, filtro).total == 0:
+        parser.exit(1, "Nenhuma corrida atende aos filtros informados.\n")
+    inicio = time.perf_counter()
+    tempos = gerar_relatorio(args.saida, args.csv, filtro, args.formatos, args.processos)
+    print(f"{len(tempos)} gráficos em {args.saida}/ ({time.perf_counter() - inicio:.1f} s, "
+          f"{args.processos} processo(s); desenho: {sum(tempos.values()):.1f} s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Cache de figuras renderizadas, compartilhado entre reruns e sessões.
+
+As figuras são guardadas já convertidas em bytes (PNG ou SVG, ou a spec
+Vega-Lite em JSON no modo ANALISE_RENDER=vega), com chave (id do gráfico,
+versão dos dados, parâmetros). O cache é LRU com limite de
+tamanho em bytes: ao passar do limite, as figuras menos usadas saem primeiro.
+"""
+
+import io
+import json
+import threading
+from collections import OrderedDict
+
+import matplotlib.pyplot as plt
+import streamlit as st
+
+from analise import config
+from analise.medicao import registrar_figura
+
+
+LIMITE_BYTES = 64 * 1024 * 1024
+
+# Mesmos padrões usados pelo st.pyplot
+OPCOES_SAVEFIG = {"bbox_inches": "tight", "dpi": 200}
+
+
+def figura_para_bytes(fig, formato="png"):
+    if formato == "vega":
+        # Gráfico do Altair: só a spec com os agregados embutidos
+        return fig.to_json(indent=None).encode()
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format=formato, **OPCOES_SAVEFIG)
+    plt.close(fig)
+    return buffer.getvalue()
+
+
+class CacheFiguras:
+    def __init__(self, limite_bytes=LIMITE_BYTES):
+        self.limite_bytes = limite_bytes
+        self.tamanho = 0
+        self.acertos = 0
+        self.faltas = 0
+        self._itens = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._itens)
+
+    def obter(self, chave, desenhar, formato="png"):
+        """Bytes da figura da chave, desenhando com desenhar() só se não estiver em cache."""
+        chave = (chave, formato)
+        with self._lock:
+            if chave in self._itens:
+                self._itens.move_to_end(chave)
+                self.acertos += 1
+                registrar_figura(True)
+                return self._itens[chave]
+            self.faltas += 1
+        registrar_figura(False)
+        # Desenha fora do lock para não bloquear outras sessões
+        dados = figura_para_bytes(desenhar(), formato)
+        with self._lock:
+            if chave not in self._itens:
+                self._itens[chave] = dados
+                self.tamanho += len(dados)
+            while self.tamanho > self.limite_bytes and len(self._itens) > 1:
+                _, removido = self._itens.popitem(last=False)
+                self.tamanho -= len(removido)
+        return dados
+
+
+@st.cache_resource
+def cache_figuras():
+    return CacheFiguras()
+
+
+def exibir_figura(id_grafico, versao, desenhar, parametros=(), destino=st, vega=None):
+    """Mostra a figura do cache; desenhar() só roda quando a chave muda.
+
+    No modo vega, gráficos com a versão Altair (vega()) vão como spec para o
+    navegador; os demais continuam como imagem.
+    """
+    chave = (id_grafico, versao, tuple(parametros))
+    if vega is not None and config.render_vega():
+        spec = cache_figuras().obter(chave, vega, "vega")
+        destino.vega_lite_chart(json.loads(spec), width="stretch")
+        return
+    destino.image(cache_figuras().obter(chave, desenhar), width="stretch")
@@ -0,0 +1,200 @@
+"""Resumo mergeável de uma coluna numérica para o modo streaming.
+
+O HistogramaStreaming guarda, em um número fixo de bins finos, a contagem, a
+soma e a soma dos quadrados dos valores. A largura dos bins é uma potência de
+2 e os bins ficam alinhados a múltiplos dela; quando a faixa dos dados não
+cabe mais, a largura dobra (juntando bins vizinhos). Assim dois resumos sempre
+podem ser combinados sem perda além da resolução.
+
+Limites de aproximação (w = largura final do bin, no máximo 2 × faixa / bins):
+- n, mínimo, máximo, média e desvio padrão sem corte: exatos;
+- quantis: erro de no máximo w;
+- média/desvio com corte (clip) no limite: só o bin que contém o limite é
+  aproximado, então o erro da média fica abaixo de w;
+- histograma em faixas largas: cada bin fino vai inteiro para a faixa que
+  contém seu centro, então cada faixa pode ganhar ou perder no máximo os
+  valores dos bins finos que cruzam suas bordas.
+"""
+
+import numpy as np
+
+
+BINS_PADRAO = 4096
+
+
+# --------------------------
+# Bins de largura potência de 2 (compartilhados com o Histograma2D de analise/dispersao.py)
+# --------------------------
+# O estado de um eixo é (largura, inicio); os arrays guardam um valor por bin ao longo de `eixo`.
+
+def indices_bins(valores, largura, inicio, bins):
+    indices = ((valores - inicio) // largura).astype("int64")
+    return np.clip(indices, 0, bins - 1)
+
+
+def dobrar_bins(largura, inicio, bins, arrays, eixo=0):
+    """Dobra a largura juntando bins vizinhos; devolve a nova largura, o novo início e os arrays."""
+    nova_largura = largura * 2
+    novo_inicio = np.floor(inicio / nova_largura) * nova_largura
+    deslocamento = int(round((inicio - novo_inicio) / largura))
+    novos = []
+    for atual in arrays:
+        atual = np.moveaxis(atual, eixo, 0)
+        estendido = np.zeros((bins + 2,) + atual.shape[1:], dtype=atual.dtype)
+        estendido[deslocamento:deslocamento + bins] = atual
+        juntos = estendido.reshape((-1, 2) + atual.shape[1:]).sum(axis=1)
+        novo = np.zeros_like(atual)
+        novo[:len(juntos)] = juntos[:bins]
+        novos.append(np.ascontiguousarray(np.moveaxis(novo, 0, eixo)))
+    return nova_largura, novo_inicio, novos
+
+
+def acomodar_bins(largura, inicio, bins, arrays, minimo, maximo, eixo=0):
+    """Ajusta largura, início e arrays para que [minimo, maximo] caiba nos bins."""
+    if largura is None:
+        faixa = max(maximo - minimo, np.finfo("float64").eps * max(abs(maximo), 1.0))
+        largura = 2.0 ** np.ceil(np.log2(faixa / bins))
+        inicio = np.floor(minimo / largura) * largura
+    # Os bins ficam sempre alinhados a múltiplos da largura: dobra até a faixa caber...
+    while np.floor(maximo / largura) - np.floor(minimo / largura) >= bins:
+        largura, inicio, arrays = dobrar_bins(largura, inicio, bins, arrays, eixo)
+    # ...e desloca a janela para baixo se o novo mínimo ficou antes do início
+    novo_inicio = np.floor(minimo / largura) * largura
+    if novo_inicio < inicio:
+        deslocamento = int(round((inicio - novo_inicio) / largura))
+        deslocados = []
+        for atual in arrays:
+            atual = np.moveaxis(atual, eixo, 0)
+            novo = np.zeros_like(atual)
+            novo[deslocamento:] = atual[:bins - deslocamento]
+            deslocados.append(np.ascontiguousarray(np.moveaxis(novo, 0, eixo)))
+        arrays, inicio = deslocados, novo_inicio
+    return largura, inicio, arrays
+
+
+class HistogramaStreaming:
+    def __init__(self, bins=BINS_PADRAO):
+        self.bins = bins
+        self.largura = None
+        self.inicio = None
+        self.contagens = np.zeros(bins, dtype="int64")
+        self.somas = np.zeros(bins)
+        self.somas2 = np.zeros(bins)
+        self.minimo = np.inf
+        self.maximo = -np.inf
+
+    @property
+    def n(self):
+        return int(self.contagens.sum())
+
+    @property
+    def fim(self):
+        return self.inicio + self.bins * self.largura
+
+    # --------------------------
+    # Construção
+    # --------------------------
+
+    def _dobrar(self):
+        self.largura, self.inicio, (self.contagens, self.somas, self.somas2) = dobrar_bins(
+            self.largura, self.inicio, self.bins, [self.contagens, self.somas, self.somas2])
+
+    def _acomodar(self, minimo, maximo):
+        minimo, maximo = min(minimo, self.minimo), max(maximo, self.maximo)
+        self.largura, self.inicio, (self.contagens, self.somas, self.somas2) = acomodar_bins(
+            self.largura, self.inicio, self.bins, [self.contagens, self.somas, self.somas2], minimo, maximo)
+
+    def _indices(self, valores):
+        return indices_bins(valores, self.largura, self.inicio, self.bins)
+
+    def adicionar(self, valores):
+        """Inclui um bloco de valores (NaN são ignorados)."""
+        valores = np.asarray(valores, dtype="float64")
+        valores = valores[~np.isnan(valores)]
+        if len(valores) == 0:
+            return self
+        minimo, maximo = valores.min(), valores.max()
+        self._acomodar(minimo, maximo)
+        indices = self._indices(valores)
+        self.contagens += np.bincount(indices, minlength=self.bins)
+        self.somas += np.bincount(indices, weights=valores, minlength=self.bins)
+        self.somas2 += np.bincount(indices, weights=valores * valores, minlength=self.bins)
+        self.minimo = min(self.minimo, minimo)
+        self.maximo = max(self.maximo, maximo)
+        return self
+
+    def combinar(self, outro):
+        """Soma outro resumo a este (os bins de larguras potência de 2 se encaixam)."""
+        if outro.largura is None:
+            return self
+        if self.largura is None:
+            self.largura, self.inicio = outro.largura, outro.inicio
+        while self.largura < outro.largura:
+            self._dobrar()
+        self._acomodar(outro.minimo, outro.maximo)
+        ocupados = np.flatnonzero(outro.contagens)
+        centros = outro.inicio + (ocupados + 0.5) * outro.largura
+        indices = self._indices(centros)
+        np.add.at(self.contagens, indices, outro.contagens[ocupados])
+        np.add.at(self.somas, indices, outro.somas[ocupados])
+        np.add.at(self.somas2, indices, outro.somas2[ocupados])
+        self.minimo = min(self.minimo, outro.minimo)
+        self.maximo = max(self.maximo, outro.maximo)
+        return self
+
+    # --------------------------
+    # Consultas
+    # --------------------------
+
+    @property
+    def bordas(self):
+        return self.inicio + np.arange(self.bins + 1) * self.largura
+
+    @property
+    def centros(self):
+        return self.inicio + (np.arange(self.bins) + 0.5) * self.largura
+
+    def media(self):
+        return self.somas.sum() / self.n if self.n else np.nan
+
+    def quantil(self, q):
+        """Quantil aproximado (erro máximo de uma largura de bin)."""
+        n = self.n
+        if n == 0:
+            return np.nan
+        posicao = q * (n - 1)
+        acumulado = np.cumsum(self.contagens)
+        indice = int(np.searchsorted(acumulado, posicao, side="right"))
+        indice = min(indice, self.bins - 1)
+        antes = acumulado[indice] - self.contagens[indice]
+        fracao = (posicao - antes + 0.5) / max(self.contagens[indice], 1)
+        valor = self.inicio + (indice + fracao) * self.largura
+        return float(np.clip(valor, self.minimo, self.maximo))
+
+    def media_std_cortada(self, limite):
+        """Média e desvio padrão (ddof=1) com clip(upper=limite), como SerieOrdenada."""
+        n = self.n
+        indice = int(np.clip((limite - self.inicio) // self.largura, 0, self.bins - 1))
+        # Bins abaixo do limite entram inteiros; o bin do limite entra pela média dele
+        soma = self.somas[:indice].sum()
+        soma2 = self.somas2[:indice].sum()
+        restante = n - self.contagens[:indice].sum()
+        contagem_bin = self.contagens[indice]
+        if contagem_bin and self.somas[indice] / contagem_bin <= limite:
+            soma += self.somas[indice]
+            soma2 += self.somas2[indice]
+            restante -= contagem_bin
+        soma += restante * limite
+        soma2 += restante * limite * limite
+        media = soma / n
+        if n < 2:
+            return media, np.nan
+        variancia = max(soma2 - n * media * media, 0.0) / (n - 1)
+        return media, np.sqrt(variancia)
+
+    def histograma(self, bins):
+        """Contagens e bordas em `bins` faixas iguais entre o mínimo e o máximo."""
+        bordas = np.linspace(self.minimo, self.maximo, bins + 1)
+        centros = np.clip(self.centros, self.minimo, self.maximo)
+        contagens, _ = np.histogram(centros, bins=bordas, weights=self.contagens)
+        return contagens.astype("int64"), bordas
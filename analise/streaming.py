@@ -0,0 +1,179 @@
+"""Modo streaming: monta o cubo lendo o CSV em blocos, sem manter as linhas.
+
+Cada bloco é agregado e somado a um AcumuladorCubo, então o pico de memória
+depende do tamanho do bloco (config.TAMANHO_BLOCO), não do tamanho do arquivo.
+O acumulador sem filtros fica salvo ao lado do CSV junto com a Marca de até
+onde o arquivo foi lido (analise/incremental.py): quando o CSV só ganha linhas
+no fim, apenas o trecho novo é agregado e combinado ao estado salvo.
+
+Contagens, somas de cancelamentos, médias e a classificação das variáveis são
+exatas. Medianas, quartis, boxplots, histogramas e o corte por percentil do IC vêm de
+HistogramaStreaming e seguem os limites de aproximação descritos em
+analise/sketches.py.
+"""
+
+import os
+
+import pandas as pd
+
+from analise import config
+from analise.agregados import (
+    AVALIACOES, METRICAS, Cubo, agregar_celulas, contar_categorias, somar_celulas,
+)
+from analise.boxplot import EstatisticasBoxplot
+from analise.classificacao import tabela_tipos, tipo_variavel, valores_inteiros
+from analise.dados import CAMINHO_CSV, COLUNAS_CATEGORICAS, ESQUEMA, converter_datas
+from analise.derivadas import SEM_VALOR, derivar, rotulo_mes
+from analise.filtros import SEM_FILTRO, mascara_linhas
+from analise.incremental import abrir_trecho, acrescimo, avancar, fim_linhas, marca_inicial
+from analise.sketches import HistogramaStreaming
+
+
+class AcumuladorCubo:
+    def __init__(self):
+        self.total = 0
+        self.celulas = None
+        self.avaliacoes = {}
+        self.sketches = {m: HistogramaStreaming() for m in METRICAS}
+        # Um resumo de Ride Distance por mês, para a mediana mensal
+        self.distancia_mes = {}
+        # Classificação: se a coluna é numérica e se todos os valores vistos são inteiros
+        self.numericas = {}
+        self.inteiras = {}
+
+    def adicionar(self, bloco):
+        """Agrega um bloco de linhas (já com o esquema do CSV aplicado)."""
+        bloco = converter_datas(bloco)
+        self.total += len(bloco)
+
+        derivadas = derivar(bloco)
+        celulas = agregar_celulas(bloco, derivadas)
+        self.celulas = celulas if self.celulas is None else somar_celulas(self.celulas, celulas)
+
+        for col in AVALIACOES:
+            contagens = contar_categorias(bloco[col])
+            self.avaliacoes[col] = contagens if col not in self.avaliacoes else self.avaliacoes[col].add(contagens, fill_value=0)
+
+        for m in METRICAS:
+            self.sketches[m].adicionar(bloco[m].to_numpy(dtype="float64"))
+
+        for mes, valores in bloco["Ride Distance"].groupby(derivadas["AnoMes"]):
+            self.distancia_mes.setdefault(mes, HistogramaStreaming()).adicionar(valores.to_numpy(dtype="float64"))
+
+        for col in bloco.columns:
+            numerica = pd.api.types.is_numeric_dtype(bloco[col])
+            self.numericas[col] = numerica
+            if numerica and self.inteiras.get(col, True):
+                self.inteiras[col] = valores_inteiros(bloco[col])
+        return self
+
+    def combinar(self, outro):
+        """Soma o acumulador de outra parte dos dados a este."""
+        self.total += outro.total
+        if outro.celulas is not None:
+            self.celulas = outro.celulas if self.celulas is None else somar_celulas(self.celulas, outro.celulas)
+        for col, contagens in outro.avaliacoes.items():
+            self.avaliacoes[col] = contagens if col not in self.avaliacoes else self.avaliacoes[col].add(contagens, fill_value=0)
+        for m, sketch in outro.sketches.items():
+            self.sketches[m].combinar(sketch)
+        for mes, sketch in outro.distancia_mes.items():
+            self.distancia_mes.setdefault(mes, HistogramaStreaming()).combinar(sketch)
+        for col, numerica in outro.numericas.items():
+            self.numericas[col] = numerica
+            if numerica:
+                self.inteiras[col] = self.inteiras.get(col, True) and outro.inteiras.get(col, True)
+        return self
+
+    def finalizar(self, versao):
+        """Converte o estado acumulado em um Cubo, como o do modo em memória."""
+        celulas = self.celulas.copy()
+        for col in COLUNAS_CATEGORICAS + ["Status Simplificado"]:
+            celulas[col] = celulas[col].astype("category")
+
+        avaliacoes = {
+            col: contagens.astype("int64").sort_values(ascending=False).rename_axis(col).rename("count")
+            for col, contagens in self.avaliacoes.items()
+        }
+
+        meses = sorted(mes for mes in self.distancia_mes if mes != SEM_VALOR)
+        distancia_mes = pd.DataFrame({
+            "AnoMes": rotulo_mes(meses),
+            "mean": [self.distancia_mes[mes].media() for mes in meses],
+            "median": [self.distancia_mes[mes].quantil(0.5) for mes in meses],
+        })
+
+        resumo = {m: EstatisticasBoxplot.de_sketch(s) for m, s in self.sketches.items()}
+
+        classificacao = tabela_tipos({
+            col: tipo_variavel(col, numerica, numerica and self.inteiras.get(col, True))
+            for col, numerica in self.numericas.items()
+        })
+
+        return Cubo(versao, self.total, "streaming", celulas, avaliacoes, distancia_mes, resumo,
+                    sketches=self.sketches, classificacao=classificacao)
+
+
+def ler_blocos(caminho, tamanho_bloco=None, trecho=None):
+    """Itera sobre o CSV (ou só o trecho (inicio, fim) em bytes) em blocos de linhas, com o esquema declarado."""
+    tamanho_bloco = tamanho_bloco or config.TAMANHO_BLOCO
+    if trecho is None:
+        yield from pd.read_csv(caminho, dtype=ESQUEMA, chunksize=tamanho_bloco)
+        return
+    with abrir_trecho(caminho, *trecho) as arquivo:
+        yield from pd.read_csv(arquivo, dtype=ESQUEMA, chunksize=tamanho_bloco)
+
+
+def caminho_estado(caminho=CAMINHO_CSV):
+    return os.path.splitext(caminho)[0] + ".streaming.pkl"
+
+
+def _ler_estado(destino):
+    try:
+        marca, acumulador, versao = pd.read_pickle(destino)
+    except (OSError, EOFError, AttributeError, ValueError, TypeError):
+        return None
+    return marca, acumulador, versao
+
+
+def _salvar_estado(marca, acumulador, versao, destino):
+    temporario = destino + ".tmp"
+    try:
+        pd.to_pickle((marca, acumulador, versao), temporario)
+        os.replace(temporario, destino)
+    except OSError:
+        pass
+
+
+def atualizar_acumulador(caminho, versao, tamanho_bloco=None):
+    """Acumulador de todas as linhas completas do CSV, agregando só as que ainda não foram vistas."""
+    destino = caminho_estado(caminho)
+    estado = _ler_estado(destino)
+    if estado and estado[2] == versao:
+        return estado[1]
+    trecho = acrescimo(caminho, estado[0]) if estado else None
+    if trecho is None:
+        # Primeira leitura ou conteúdo anterior reescrito: refaz do início
+        marca, acumulador = marca_inicial(caminho), AcumuladorCubo()
+        trecho = (marca.offset, fim_linhas(caminho))
+    else:
+        marca, acumulador, _ = estado
+    inicio, fim = trecho
+    if fim > inicio or estado is None:
+        # O trecho novo é agregado à parte e só depois combinado ao estado salvo
+        novo = AcumuladorCubo()
+        for bloco in ler_blocos(caminho, tamanho_bloco, trecho):
+            novo.adicionar(bloco)
+        acumulador.combinar(novo)
+        marca = avancar(caminho, marca, fim, novo.total)
+        _salvar_estado(marca, acumulador, versao, destino)
+    return acumulador
+
+
+def construir_cubo_streaming(caminho, versao, tamanho_bloco=None, filtro=SEM_FILTRO):
+    if not filtro.ativo:
+        return atualizar_acumulador(caminho, versao, tamanho_bloco).finalizar(versao)
+    acumulador = AcumuladorCubo()
+    for bloco in ler_blocos(caminho, tamanho_bloco):
+        bloco = converter_datas(bloco)
+        acumulador.adicionar(bloco[mascara_linhas(bloco, filtro)])
+    return acumulador.finalizar(versao)
@@ -0,0 +1,243 @@
+"""Harness de desempenho da página de análise, sem Streamlit.
+
+Mede cada etapa do pipeline da página sobre os datasets sintéticos de
+benchmarks/gerar_dados.py:
+
+- carga: CSV → sidecar Parquet → dataset compartilhado e compacto
+  (carregar_dados), colunas derivadas e índices de filtro, como na página
+- classificacao: classificação das variáveis
+- agregacao: construção do cubo (backend e modo configurados)
+- agregados: o que os gráficos leem fora do cubo (histogramas, séries do IC,
+  matrizes origem-destino, tabelas cruzadas e dispersão)
+- render: só o desenho dos gráficos do registro em PNG (matplotlib, Agg),
+  com todos os dados já em cache
+- ic: IC t de Student das métricas, IC por grupo e bootstrap
+
+Antes de cada repetição os arquivos derivados e os caches do Streamlit são
+apagados, então toda etapa mede o caminho sem cache. O resultado (mínimo e
+mediana de cada etapa, pico de RSS, memória do DataFrame antes e depois da
+compactação, versões e o commit atual) vai para
+benchmarks/resultados/<commit>_<escala>_<modo>.json, e --comparar mostra a
+razão entre dois resultados.
+
+Uso:
+    python benchmarks/gerar_dados.py --escalas 150k 1.5M
+    python benchmarks/executar.py --escalas 150k 1.5M --repeticoes 3
+    python benchmarks/executar.py --comparar resultados/a_150k_memoria.json resultados/b_150k_memoria.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import matplotlib  # noqa: E402
+matplotlib.use("Agg")
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+import streamlit as st  # noqa: E402
+
+from analise import config  # noqa: E402
+from benchmarks.gerar_dados import ESCALAS, PASTA_DADOS, caminho_escala  # noqa: E402
+
+
+PASTA_RESULTADOS = os.path.join(RAIZ, "benchmarks", "resultados")
+ETAPAS = ["carga", "classificacao", "agregacao", "agregados", "render", "ic"]
+
+
+def _limpar(caminho):
+    """Apaga sidecar, cubo e estado salvos e os caches do Streamlit (próxima etapa roda sem cache)."""
+    from analise.agregados import caminho_cubo
+    from analise.dados import caminho_sidecar
+    from analise.streaming import caminho_estado
+    for derivado in (caminho_sidecar(caminho), caminho_cubo(caminho), caminho_estado(caminho)):
+        if os.path.exists(derivado):
+            os.remove(derivado)
+    st.cache_data.clear()
+    st.cache_resource.clear()
+
+
+def executar_etapas(caminho):
+    """Tempo de parede (s) de cada etapa sobre o dataset em `caminho`."""
+    import matplotlib.pyplot as plt
+    from analise.agregados import _construir_cubo
+    from analise.bootstrap import indicadores_bootstrap
+    from analise.classificacao import classificar_variaveis
+    from analise.compactacao import totais
+    from analise.conteudo import CONF_PADRAO, GRAFICOS, PERCENTIL_PADRAO, calcular_agregados
+    from analise.dados import carregar_dados, relatorio_memoria_dados, versao_arquivo
+    from analise.derivadas import obter_derivadas
+    from analise.filtros import SEM_FILTRO, indice_filtros
+    from analise.intervalos import DIMENSOES_IC, ic_por_grupo, indicadores_ic, series_ic
+    from analise.render import figura_para_bytes
+
+    tempos = {}
+    inicio = time.perf_counter()
+    versao = versao_arquivo(caminho)
+    df, memoria = None, None
+    if not config.modo_streaming():
+        # Os mesmos caches que a página monta na primeira visita
+        df = carregar_dados(caminho, None, versao)
+        obter_derivadas(caminho)
+        indice_filtros(caminho)
+        if config.COMPACTAR:
+            memoria = totais(relatorio_memoria_dados(caminho))
+    tempos["carga"] = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    if df is not None:
+        classificar_variaveis(df)
+    tempos["classificacao"] = time.perf_counter() - inicio
+    del df
+
+    inicio = time.perf_counter()
+    cubo = _construir_cubo(caminho, versao, config.MODO, config.BACKEND, SEM_FILTRO)
+    tempos["agregacao"] = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    calcular_agregados(cubo, SEM_FILTRO, caminho)
+    tempos["agregados"] = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    for grafico in GRAFICOS.values():
+        figura_para_bytes(grafico.desenhar(cubo, SEM_FILTRO, caminho))
+    plt.close("all")
+    tempos["render"] = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    indicadores_ic(series_ic(cubo, SEM_FILTRO, caminho), CONF_PADRAO, PERCENTIL_PADRAO)
+    for dimensao in DIMENSOES_IC.values():
+        ic_por_grupo(cubo, [dimensao], CONF_PADRAO)
+    indicadores_bootstrap(CONF_PADRAO, PERCENTIL_PADRAO, "Bootstrap BCa")
+    tempos["ic"] = time.perf_counter() - inicio
+    return tempos, cubo.total, memoria
+
+
+def medir_escala(escala, repeticoes, pasta_dados=PASTA_DADOS):
+    caminho = caminho_escala(escala, pasta_dados)
+    if not os.path.exists(caminho):
+        raise SystemExit(f"Dataset {caminho} não existe; gere com: python benchmarks/gerar_dados.py --escalas {escala}")
+    pasta_original = os.getcwd()
+    # As funções da página usam o caminho padrão (ncr_ride_bookings.csv na pasta atual)
+    os.chdir(os.path.dirname(caminho))
+    try:
+        execucoes = []
+        for _ in range(repeticoes):
+            _limpar(os.path.basename(caminho))
+            tempos, linhas, memoria = executar_etapas(os.path.basename(caminho))
+            execucoes.append(tempos)
+    finally:
+        os.chdir(pasta_original)
+    return {
+        "escala": escala,
+        "linhas": int(linhas),
+        "repeticoes": repeticoes,
+        # MB antes e depois da compactação (None no modo streaming ou com a compactação desligada)
+        "memoria_mb": memoria,
+        "etapas": {
+            etapa: {
+                "min_s": round(min(e[etapa] for e in execucoes), 4),
+                "mediana_s": round(statistics.median(e[etapa] for e in execucoes), 4),
+            }
+            for etapa in ETAPAS
+        },
+    }
+
+
+def _commit():
+    try:
+        saida = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=RAIZ, capture_output=True, text=True,
+                               check=True)
+        alterado = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=RAIZ,
+                                  capture_output=True, text=True).stdout.strip()
+        return saida.stdout.strip() + ("-sujo" if alterado else "")
+    except (OSError, subprocess.CalledProcessError):
+        return "desconhecido"
+
+
+def ambiente():
+    return {
+        "commit": _commit(),
+        "data": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "cpus": os.cpu_count(),
+        "modo": config.MODO,
+        "backend": config.BACKEND,
+        "processos": config.PROCESSOS,
+        "compactar": config.COMPACTAR,
+    }
+
+
+def salvar(resultado, pasta=PASTA_RESULTADOS):
+    os.makedirs(pasta, exist_ok=True)
+    nome = f"{resultado['ambiente']['commit']}_{resultado['escala']}_{resultado['ambiente']['modo']}.json"
+    destino = os.path.join(pasta, nome)
+    with open(destino, "w", encoding="utf-8") as f:
+        json.dump(resultado, f, indent=2, ensure_ascii=False)
+    return destino
+
+
+def imprimir(resultado):
+    print(f"{resultado['escala']} ({resultado['linhas']:,} linhas, {resultado['repeticoes']} repetição(ões), "
+          f"pico RSS {resultado['pico_rss_mb']:.0f} MB)")
+    memoria = resultado.get("memoria_mb")
+    if memoria:
+        print(f"  DataFrame {memoria['mb_antes']:.1f} MB → {memoria['mb_depois']:.1f} MB compacto "
+              f"({memoria['reducao_pct']:.1f}% a menos)")
+    for etapa, valores in resultado["etapas"].items():
+        print(f"  {etapa:<14} min {valores['min_s']:>8.3f} s   mediana {valores['mediana_s']:>8.3f} s")
+
+
+def comparar(caminho_a, caminho_b):
+    """Mostra a razão B/A das medianas de cada etapa (< 1 = B mais rápido)."""
+    with open(caminho_a, encoding="utf-8") as f:
+        a = json.load(f)
+    with open(caminho_b, encoding="utf-8") as f:
+        b = json.load(f)
+    print(f"A = {a['ambiente']['commit']} ({a['escala']}), B = {b['ambiente']['commit']} ({b['escala']})")
+    print(f"  {'etapa':<14} {'A (s)':>9} {'B (s)':>9} {'B/A':>7}")
+    for etapa in ETAPAS:
+        if etapa not in a["etapas"] or etapa not in b["etapas"]:
+            # Resultado gravado antes de a etapa existir
+            continue
+        ta, tb = a["etapas"][etapa]["mediana_s"], b["etapas"][etapa]["mediana_s"]
+        razao = tb / ta if ta > 0 else float("nan")
+        print(f"  {etapa:<14} {ta:>9.3f} {tb:>9.3f} {razao:>7.2f}")
+    if a.get("memoria_mb") and b.get("memoria_mb"):
+        ma, mb = a["memoria_mb"]["mb_depois"], b["memoria_mb"]["mb_depois"]
+        print(f"  {'memória (MB)':<14} {ma:>9.1f} {mb:>9.1f} {mb / ma:>7.2f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--escalas", nargs="+", choices=list(ESCALAS), default=["150k"])
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--dados", default=PASTA_DADOS, help="pasta base dos datasets (padrão: %(default)s)")
+    parser.add_argument("--resultados", default=PASTA_RESULTADOS, help="pasta dos resultados (padrão: %(default)s)")
+    parser.add_argument("--comparar", nargs=2, metavar=("A.json", "B.json"))
+    args = parser.parse_args(argv)
+
+    if args.comparar:
+        comparar(*args.comparar)
+        return
+    for escala in args.escalas:
+        resultado = medir_escala(escala, args.repeticoes, args.dados)
+        resultado["pico_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        resultado["ambiente"] = ambiente()
+        imprimir(resultado)
+        print(f"  → {salvar(resultado, args.resultados)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""Gerador sintético do dataset de corridas (mesmas colunas do ncr_ride_bookings.csv).
+
+Reproduz o formato e as distribuições que a página usa: status das reservas,
+tipos de veículo, data e hora (com picos de manhã e no fim da tarde), VTAT e
+CTAT, valor e distância só nas corridas concluídas ou incompletas,
+avaliações só nas concluídas, motivos de cancelamento e método de pagamento.
+É determinístico para uma semente: cada bloco de linhas usa um gerador
+derivado de uma SeedSequence, e o CSV é gravado bloco a bloco (15M linhas
+não precisam caber em memória de uma vez).
+
+Uso:
+    python benchmarks/gerar_dados.py --escalas 150k 1.5M
+    python benchmarks/gerar_dados.py --linhas 50000 --saida /tmp/dados
+
+Cada escala vai para <saida>/<escala>/ncr_ride_bookings.csv, o nome que a
+página e o harness (benchmarks/executar.py) esperam.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from analise.dados import CAMINHO_CSV, ESQUEMA  # noqa: E402
+
+
+ESCALAS = {"150k": 150_000, "1.5M": 1_500_000, "15M": 15_000_000}
+PASTA_DADOS = os.path.join(RAIZ, "benchmarks", "dados")
+SEMENTE = 2024
+LINHAS_BLOCO = 500_000
+
+STATUS = {"Completed": 0.62, "Cancelled by Driver": 0.18, "No Driver Found": 0.07,
+          "Cancelled by Customer": 0.07, "Incomplete": 0.06}
+VEICULOS = {"Auto": 0.25, "Go Mini": 0.20, "Go Sedan": 0.18, "Bike": 0.15, "Premier Sedan": 0.12,
+            "eBike": 0.07, "Uber XL": 0.03}
+PAGAMENTOS = {"UPI": 0.45, "Cash": 0.25, "Uber Wallet": 0.12, "Credit Card": 0.10, "Debit Card": 0.08}
+MOTIVOS_CLIENTE = ["Wrong Address", "Change of plans", "Driver is not moving towards pickup location",
+                   "Driver asked to cancel", "AC is not working"]
+MOTIVOS_MOTORISTA = ["Personal & Car related issues", "Customer related issue",
+                     "More than permitted people in there", "The customer was coughing/sick"]
+MOTIVOS_INCOMPLETA = ["Vehicle Breakdown", "Other Issue", "Customer Demand"]
+LOCAIS = np.array([f"Local {i:03d}" for i in range(176)])
+
+# Peso de cada hora do dia: base noturna baixa e picos às 9h e às 18h
+PESOS_HORA = 0.3 + np.exp(-0.5 * ((np.arange(24) - 9) / 1.5) ** 2) + 1.3 * np.exp(-0.5 * ((np.arange(24) - 18) / 2) ** 2)
+PESOS_HORA /= PESOS_HORA.sum()
+
+
+def _sortear(rng, opcoes, n):
+    return rng.choice(list(opcoes), n, p=list(opcoes.values()))
+
+
+def _avaliacoes(rng, n, media):
+    return np.round(np.clip(rng.normal(media, 0.35, n), 3.0, 5.0), 1)
+
+
+def gerar_bloco(n, rng, primeiro_id=0):
+    """DataFrame com n corridas sintéticas, nas colunas e na ordem do CSV original."""
+    status = _sortear(rng, STATUS, n)
+    concluida = status == "Completed"
+    incompleta = status == "Incomplete"
+    com_corrida = concluida | incompleta
+    cancel_cliente = status == "Cancelled by Customer"
+    cancel_motorista = status == "Cancelled by Driver"
+    sem_motorista = status == "No Driver Found"
+
+    datas = np.datetime64("2024-01-01") + rng.integers(0, 366, n).astype("timedelta64[D]")
+    segundos = rng.choice(24, n, p=PESOS_HORA) * 3600 + rng.integers(0, 3600, n)
+    horas = pd.to_datetime(segundos, unit="s").strftime("%H:%M:%S")
+    distancia = np.round(rng.uniform(1, 50, n), 2)
+    # Valor cresce com a distância, com cauda longa (outliers)
+    valor = np.round(50 + distancia * rng.lognormal(2.4, 0.45, n))
+
+    def onde(mascara, valores):
+        return np.where(mascara, valores, np.nan)
+
+    def texto_onde(mascara, valores):
+        return np.where(mascara, valores, None)
+
+    ids = np.arange(primeiro_id, primeiro_id + n)
+    return pd.DataFrame({
+        "Date": pd.DatetimeIndex(datas).strftime("%Y-%m-%d"),
+        "Time": horas,
+        "Booking ID": np.char.add('"CNR', np.char.add(np.char.zfill(ids.astype(str), 8), '"')),
+        "Booking Status": status,
+        "Customer ID": np.char.add('"CID', np.char.add(np.char.zfill(rng.integers(0, 10**7, n).astype(str), 7), '"')),
+        "Vehicle Type": _sortear(rng, VEICULOS, n),
+        "Pickup Location": rng.choice(LOCAIS, n),
+        "Drop Location": rng.choice(LOCAIS, n),
+        "Avg VTAT": onde(~sem_motorista, np.round(np.clip(rng.gamma(4, 2, n), 2, 20), 1)),
+        "Avg CTAT": onde(com_corrida, np.round(rng.uniform(10, 45, n), 1)),
+        "Cancelled Rides by Customer": onde(cancel_cliente, 1.0),
+        "Reason for cancelling by Customer": texto_onde(cancel_cliente, rng.choice(MOTIVOS_CLIENTE, n)),
+        "Cancelled Rides by Driver": onde(cancel_motorista, 1.0),
+        "Driver Cancellation Reason": texto_onde(cancel_motorista, rng.choice(MOTIVOS_MOTORISTA, n)),
+        "Incomplete Rides": onde(incompleta, 1.0),
+        "Incomplete Rides Reason": texto_onde(incompleta, rng.choice(MOTIVOS_INCOMPLETA, n)),
+        "Booking Value": onde(com_corrida, valor),
+        "Ride Distance": onde(com_corrida, distancia),
+        "Driver Ratings": onde(concluida, _avaliacoes(rng, n, 4.25)),
+        "Customer Rating": onde(concluida, _avaliacoes(rng, n, 4.4)),
+        "Payment Method": texto_onde(com_corrida, _sortear(rng, PAGAMENTOS, n)),
+    }, columns=list(ESQUEMA))
+
+
+def gerar(linhas, caminho, semente=SEMENTE, linhas_bloco=LINHAS_BLOCO):
+    """Grava um CSV com `linhas` corridas sintéticas, bloco a bloco."""
+    os.makedirs(os.path.dirname(os.path.abspath(caminho)), exist_ok=True)
+    quantidades = [min(linhas_bloco, linhas - inicio) for inicio in range(0, linhas, linhas_bloco)]
+    sementes = np.random.SeedSequence(semente).spawn(len(quantidades))
+    temporario = caminho + ".tmp"
+    primeiro_id = 0
+    with open(temporario, "w", encoding="utf-8", newline="") as f:
+        for i, (n, s) in enumerate(zip(quantidades, sementes)):
+            gerar_bloco(n, np.random.default_rng(s), primeiro_id).to_csv(f, index=False, header=i == 0)
+            primeiro_id += n
+    os.replace(temporario, caminho)
+    return caminho
+
+
+def caminho_escala(escala, pasta=PASTA_DADOS):
+    return os.path.join(pasta, escala, CAMINHO_CSV)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--escalas", nargs="+", choices=list(ESCALAS), default=["150k"])
+    parser.add_argument("--linhas", type=int, help="tamanho arbitrário (grava em <saida>/<linhas>/)")
+    parser.add_argument("--saida", default=PASTA_DADOS, help="pasta base (padrão: %(default)s)")
+    parser.add_argument("--semente", type=int, default=SEMENTE)
+    args = parser.parse_args(argv)
+
+    tamanhos = {str(args.linhas): args.linhas} if args.linhas else {e: ESCALAS[e] for e in args.escalas}
+    for escala, linhas in tamanhos.items():
+        inicio = time.perf_counter()
+        caminho = gerar(linhas, caminho_escala(escala, args.saida), args.semente)
+        print(f"{escala}: {linhas:,} linhas em {caminho} ({os.path.getsize(caminho) / 1024**2:.0f} MB, "
+              f"{time.perf_counter() - inicio:.1f} s)")
+
+
+if __name__ == "__main__":
+    main()
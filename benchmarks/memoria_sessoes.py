@@ -0,0 +1,78 @@
+"""Memória por sessão da página de análise.
+
+Abre várias sessões da página no mesmo processo (streamlit.testing.AppTest,
+que usa os mesmos caches st.cache_data/st.cache_resource do servidor) e mantém
+todas vivas. A cada nova sessão mede o RSS do processo, a memória Python
+retida e o pico durante a execução da página (tracemalloc, que também
+acompanha os buffers do NumPy). Com o dataset compartilhado, a memória retida
+por sessão fica plana.
+
+Uso (na pasta do CSV):
+    python benchmarks/memoria_sessoes.py --sessoes 8
+"""
+
+import argparse
+import gc
+import os
+import sys
+import tracemalloc
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+PAGINA = os.path.join(RAIZ, "pages", "4_Analise.py")
+MB = 1024 * 1024
+
+
+def rss_mb():
+    """RSS atual do processo (Linux); em outros sistemas, o pico via resource."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / MB
+    except OSError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def medir(sessoes):
+    tracemalloc.start()
+    base_rss, base_py = rss_mb(), tracemalloc.get_traced_memory()[0] / MB
+    abertas = []
+    linhas = []
+    for i in range(1, sessoes + 1):
+        gc.collect()
+        antes = tracemalloc.get_traced_memory()[0] / MB
+        tracemalloc.reset_peak()
+        app = AppTest.from_file(PAGINA, default_timeout=600)
+        app.run()
+        if app.exception:
+            raise RuntimeError(app.exception)
+        abertas.append(app)
+        gc.collect()
+        atual, pico = (m / MB for m in tracemalloc.get_traced_memory())
+        linhas.append({
+            "sessao": i,
+            "rss_mb": rss_mb() - base_rss,
+            "retida_mb": atual - base_py,
+            "delta_mb": atual - antes,
+            "pico_execucao_mb": pico - antes,
+        })
+    tracemalloc.stop()
+    return linhas
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessoes", type=int, default=6)
+    args = parser.parse_args(argv)
+
+    print(f"{'sessão':>6} {'RSS (MB)':>9} {'retida (MB)':>12} {'Δ sessão (MB)':>14} {'pico na execução (MB)':>22}")
+    for linha in medir(args.sessoes):
+        print(f"{linha['sessao']:>6} {linha['rss_mb']:>9.1f} {linha['retida_mb']:>12.1f} "
+              f"{linha['delta_mb']:>14.1f} {linha['pico_execucao_mb']:>22.1f}")
+
+
+if __name__ == "__main__":
+    main()
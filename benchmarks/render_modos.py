@@ -0,0 +1,61 @@
+"""Custo no servidor e tamanho enviado de cada gráfico, matplotlib × Vega-Lite.
+
+Para cada gráfico do registro (analise.conteudo.GRAFICOS) mede o tempo de CPU
+para gerar o que vai ao navegador (PNG do matplotlib ou spec Vega-Lite em
+JSON, sem o cache de figuras) e o tamanho em bytes desse conteúdo.
+
+Uso (na pasta do CSV):
+    python benchmarks/render_modos.py --repeticoes 3
+"""
+
+import argparse
+import os
+import sys
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import matplotlib  # noqa: E402
+matplotlib.use("Agg")
+
+from analise.agregados import obter_cubo  # noqa: E402
+from analise.conteudo import GRAFICOS  # noqa: E402
+from analise.dados import CAMINHO_CSV  # noqa: E402
+from analise.filtros import SEM_FILTRO  # noqa: E402
+from analise.render import figura_para_bytes  # noqa: E402
+
+
+def medir(desenhar, formato, repeticoes):
+    """Menor tempo de CPU (s) entre as repetições e o tamanho gerado (bytes)."""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.process_time()
+        dados = figura_para_bytes(desenhar(), formato)
+        tempos.append(time.process_time() - inicio)
+    return min(tempos), len(dados)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeticoes", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    cubo = obter_cubo()
+    print(f"{'gráfico':<24} {'PNG (ms)':>9} {'PNG (KB)':>9} {'Vega (ms)':>10} {'Vega (KB)':>10}")
+    totais = [0.0, 0, 0.0, 0]
+    for id_grafico, grafico in GRAFICOS.items():
+        png = medir(lambda: grafico.desenhar(cubo, SEM_FILTRO, CAMINHO_CSV), "png", args.repeticoes)
+        spec = (medir(lambda: grafico.vega(cubo, SEM_FILTRO, CAMINHO_CSV), "vega", args.repeticoes)
+                if grafico.vega else None)
+        # Gráfico sem spec Vega: soma 0 no total e aparece como "—"
+        linha = [png[0], png[1], *(spec or (0.0, 0))]
+        totais = [t + v for t, v in zip(totais, linha)]
+        vega = f"{linha[2] * 1000:>10.0f} {linha[3] / 1024:>10.1f}" if spec else f"{'—':>10} {'—':>10}"
+        print(f"{id_grafico:<24} {linha[0] * 1000:>9.0f} {linha[1] / 1024:>9.1f} {vega}")
+    print(f"{'total':<24} {totais[0] * 1000:>9.0f} {totais[1] / 1024:>9.1f} "
+          f"{totais[2] * 1000:>10.0f} {totais[3] / 1024:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,23 @@
-import streamlit as st
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-import scipy.stats as stats
 import numpy as np
+import streamlit as st
+
+from analise import config, graficos_vega
+from analise.agregados import obter_cubo
+from analise.bootstrap import METODOS_IC, REAMOSTRAGENS, indicadores_bootstrap
+from analise.classificacao import tabela_classificacao
+from analise.compactacao import totais
+from analise.conteudo import BINS, GRAFICOS, LOCAIS_MAPA_PADRAO, TOP_PARES_PADRAO, insights_ic, itens_markdown
+from analise.cruzamentos import DIMENSOES_CRUZADAS, TABELAS_PADRAO, insights_cancelamentos, obter_tabela, obter_tabelas
+from analise.dados import CAMINHO_CSV, carregar_dados, relatorio_memoria_dados, versao_arquivo
+from analise.densidade import obter_histograma
+from analise.dispersao import BINS_PADRAO, PERCENTIL_PADRAO, insights_dispersao, obter_dispersao
+from analise.filtros import barra_filtros
+from analise.graficos import (grafico_densidade_2d, grafico_ic, grafico_ic_grupos, grafico_mapa_od,
+                             grafico_tabela_cruzada, grafico_top_pares)
+from analise.intervalos import DIMENSOES_IC, ic_por_grupo, indicadores_ic, series_ic
+from analise.localizacao import MEDIDAS_OD, insights_localizacao, obter_od
+from analise.medicao import medidor_da_pagina
+from analise.render import exibir_figura
 
 
 # Configuração do Streamlit
@@ -20,117 +34,138 @@ O dataset possui 148.770 registros e permite análises completas sobre corridas
 Classificar todas as variáveis do dataset de acordo com seu tipo, para facilitar a análise exploratória e a construção de modelos preditivos.
 """)
 
-# Carregar dataset
-df = pd.read_csv("ncr_ride_bookings.csv")
+# Medição por seção (painel na barra lateral e log em JSON lines)
+medidor = medidor_da_pagina()
+
+# Agregados pré-calculados (uma passada por versão do dataset)
+with medidor.secao("carregamento") as medida:
+    cubo_completo = obter_cubo()
+    medida["linhas"] = cubo_completo.total
+
+# Filtros globais: todos os gráficos abaixo usam o cubo filtrado
+with medidor.secao("filtros") as medida:
+    filtro = barra_filtros(cubo_completo)
+    cubo = obter_cubo(filtro=filtro)
+    medida["linhas"] = cubo.total
+versao_dados = (cubo.versao, filtro)
+
+if config.ATUALIZACAO_SEGUNDOS:
+    # Vigia o CSV (só um os.stat por verificação); quando ele muda, a página é refeita
+    # e as linhas novas entram nos agregados de forma incremental
+    @st.fragment(run_every=config.ATUALIZACAO_SEGUNDOS)
+    def vigiar_dataset():
+        if versao_arquivo() != cubo_completo.versao:
+            st.rerun()
+
+    vigiar_dataset()
+
+
+def figura(id_grafico, destino=st):
+    """Gráfico registrado em analise.conteudo, pelo cache de figuras."""
+    grafico = GRAFICOS[id_grafico]
+    with medidor.secao(f"gráfico: {id_grafico}", linhas=cubo.total):
+        exibir_figura(id_grafico, versao_dados, lambda: grafico.desenhar(cubo, filtro, CAMINHO_CSV),
+                      parametros=grafico.parametros, destino=destino,
+                      vega=(lambda: grafico.vega(cubo, filtro, CAMINHO_CSV)) if grafico.vega else None)
+
+
+def histograma(id_grafico, coluna, destino=st):
+    """Histograma da coluna, ou um aviso se nenhuma corrida filtrada tem valor nela."""
+    if obter_histograma(coluna, BINS, filtro=filtro).total == 0:
+        destino.info(f"Nenhuma corrida com {coluna} nos filtros selecionados.")
+    else:
+        figura(id_grafico, destino)
 
-# Classificação detalhada
-tipos_detalhados = []
-for col in df.columns:
-    if pd.api.types.is_numeric_dtype(df[col]):
-        if df[col].dropna().apply(float.is_integer).all():
-            tipo = "Quantitativa Discreta"
-        else:
-            tipo = "Quantitativa Contínua"
+
+def insights(id_grafico):
+    return GRAFICOS[id_grafico].insights(cubo, filtro, CAMINHO_CSV)
+
+
+with medidor.secao("classificação", linhas=cubo_completo.total) as medida:
+    if config.modo_streaming():
+        # Modo streaming: as linhas não ficam em memória; a classificação vem do cubo
+        df = None
+        tabela_detalhada = cubo_completo.classificacao
     else:
-        if col in ["Driver Ratings", "Customer Rating"]:
-            tipo = "Qualitativa Ordinal"
-        else:
-            tipo = "Qualitativa Nominal"
-    tipos_detalhados.append(tipo)
+        # Dataset compartilhado entre as sessões (carregado uma vez por processo; cópia rasa, nunca alterada)
+        df = carregar_dados()
+
+        # Classificação detalhada (vetorizada e em cache junto com o dataset)
+        tabela_detalhada = tabela_classificacao(df, versao_arquivo())
 
-# Criar tabela
-tabela_detalhada = pd.DataFrame({
-    "Variável": df.columns,
-    "Tipo Detalhado": tipos_detalhados
-})
+        # Memória do dataset compartilhado (vai para o log de medição junto com a seção)
+        relatorio_memoria = relatorio_memoria_dados()
+        memoria = totais(relatorio_memoria)
+        medida["dados_mb"] = memoria["mb_depois"]
 
 # Exibir tabela
 st.subheader("Classificação Detalhada das Variáveis")
 st.dataframe(tabela_detalhada)
 
+if df is not None:
+    with st.expander("💾 Memória do dataset por coluna"):
+        if config.COMPACTAR:
+            st.caption(f"{memoria['mb_antes']:.1f} MB com os tipos lidos do CSV → {memoria['mb_depois']:.1f} MB "
+                       f"com os tipos compactos ({memoria['reducao_pct']:.1f}% a menos).")
+        else:
+            st.caption(f"{memoria['mb_antes']:.1f} MB; compactação desligada (ANALISE_COMPACTAR=0).")
+        st.dataframe(relatorio_memoria, hide_index=True)
+
+if filtro.ativo:
+    st.caption(f"Filtros ativos: {cubo.total:,} de {cubo_completo.total:,} corridas.".replace(",", "."))
+if cubo.total == 0:
+    st.warning("Nenhuma corrida atende aos filtros selecionados.")
+    medidor.exibir()
+    st.stop()
+
 # --------------------------
 # GRÁFICOS EM DUAS COLUNAS (Tamanho uniforme)
 # --------------------------
 st.subheader("📊 Visualizações e Insights")
 
-fig_width, fig_height = 7, 4  # Tamanho uniforme
-limite_y = df["Booking ID"].count() * 0.3  # Limite y padrão para contagens grandes
-
-def plot_count(data, x, palette="Set2", xlabel="", ylabel="Número de Ocorrências", rotation=0, limite_y=None):
-    fig, ax = plt.subplots(figsize=(fig_width, fig_height))
-    sns.countplot(data=data, x=x, palette=palette, order=data[x].value_counts().index, ax=ax)
-    ax.set_xlabel(xlabel if xlabel else x)
-    ax.set_ylabel(ylabel)
-    if rotation:
-        ax.set_xticklabels(ax.get_xticklabels(), rotation=rotation)
-    if limite_y:
-        ax.set_ylim(0, limite_y)
-    return fig
-
-def plot_hist(data, x, bins=20, color="skyblue", xlabel="", ylabel="Número de Ocorrências"):
-    fig, ax = plt.subplots(figsize=(fig_width, fig_height))
-    sns.histplot(data[x], bins=bins, kde=True, color=color, ax=ax)
-    ax.set_xlabel(xlabel if xlabel else x)
-    ax.set_ylabel(ylabel)
-    return fig
-
 # Linha 1
 col1, col2 = st.columns(2)
 
 with col1:
     st.markdown("**Distribuição do Status das Reservas**")
-    fig = plot_count(df, "Booking Status", palette="Set2", rotation=45, limite_y=limite_y)
-    st.pyplot(fig)
+    figura("contagem_status")
 
 with col2:
     st.markdown("**Tipos de Veículos mais Utilizados**")
-    fig = plot_count(df, "Vehicle Type", palette="Set3", rotation=45, limite_y=limite_y)
-    st.pyplot(fig)
+    figura("contagem_veiculos")
 
 # Linha 2
 col3, col4 = st.columns(2)
 
 with col3:
     st.markdown("**Distribuição das Distâncias das Corridas**")
-    fig = plot_hist(df, "Ride Distance", bins=20, color="skyblue", xlabel="Distância (km)")
-    st.pyplot(fig)
+    histograma("hist_distancia", "Ride Distance")
 
 with col4:
     st.markdown("**Distribuição do Valor das Corridas**")
-    fig = plot_hist(df, "Booking Value", bins=20, color="lightgreen", xlabel="Valor")
-    st.pyplot(fig)
+    histograma("hist_valor", "Booking Value")
 
 # Linha 3
 col5, col6 = st.columns(2)
 
 with col5:
     st.markdown("**Cancelamentos por Cliente e Motorista**")
-    cancel_df = pd.DataFrame({
-        "Tipo de Cancelamento": ["Cliente", "Motorista"],
-        "Quantidade": [df["Cancelled Rides by Customer"].sum(), df["Cancelled Rides by Driver"].sum()]
-    })
-    fig, ax = plt.subplots(figsize=(fig_width, fig_height))
-    sns.barplot(data=cancel_df, x="Tipo de Cancelamento", y="Quantidade", palette="pastel", ax=ax)
-    ax.set_ylim(0, cancel_df["Quantidade"].max() * 1.1)  # Limite y uniforme
-    st.pyplot(fig)
+    figura("cancelamentos")
 
 with col6:
     st.markdown("**Método de Pagamento mais Utilizado**")
-    fig = plot_count(df, "Payment Method", palette="Set1", rotation=45, limite_y=limite_y)
-    st.pyplot(fig)
+    figura("contagem_pagamento")
 
 # Linha 4
 col7, col8 = st.columns(2)
 
 with col7:
     st.markdown("**Avaliações dos Motoristas**")
-    fig = plot_count(df, "Driver Ratings", palette="Blues", limite_y=limite_y)
-    st.pyplot(fig)
+    figura("avaliacoes_motoristas")
 
 with col8:
     st.markdown("**Avaliações dos Clientes**")
-    fig = plot_count(df, "Customer Rating", palette="Greens", limite_y=limite_y)
-    st.pyplot(fig)
+    figura("avaliacoes_clientes")
 
 st.subheader("Perguntas de Análise Possíveis")
 
@@ -171,39 +206,15 @@ Localização
 
 st.subheader("Proporção de Corridas Concluídas vs Canceladas")
 
-# Criar coluna "Status Simplificado"
-df["Status Simplificado"] = df["Booking Status"].apply(
-    lambda x: "Concluída" if x == "Completed" else "Cancelada"
-)
-
-# Contagem
-status_counts = df["Status Simplificado"].value_counts(normalize=True) * 100
-
 # Layout em duas colunas
 col1, col2 = st.columns([1, 1.5])
 
 with col1:
     # Gráfico de Pizza menor
-    fig, ax = plt.subplots(figsize=(4,4))
-    ax.pie(
-        status_counts,
-        labels=status_counts.index,
-        autopct='%1.1f%%',
-        colors=["#4CAF50", "#F44336"],
-        startangle=90
-    )
-    ax.set_title("Corridas Concluídas vs Canceladas", fontsize=12)
-    st.pyplot(fig)
+    figura("status_simplificado")
 
 with col2:
-    st.markdown(
-        f"""
-         
-        - A maioria das corridas foram **concluídas**.  
-        - Apenas **{status_counts['Cancelada']:.1f}%** das corridas resultaram em cancelamento.  
-        - Isso indica uma **boa taxa de sucesso operacional**.  
-        """
-    )
+    st.markdown(itens_markdown(insights("status_simplificado")))
     
 
 # --------------------------
@@ -215,37 +226,11 @@ st.subheader("Uso de Tipos de Veículo ao Longo do Tempo")
 col1, col2 = st.columns([1, 1.2])
 
 with col1:
-    # Converter coluna de data
-    df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
-
-    # Criar coluna de ano-mês
-    df["AnoMes"] = df["Date"].dt.to_period("M").astype(str)
-
-    # Contagem de corridas por tipo de veículo e mês
-    veiculo_tempo = df.groupby(["AnoMes", "Vehicle Type"]).size().reset_index(name="Qtd")
-
-    # Gráfico de linhas menor
-    fig, ax = plt.subplots(figsize=(6,4))
-    sns.lineplot(data=veiculo_tempo, x="AnoMes", y="Qtd", hue="Vehicle Type", marker="o", ax=ax)
-
-    ax.set_title("Uso de Tipos de Veículo ao Longo do Tempo", fontsize=12)
-    ax.set_xlabel("Período (Ano-Mês)", fontsize=10)
-    ax.set_ylabel("Quantidade de Corridas", fontsize=10)
-    ax.tick_params(axis='x', rotation=45, labelsize=8)
-    ax.tick_params(axis='y', labelsize=8)
-    ax.legend(title="Tipo de Veículo", fontsize=8)
-
-    st.pyplot(fig)
+    # Contagem de corridas por tipo de veículo e mês (gráfico de linhas menor)
+    figura("veiculos_tempo")
 
 with col2:
-    st.markdown(
-        """
-          
-        - Podemos identificar quais **tipos de veículos são mais populares ao longo do tempo**.  
-        - Se houver tendências claras (como crescimento no uso de **eBikes** ou queda no uso de **Autos**), isso pode indicar **mudanças no comportamento dos clientes**.  
-        - Também é útil para entender **picos sazonais** (feriados, fins de semana, meses de maior movimento).  
-        """
-    )
+    st.markdown(itens_markdown(insights("veiculos_tempo")))
 
 
 
@@ -258,34 +243,11 @@ st.subheader("Volume de Corridas por Hora do Dia")
 col1, col2 = st.columns([1, 1.5])
 
 with col1:
-    # Extrair hora da coluna "Time"
-    df["Hour"] = pd.to_datetime(df["Time"], errors="coerce").dt.hour
-
-    # Contagem de corridas por hora
-    corridas_hora = df.groupby("Hour").size()
-
-    # Gráfico de barras menor
-    fig, ax = plt.subplots(figsize=(5,3))
-    sns.barplot(x=corridas_hora.index, y=corridas_hora.values, palette="coolwarm", ax=ax)
-
-    ax.set_title("Número de Corridas por Hora do Dia", fontsize=12)
-    ax.set_xlabel("Hora do Dia", fontsize=10)
-    ax.set_ylabel("Quantidade de Corridas", fontsize=10)
-    ax.set_xticks(range(0,24))  # Apenas números inteiros de 0 a 23
-    ax.tick_params(axis='x', labelsize=8)
-    ax.tick_params(axis='y', labelsize=8)
-
-    st.pyplot(fig)
+    # Contagem de corridas por hora (gráfico de barras menor)
+    figura("corridas_hora")
 
 with col2:
-    st.markdown(
-        """
-         
-        - É possível identificar os **picos de demanda** ao longo do dia.  
-        - Geralmente, há **mais corridas nos horários de pico** (manhã e final da tarde).  
-        - Horários com menor volume podem indicar **oportunidades de incentivo a corridas**.  
-        """
-    )
+    st.markdown(itens_markdown(insights("corridas_hora")))
 
 
 
@@ -298,36 +260,11 @@ st.subheader("Distância Média e Mediana das Corridas ao Longo do Tempo")
 col1, col2 = st.columns([1, 1.2])
 
 with col1:
-    # Criar coluna Ano-Mês
-    df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
-    df["AnoMes"] = df["Date"].dt.to_period("M").astype(str)
-
-    # Calcular média e mediana por mês
-    distancia_stats = df.groupby("AnoMes")["Ride Distance"].agg(["mean","median"]).reset_index()
-
-    # Gráfico de linhas
-    fig, ax = plt.subplots(figsize=(6,4))
-    sns.lineplot(data=distancia_stats, x="AnoMes", y="mean", marker="o", label="Média", ax=ax)
-    sns.lineplot(data=distancia_stats, x="AnoMes", y="median", marker="o", label="Mediana", ax=ax)
-
-    ax.set_title("Distância Média e Mediana por Mês", fontsize=12)
-    ax.set_xlabel("Período (Ano-Mês)", fontsize=10)
-    ax.set_ylabel("Distância (km)", fontsize=10)
-    ax.tick_params(axis='x', rotation=45, labelsize=8)
-    ax.tick_params(axis='y', labelsize=8)
-    ax.legend(title="Estatística", fontsize=8)
-    
-    st.pyplot(fig)
+    # Média e mediana por mês (gráfico de linhas)
+    figura("distancia_mes")
 
 with col2:
-    st.markdown(
-        """
-
-        - A **distância média** geralmente é maior que a **mediana**, indicando algumas corridas muito longas que puxam a média para cima.  
-        - Podemos observar **tendências sazonais**: alguns meses têm distâncias maiores ou menores, possivelmente relacionadas a feriados ou demanda específica.  
-        - Esse gráfico ajuda a entender o **padrão de uso dos veículos ao longo do tempo**, útil para planejamento operacional.  
-        """
-    )
+    st.markdown(itens_markdown(insights("distancia_mes")))
 
 
 
@@ -340,62 +277,67 @@ st.subheader("Distribuição das Métricas")
 # Distância das corridas
 col1, col2 = st.columns([1, 1.5])
 with col1:
-    fig, ax = plt.subplots(figsize=(5,3))
-    sns.boxplot(y="Ride Distance", data=df, color="#4CAF50", ax=ax)
-    ax.set_title("Distância das Corridas", fontsize=12)
-    ax.set_ylabel("Distância (km)", fontsize=10)
-    ax.tick_params(axis='y', labelsize=8)
-    st.pyplot(fig)
+    figura("boxplot_distancia")
 
 with col2:
-    st.markdown(
-        f"""
-        ### Distância  
-        - Média da distância: {df['Ride Distance'].mean():.2f} km.  
-        - A maior parte das corridas está entre {df['Ride Distance'].quantile(0.25):.2f} km e {df['Ride Distance'].quantile(0.75):.2f} km.  
-        - Há algumas corridas muito longas (outliers), que aumentam a média.  
-        """
-    )
+    st.markdown("### Distância  \n" + itens_markdown(insights("boxplot_distancia")))
 
 # Valor das corridas
 col1, col2 = st.columns([1, 1.5])
 with col1:
-    fig, ax = plt.subplots(figsize=(5,3))
-    sns.boxplot(y="Booking Value", data=df, color="#2196F3", ax=ax)
-    ax.set_title("Valor das Corridas", fontsize=12)
-    ax.set_ylabel("Valor (R$)", fontsize=10)
-    ax.tick_params(axis='y', labelsize=8)
-    st.pyplot(fig)
+    figura("boxplot_valor")
 
 with col2:
-    st.markdown(
-        f"""
-        ### Valor  
-        - Média: R$ {df['Booking Value'].mean():.2f}  
-        - A maioria das corridas custa entre R$ {df['Booking Value'].quantile(0.25):.2f} e R$ {df['Booking Value'].quantile(0.75):.2f}.  
-        - Corridas muito caras ou muito baratas aparecem como outliers, aumentando a média.  
-        """
-    )
+    st.markdown("### Valor  \n" + itens_markdown(insights("boxplot_valor")))
 
 # Tempo médio do motorista (VTAT)
 col1, col2 = st.columns([1, 1.5])
 with col1:
-    fig, ax = plt.subplots(figsize=(5,3))
-    sns.boxplot(y="Avg VTAT", data=df, color="#FF9800", ax=ax)
-    ax.set_title("Tempo Médio do Motorista (VTAT)", fontsize=12)
-    ax.set_ylabel("Tempo (min)", fontsize=10)
-    ax.tick_params(axis='y', labelsize=8)
-    st.pyplot(fig)
+    figura("boxplot_vtat")
 
 with col2:
-    st.markdown(
-        f"""
-        ### VTAT  
-        - Média: {df['Avg VTAT'].mean():.2f} min  
-        - A maior parte dos tempos está entre {df['Avg VTAT'].quantile(0.25):.2f} e {df['Avg VTAT'].quantile(0.75):.2f} min.  
-        - Outliers indicam alguns motoristas que demoram muito mais para chegar, provavelmente em horários ou regiões específicas.  
-        """
-    )
+    st.markdown("### VTAT  \n" + itens_markdown(insights("boxplot_vtat")))
+
+
+# --------------------------
+# Pergunta: Existe relação entre valor da corrida e distância percorrida?
+# --------------------------
+
+st.subheader("Relação entre Valor e Distância das Corridas")
+
+# Histograma 2D pré-calculado + regressão pelos co-momentos: o desenho não depende do número de corridas
+@st.fragment
+def secao_dispersao():
+    with medidor.secao("valor × distância", linhas=cubo.total):
+        dispersao = obter_dispersao(filtro)
+        if dispersao.comomentos.n == 0:
+            st.info("Nenhuma corrida com distância e valor registrados nos filtros selecionados.")
+            return
+        col1, col2 = st.columns(2)
+        bins = col1.slider("Resolução (células por eixo)", min_value=20, max_value=120, value=BINS_PADRAO, step=10,
+                           key="disp_bins")
+        percentil = col2.slider("Percentil máximo do valor exibido", min_value=90, max_value=100,
+                                value=PERCENTIL_PADRAO, step=1, key="disp_percentil")
+        contagens, bordas_x, bordas_y = dispersao.vista(bins, percentil)
+        reta = dispersao.comomentos.regressao()
+
+        col1, col2 = st.columns([1.5, 1])
+
+        with col1:
+            exibir_figura("valor_distancia", versao_dados,
+                          lambda: grafico_densidade_2d(contagens, bordas_x, bordas_y, reta, "Distância (km)", "Valor (R$)"),
+                          parametros=(bins, percentil), destino=col1,
+                          vega=lambda: graficos_vega.grafico_densidade_2d(contagens, bordas_x, bordas_y, reta,
+                                                                          "Distância (km)", "Valor (R$)"))
+
+        with col2:
+            fora = dispersao.comomentos.n - int(contagens.sum())
+            st.markdown(itens_markdown(insights_dispersao(dispersao) + (
+                [f"{fora} corridas com valor acima do percentil {percentil} ficam fora do mapa (mas entram na regressão)."]
+                if fora else [])))
+
+
+secao_dispersao()
 
 
 
@@ -403,68 +345,177 @@ with col2:
 
 st.subheader("📊 Indicadores com Intervalo de Confiança Ajustável")
 
-# Sliders interativos
-conf_level = st.slider("Nível de confiança (%)", min_value=60, max_value=100, value=95, step=1)
-percentil_max = st.slider("Percentil máximo para outliers", min_value=90, max_value=100, value=95, step=1)
-
-alpha = 1 - conf_level/100
-
-# Função para calcular IC
-def calcular_ic(data, alpha):
-    n = len(data)
-    media = data.mean()
-    std = data.std()
-    t_crit = stats.t.ppf(1 - alpha/2, df=n-1)
-    intervalo = t_crit * (std/np.sqrt(n))
-    return media, intervalo
-
-# Preparar métricas
-metricas = {
-    "Booking Value (R$)": df["Booking Value"],
-    "Ride Distance (km)": df["Ride Distance"],
-    "Avg VTAT (min)": df["Avg VTAT"]
-}
-
-medias = []
-intervalos = []
-nomes = []
-
-# Calcular média e IC para cada métrica
-for nome, dados in metricas.items():
-    limite = dados.quantile(percentil_max/100)
-    dados_clip = dados.clip(upper=limite)
-    media, intervalo = calcular_ic(dados_clip, alpha)
-    medias.append(media)
-    intervalos.append(intervalo)
-    nomes.append(nome)
-
-# Layout: gráfico à esquerda e texto à direita
-col1, col2 = st.columns([2, 1])
+# Seção isolada: mover os sliders reexecuta só este fragmento
+@st.fragment
+def secao_intervalos():
+    with medidor.secao("intervalos", linhas=cubo.total):
+        # Sliders interativos
+        conf_level = st.slider("Nível de confiança (%)", min_value=60, max_value=100, value=95, step=1)
+        percentil_max = st.slider("Percentil máximo para outliers", min_value=90, max_value=100, value=95, step=1)
+        metodo = st.radio("Método do intervalo", METODOS_IC, horizontal=True)
+
+        if metodo == "t de Student":
+            # Média e IC de cada métrica a partir das séries ordenadas (busca binária + somas acumuladas)
+            nomes, medias, intervalos = indicadores_ic(series_ic(cubo, filtro), conf_level, percentil_max)
+            inferiores = [m - i for m, i in zip(medias, intervalos)]
+            superiores = [m + i for m, i in zip(medias, intervalos)]
+        else:
+            # Bootstrap: a distribuição fica em cache; confiança e método só mudam os quantis
+            nomes, medias, inferiores, superiores = indicadores_bootstrap(conf_level, percentil_max, metodo, filtro)
+        if np.isnan(medias).all():
+            st.info("Nenhuma corrida com as métricas do IC nos filtros selecionados.")
+            return
+        # Barras de erro assimétricas (o IC bootstrap não é simétrico em torno da média)
+        erros = [[m - inf for m, inf in zip(medias, inferiores)], [sup - m for m, sup in zip(medias, superiores)]]
 
-with col1:
-    fig, ax = plt.subplots(figsize=(6,4))
-    ax.bar(nomes, medias, yerr=intervalos, capsize=10, color=["#2196F3", "#4CAF50", "#FF9800"])
-    ax.set_ylabel("Valores")
-    ax.set_title(f"Média das Métricas com IC {conf_level}%")
-    ax.tick_params(axis='y', labelsize=10)
-    col1.pyplot(fig)
+        # Layout: gráfico à esquerda e texto à direita
+        col1, col2 = st.columns([2, 1])
 
-with col2:
-    st.markdown(
-    f"""
+        with col1:
+            exibir_figura("ic_metricas", versao_dados, lambda: grafico_ic(nomes, medias, erros, conf_level),
+                          parametros=(conf_level, percentil_max, metodo), destino=col1,
+                          vega=lambda: graficos_vega.grafico_ic(nomes, medias, erros, conf_level))
 
-    - **Ride Distance (km):** a média das distâncias percorridas é {medias[1]:.2f} km, com IC {conf_level}% de {medias[1]-intervalos[1]:.2f} a {medias[1]+intervalos[1]:.2f} km.  
+        with col2:
+            st.markdown(itens_markdown(insights_ic(medias, inferiores, superiores, conf_level) + [
+                f"Nos métodos bootstrap o IC vem de {REAMOSTRAGENS} reamostragens da média cortada; o BCa corrige o viés e a assimetria das métricas, como o valor das corridas."
+            ]))
 
-    - **Avg VTAT (min):** o tempo médio que os motoristas levam para chegar aos clientes é {medias[2]:.2f} minutos, com IC {conf_level}% de {medias[2]-intervalos[2]:.2f} a {medias[2]+intervalos[2]:.2f} minutos.  
 
-    - Cada barra do gráfico representa a média de uma métrica e as linhas de erro mostram a variação provável da média real (intervalo de confiança).  
 
-    - Ajuste o percentil máximo para remover outliers extremos e visualizar melhor a maioria dos dados.
+secao_intervalos()
+
+
+st.subheader("📊 Intervalos de Confiança por Grupo")
+
+# IC de cada métrica por grupo, a partir dos momentos guardados no cubo
+@st.fragment
+def secao_intervalos_grupos():
+    with medidor.secao("intervalos por grupo", linhas=cubo.total):
+        col1, col2, col3 = st.columns(3)
+        rotulo = col1.selectbox("Agrupar por", list(DIMENSOES_IC), key="ic_grupo")
+        opcoes_sub = ["Nenhum"] + [r for r in DIMENSOES_IC if r != rotulo]
+        rotulo_sub = col2.selectbox("Subdividir por", opcoes_sub, key="ic_subgrupo")
+        conf_grupos = col3.slider("Nível de confiança (%)", min_value=60, max_value=99, value=95, step=1, key="ic_grupo_conf")
+
+        dimensao = DIMENSOES_IC[rotulo]
+        subdivisao = DIMENSOES_IC.get(rotulo_sub)
+        dimensoes = [dimensao] if subdivisao is None else [dimensao, subdivisao]
+        tabela = ic_por_grupo(cubo, dimensoes, conf_grupos)
+        if tabela.empty:
+            st.info("Nenhuma corrida com as métricas do IC nos filtros selecionados.")
+            return
+
+        col1, col2 = st.columns([2, 1])
+
+        with col1:
+            exibir_figura("ic_grupos", versao_dados, lambda: grafico_ic_grupos(tabela, dimensao, conf_grupos, subdivisao),
+                          parametros=(tuple(dimensoes), conf_grupos), destino=col1,
+                          vega=lambda: graficos_vega.grafico_ic_grupos(tabela, dimensao, conf_grupos, subdivisao))
+
+        with col2:
+            st.markdown(
+            f"""
+
+            - Cada ponto é a média da métrica no grupo e a barra mostra o IC {conf_grupos}% (t de Student).  
+
+            - Barras que não se sobrepõem indicam diferenças prováveis entre os grupos, como no **VTAT** e no **valor das corridas por tipo de veículo** ou por **horário**.  
+
+            - Grupos pequenos têm intervalos mais largos; grupos com menos de duas corridas não têm intervalo.  
+
+            - Aqui não há corte de outliers: as médias usam todas as corridas do grupo.
+            """
+        )
+
+        with st.expander("Tabela dos intervalos"):
+            st.dataframe(tabela)
+
+
+secao_intervalos_grupos()
 
-    - Booking Value (R$): R$ {medias[0]:.2f}. O intervalo de confiança de {conf_level}% indica que estamos confiantes de que a média real do valor das corridas está entre R$ {medias[0]-intervalos[0]:.2f} e R$ {medias[0]+intervalos[0]:.2f}.  
-    """
-)
-    
+
+st.subheader("📍 Locais de Partida e Destino")
+
+# Matrizes origem-destino esparsas (locais codificados uma vez; os filtros da página viram uma máscara)
+@st.fragment
+def secao_localizacao():
+    with medidor.secao("localização", linhas=cubo.total):
+        od = obter_od(filtro)
+        col1, col2, col3 = st.columns(3)
+        medida = col1.radio("Medida", list(MEDIDAS_OD), horizontal=True, key="od_medida")
+        k = col2.slider("Trajetos no ranking", min_value=5, max_value=30, value=TOP_PARES_PADRAO, step=1, key="od_k")
+        n_mapa = col3.slider("Locais no mapa de calor", min_value=10, max_value=60, value=LOCAIS_MAPA_PADRAO, step=5,
+                             key="od_n")
+
+        pares = od.top_pares(k, medida)
+        rotulos, matriz = od.submatriz(n_mapa, medida)
+
+        col1, col2 = st.columns(2)
+        exibir_figura("od_mapa", versao_dados, lambda: grafico_mapa_od(rotulos, matriz, medida),
+                      parametros=(medida, n_mapa), destino=col1,
+                      vega=lambda: graficos_vega.grafico_mapa_od(rotulos, matriz, medida))
+        exibir_figura("od_pares", versao_dados, lambda: grafico_top_pares(pares, medida),
+                      parametros=(medida, k), destino=col2,
+                      vega=lambda: graficos_vega.grafico_top_pares(pares, medida))
+
+        st.markdown(itens_markdown(insights_localizacao(od)))
+
+        with st.expander("Tabelas por local"):
+            col1, col2 = st.columns(2)
+            col1.markdown("**Partidas**")
+            col1.dataframe(od.top_locais(k, "partida", medida), hide_index=True)
+            col2.markdown("**Destinos**")
+            col2.dataframe(od.top_locais(k, "destino", medida), hide_index=True)
+
+
+secao_localizacao()
+
+
+st.subheader("🚫 Motivos de Cancelamento e Tabelas Cruzadas")
+
+# Tabelas de contingência a partir dos códigos das categorias (uma contagem por tabela, sem reler o dataset)
+@st.fragment
+def secao_cruzamentos():
+    with medidor.secao("tabelas cruzadas", linhas=cubo.total):
+        tabelas = obter_tabelas(TABELAS_PADRAO, filtro)
+        col1, col2, col3 = st.columns(3)
+        rotulo_linhas = col1.selectbox("Linhas", list(DIMENSOES_CRUZADAS), key="cruz_linhas")
+        opcoes = [r for r in DIMENSOES_CRUZADAS if r != rotulo_linhas]
+        rotulo_colunas = col2.selectbox("Colunas", opcoes, key="cruz_colunas",
+                                      index=opcoes.index("Tipo de veículo") if "Tipo de veículo" in opcoes else 0)
+        opcoes_camada = ["Nenhum"] + [r for r in opcoes if r != rotulo_colunas]
+        rotulo_camada = col3.selectbox("Separar por", opcoes_camada, key="cruz_camada")
+
+        colunas = (DIMENSOES_CRUZADAS[rotulo_linhas], DIMENSOES_CRUZADAS[rotulo_colunas])
+        if rotulo_camada != "Nenhum":
+            colunas += (DIMENSOES_CRUZADAS[rotulo_camada],)
+        tabela = tabelas[colunas] if colunas in tabelas else obter_tabela(colunas, filtro)
+        duas_vias = tabela.marginal(*colunas[:2])
+        proporcoes = duas_vias.proporcoes()
+        titulo = f"{rotulo_colunas} por {rotulo_linhas} (% da linha)"
+
+        col1, col2 = st.columns([2, 1])
+
+        with col1:
+            if proporcoes.empty:
+                st.info("Sem corridas com as duas categorias preenchidas nos filtros atuais.")
+            else:
+                exibir_figura("tabela_cruzada", versao_dados, lambda: grafico_tabela_cruzada(proporcoes, titulo),
+                              parametros=colunas[:2], destino=col1,
+                              vega=lambda: graficos_vega.grafico_tabela_cruzada(proporcoes, titulo))
+
+        with col2:
+            st.markdown(f"**Teste qui-quadrado ({rotulo_linhas} × {rotulo_colunas}):** {duas_vias.qui_quadrado().resumo()}")
+            st.markdown(itens_markdown(insights_cancelamentos(tabelas)))
+
+        with st.expander("Tabela de contagens"):
+            st.dataframe(tabela.dataframe())
+            if len(colunas) == 3:
+                st.markdown(f"**Teste em cada categoria de {rotulo_camada}**")
+                st.dataframe(tabela.qui_quadrado_por_camada(), hide_index=True)
+
+
+secao_cruzamentos()
 
 
 st.subheader("🔹 Justificativa do Intervalo de Confiança")
@@ -501,3 +552,5 @@ st.markdown(
     Em resumo, o dashboard fornece uma visão clara e interativa das operações da Uber, ajudando a **tomar decisões estratégicas com base em dados reais**.
     """
 )
+
+medidor.exibir()
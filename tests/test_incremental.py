@@ -0,0 +1,55 @@
+import os
+
+from analise.dados import ler_dados, versao_arquivo
+from analise.incremental import acrescimo, avancar, fim_linhas, marca_inicial
+
+
+CABECALHO = "Booking ID,Booking Value\n"
+# Linhas suficientes para o meio do arquivo ficar fora das janelas da assinatura
+N = 20_000
+
+
+def _escrever(caminho, linhas, mtime_ns):
+    with open(caminho, "w") as f:
+        f.write(CABECALHO + "".join(linhas))
+    os.utime(caminho, ns=(mtime_ns, mtime_ns))
+
+
+def _marca_processada(caminho):
+    marca = marca_inicial(caminho)
+    return avancar(caminho, marca, fim_linhas(caminho), 0)
+
+
+def test_reescrita_do_mesmo_tamanho_muda_a_versao(tmp_path):
+    caminho = str(tmp_path / "corridas.csv")
+    linhas = [f"CNR{i:06d},{1000000 + i}\n" for i in range(N)]
+    _escrever(caminho, linhas, 1_000_000_000)
+    antes = versao_arquivo(caminho)
+    ler_dados(caminho)
+
+    # Mesma quantidade de bytes, uma linha do meio alterada
+    linhas[N // 2] = f"CNR{N // 2:06d},9999999\n"
+    _escrever(caminho, linhas, 2_000_000_000)
+    depois = versao_arquivo(caminho)
+
+    assert depois != antes
+    # O sidecar Parquet também é refeito, não tomado por acréscimo vazio
+    df = ler_dados(caminho)
+    assert len(df) == N
+    assert df["Booking Value"].iloc[N // 2] == 9999999
+
+
+def test_acrescimo_so_quando_o_arquivo_cresce(tmp_path):
+    caminho = str(tmp_path / "corridas.csv")
+    linhas = [f"CNR{i:06d},{1000000 + i}\n" for i in range(N)]
+    _escrever(caminho, linhas, 1_000_000_000)
+    marca = _marca_processada(caminho)
+
+    linhas[N // 2] = f"CNR{N // 2:06d},9999999\n"
+    _escrever(caminho, linhas, 2_000_000_000)
+    assert acrescimo(caminho, marca) is None
+
+    marca = _marca_processada(caminho)
+    _escrever(caminho, linhas + [f"CNR{N:06d},{1000000 + N}\n"], 3_000_000_000)
+    inicio, fim = acrescimo(caminho, marca)
+    assert (inicio, fim) == (marca.offset, os.path.getsize(caminho))
@@ -0,0 +1,32 @@
+import numpy as np
+import pytest
+
+from analise.intervalos import SerieOrdenada
+from analise.sketches import HistogramaStreaming
+
+
+@pytest.mark.filterwarnings("error")
+@pytest.mark.parametrize("limite", [5.0, 100.0])
+def test_media_std_cortada_com_um_valor(limite):
+    sketch = HistogramaStreaming()
+    sketch.adicionar(np.array([7.5]))
+    serie = SerieOrdenada.de_valores(np.array([7.5]))
+
+    media, std = sketch.media_std_cortada(limite)
+    media_serie, std_serie = serie.media_std_cortada(limite)
+
+    assert media == pytest.approx(media_serie)
+    assert np.isnan(std) and np.isnan(std_serie)
+
+
+def test_media_std_cortada_como_a_serie_ordenada():
+    valores = np.random.default_rng(0).gamma(2.0, 10.0, 5_000)
+    sketch = HistogramaStreaming()
+    sketch.adicionar(valores)
+    limite = np.percentile(valores, 95)
+
+    media, std = sketch.media_std_cortada(limite)
+    media_serie, std_serie = SerieOrdenada.de_valores(valores).media_std_cortada(limite)
+
+    assert media == pytest.approx(media_serie, rel=1e-2)
+    assert std == pytest.approx(std_serie, rel=1e-2)